@@ -0,0 +1,286 @@
+"""
+Benchmark of the parser on synthetic KiCAD 6 schematics and symbol libraries.
+
+Usage:  python benchmark.py [--symbols N] [--wires N] [--labels N] [--library-symbols N] [--pins N] [--repeat N]
+                            [--workers N] [--output results.json] [--compare baseline.json] [--tolerance 0.1]
+
+Every measure is the best of --repeat runs. decode_threaded_time decodes on --workers threads, which only helps on
+free-threaded Python builds. With --compare the results are checked against a previous output file and
+the exit code is 1 if any time or memory measure is worse than the baseline by more than --tolerance.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from kicad2python import sexp
+from kicad2python.common import is_free_threaded
+from kicad2python.parser import Schematic, SymbolLibrary
+
+
+def _uuid(number: int) -> str:
+    return "00000000-0000-4000-8000-{:012x}".format(number)
+
+
+def _mm(value: float) -> str:
+    return "{:.4f}".format(value).rstrip("0").rstrip(".")
+
+
+def generate_symbol(name: str, pins: int, indent: str = "  ") -> str:
+    """
+    Returns a library symbol with a rectangle body and pins split on its left and right side.
+    """
+    half = (pins + 1) // 2
+    height = 2.54 * (half + 1)
+    lines = ['(symbol "{}" (pin_names (offset 1.016)) (in_bom yes) (on_board yes)'.format(name)]
+    for property_id, (key, value) in enumerate([("Reference", "U"), ("Value", name), ("Footprint", ""),
+                                                ("Datasheet", "~"), ("ki_keywords", "synthetic benchmark part"),
+                                                ("ki_description", "Synthetic part with {} pins".format(pins))]):
+        lines.append('  (property "{}" "{}" (id {}) (at 0 {} 0)'.format(key, value, property_id, _mm(height / 2)))
+        lines.append('    (effects (font (size 1.27 1.27)){})'.format(" hide" if property_id > 1 else ""))
+        lines.append('  )')
+    short_name = name.split(":")[-1]
+    lines.append('  (symbol "{}_0_1"'.format(short_name))
+    lines.append('    (rectangle (start -5.08 {}) (end 5.08 {})'.format(_mm(height / 2), _mm(-height / 2)))
+    lines.append('      (stroke (width 0.254) (type default) (color 0 0 0 0))')
+    lines.append('      (fill (type background))')
+    lines.append('    )')
+    lines.append('  )')
+    lines.append('  (symbol "{}_1_1"'.format(short_name))
+    for pin in range(pins):
+        side = pin // half
+        x = -7.62 if side == 0 else 7.62
+        y = height / 2 - 2.54 * (pin % half + 1)
+        lines.append('    (pin passive line (at {} {} {}) (length 2.54)'.format(_mm(x), _mm(y), 0 if side == 0 else 180))
+        lines.append('      (name "P{}" (effects (font (size 1.27 1.27))))'.format(pin + 1))
+        lines.append('      (number "{}" (effects (font (size 1.27 1.27))))'.format(pin + 1))
+        lines.append('    )')
+    lines.append('  )')
+    lines.append(')')
+    return "\n".join([indent + line for line in lines])
+
+
+def generate_schematic(symbols: int, wires: int, labels: int, library_symbols: int, pins: int) -> str:
+    """
+    Returns a schematic with given number of placed symbols, wires and labels, using library_symbols different library
+    symbols of pins pins each.
+    """
+    lines = ["(kicad_sch (version 20211123) (generator eeschema)", "",
+             "  (uuid {})".format(_uuid(0)), "", '  (paper "A4")', "", "  (lib_symbols"]
+    for library_symbol in range(library_symbols):
+        lines.append(generate_symbol("Bench:PART{}".format(library_symbol), pins, "    "))
+    lines.append("  )")
+    number = 1
+    for wire in range(wires):
+        x = 25.4 + 2.54 * (wire % 100)
+        y = 25.4 + 2.54 * (wire // 100)
+        lines.append("  (wire (pts (xy {} {}) (xy {} {}))".format(_mm(x), _mm(y), _mm(x + 2.54), _mm(y)))
+        lines.append("    (stroke (width 0) (type default) (color 0 0 0 0))")
+        lines.append("    (uuid {})".format(_uuid(number)))
+        lines.append("  )")
+        number += 1
+        if wire % 10 == 0:
+            lines.append("  (junction (at {} {}) (diameter 0) (color 0 0 0 0)".format(_mm(x), _mm(y)))
+            lines.append("    (uuid {})".format(_uuid(number)))
+            lines.append("  )")
+            number += 1
+    for label in range(labels):
+        lines.append('  (label "NET{}" (at {} {} 0)'.format(label, _mm(25.4 + 2.54 * (label % 100)),
+                                                            _mm(25.4 + 2.54 * (label // 100))))
+        lines.append("    (effects (font (size 1.27 1.27)) (justify left bottom))")
+        lines.append("    (uuid {})".format(_uuid(number)))
+        lines.append("  )")
+        number += 1
+    instances = []
+    for symbol in range(symbols):
+        symbol_uuid = _uuid(number)
+        number += 1
+        x = 25.4 + 25.4 * (symbol % 50)
+        y = 25.4 + 25.4 * (symbol // 50)
+        lib_id = "Bench:PART{}".format(symbol % library_symbols)
+        lines.append('  (symbol (lib_id "{}") (at {} {} 0) (unit 1)'.format(lib_id, _mm(x), _mm(y)))
+        lines.append("    (in_bom yes) (on_board yes)")
+        lines.append("    (uuid {})".format(symbol_uuid))
+        for property_id, (key, value) in enumerate([("Reference", "U{}".format(symbol + 1)), ("Value", lib_id),
+                                                    ("Footprint", ""), ("Datasheet", "~")]):
+            lines.append('    (property "{}" "{}" (id {}) (at {} {} 0)'.format(key, value, property_id, _mm(x),
+                                                                              _mm(y - 2.54 * property_id)))
+            lines.append("      (effects (font (size 1.27 1.27)){})".format(" hide" if property_id > 1 else ""))
+            lines.append("    )")
+        for pin in range(pins):
+            lines.append('    (pin "{}" (uuid {}))'.format(pin + 1, _uuid(number)))
+            number += 1
+        lines.append("  )")
+        instances.append('    (path "/{}"\n      (reference "U{}") (unit 1) (value "{}") (footprint "")\n    )'
+                         .format(symbol_uuid, symbol + 1, lib_id))
+    lines.append("  (sheet_instances\n    (path \"/\" (page \"1\"))\n  )")
+    lines.append("  (symbol_instances")
+    lines.extend(instances)
+    lines.append("  )")
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+def generate_symbol_library(symbols: int, pins: int) -> str:
+    lines = ["(kicad_symbol_lib (version 20211014) (generator kicad_symbol_editor)"]
+    for symbol in range(symbols):
+        lines.append(generate_symbol("PART{}".format(symbol), pins))
+    lines.append(")")
+    return "\n".join(lines) + "\n"
+
+
+def _best_time(function, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _peak_memory(function) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(arguments) -> dict:
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        schematic_file = os.path.join(directory, "bench.kicad_sch")
+        saved_file = os.path.join(directory, "bench_saved.kicad_sch")
+        library_file = os.path.join(directory, "bench.kicad_sym")
+        with open(schematic_file, "w", encoding="UTF-8") as file:
+            file.write(generate_schematic(arguments.symbols, arguments.wires, arguments.labels,
+                                          arguments.library_symbols, arguments.pins))
+        with open(library_file, "w", encoding="UTF-8") as file:
+            file.write(generate_symbol_library(arguments.library_size, arguments.pins))
+        results["schematic_bytes"] = os.path.getsize(schematic_file)
+        results["library_bytes"] = os.path.getsize(library_file)
+
+        with open(schematic_file, "r", encoding="UTF-8") as file:
+            raw_string = file.read()
+        s_expression_list = sexp.load(raw_string)
+        schematic = Schematic()
+        schematic.load(schematic_file)
+
+        def read():
+            with open(schematic_file, "r", encoding="UTF-8") as schematic_stream:
+                schematic_stream.read()
+
+        def decode():
+            Schematic().from_s_expression(s_expression_list, workers=1)
+
+        def decode_threaded():
+            Schematic().from_s_expression(s_expression_list, workers=arguments.workers)
+
+        def load():
+            Schematic().load(schematic_file)
+
+        def save():
+            schematic.save(saved_file)
+
+        def round_trip():
+            new_schematic = Schematic()
+            new_schematic.load(schematic_file)
+            new_schematic.save(saved_file)
+
+        def library_index():
+            SymbolLibrary().load(library_file)
+
+        def library_symbol():
+            library = SymbolLibrary()
+            library.load(library_file)
+            library.get_symbol("PART{}".format(arguments.library_size // 2))
+
+        repeat = arguments.repeat
+        results["read_time"] = _best_time(read, repeat)
+        results["tokenize_time"] = _best_time(lambda: sexp.load(raw_string), repeat)
+        results["decode_time"] = _best_time(decode, repeat)
+        results["decode_threaded_time"] = _best_time(decode_threaded, repeat)
+        results["load_time"] = _best_time(load, repeat)
+        results["serialize_time"] = _best_time(schematic.to_s_expression, repeat)
+        results["save_time"] = _best_time(save, repeat)
+        results["round_trip_time"] = _best_time(round_trip, repeat)
+        results["library_index_time"] = _best_time(library_index, repeat)
+        results["library_symbol_time"] = _best_time(library_symbol, repeat)
+
+        results["tokenize_memory"] = _peak_memory(lambda: sexp.load(raw_string))
+        results["decode_memory"] = _peak_memory(decode)
+        results["load_memory"] = _peak_memory(load)
+        results["save_memory"] = _peak_memory(save)
+        results["library_index_memory"] = _peak_memory(library_index)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Returns the names of the time and memory measures worse than baseline by more than tolerance (0.1 = 10%).
+    """
+    regressions = []
+    for name, value in sorted(results.items()):
+        if not (name.endswith("_time") or name.endswith("_memory")) or name not in baseline:
+            continue
+        ratio = value / baseline[name] if baseline[name] else 1.0
+        flag = ""
+        if ratio > 1.0 + tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print("{:<24} {:>14.6g} {:>14.6g} {:>8.2f}x{}".format(name, baseline[name], value, ratio, flag))
+    return regressions
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--symbols", type=int, default=500, help="Placed symbols in the schematic.")
+    argument_parser.add_argument("--wires", type=int, default=1000, help="Wires in the schematic.")
+    argument_parser.add_argument("--labels", type=int, default=200, help="Local labels in the schematic.")
+    argument_parser.add_argument("--library-symbols", type=int, default=20, help="Symbols in lib_symbols.")
+    argument_parser.add_argument("--pins", type=int, default=8, help="Pins of each library symbol.")
+    argument_parser.add_argument("--library-size", type=int, default=2000, help="Symbols in the .kicad_sym file.")
+    argument_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                                 help="Threads of the threaded decoding measure.")
+    argument_parser.add_argument("--repeat", type=int, default=3, help="Runs of each measure, the best is kept.")
+    argument_parser.add_argument("--output", help="Save results to this JSON file.")
+    argument_parser.add_argument("--compare", help="JSON file of a previous run to compare with.")
+    argument_parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown when comparing.")
+    arguments = argument_parser.parse_args()
+
+    results = {"configuration": {key: value for key, value in vars(arguments).items()
+                                 if key not in ("output", "compare", "tolerance")},
+               "python": platform.python_version(),
+               "implementation": platform.python_implementation(),
+               "free_threaded": is_free_threaded()}
+    results.update(run(arguments))
+
+    if arguments.output is not None:
+        with open(arguments.output, "w", encoding="UTF-8") as file:
+            json.dump(results, file, indent=2)
+
+    if arguments.compare is None:
+        for name, value in results.items():
+            print("{:<24} {}".format(name, value))
+        return 0
+    with open(arguments.compare, "r", encoding="UTF-8") as file:
+        baseline = json.load(file)
+    if baseline.get("configuration") != results["configuration"]:
+        print("Warning: baseline was run with a different configuration {}".format(baseline.get("configuration")))
+    print("{:<24} {:>14} {:>14} {:>9}".format("measure", "baseline", "current", "ratio"))
+    return 1 if compare(results, baseline, arguments.tolerance) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
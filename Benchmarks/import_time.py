@@ -0,0 +1,90 @@
+"""
+Import time of the kicad2python package and of its main entry points.
+
+Usage:  python import_time.py [--repeat N] [--budget SECONDS] [--output results.json] [--compare baseline.json]
+                              [--tolerance 0.1]
+
+Each statement runs in a new interpreter, the best of --repeat runs is kept. Also reported is the number of modules
+each statement loads, and whether it loads sexpdata. The exit code is 1 if "import kicad2python" takes more than
+--budget seconds, or with --compare if a time is worse than the baseline by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from benchmark import compare
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+statements = {"package": "import kicad2python",
+              "schematic": "from kicad2python import Schematic",
+              "symbol_library": "from kicad2python import SymbolLibrary",
+              "annotation": "from kicad2python import Annotator",
+              "query": "from kicad2python import select",
+              "svg_renderer": "from kicad2python import SVGRenderer",
+              "erc": "from kicad2python import ERCEngine"}
+
+_measure = """
+import sys, time
+modules = set(sys.modules)
+start = time.perf_counter()
+{}
+elapsed = time.perf_counter() - start
+print(elapsed, len(set(sys.modules) - modules), "sexpdata" in sys.modules)
+"""
+
+
+def measure(statement: str, repeat: int) -> tuple:
+    """
+    Returns (best time, modules loaded, sexpdata loaded) of statement run in new interpreters.
+    """
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _measure.format(statement)], cwd=root, check=True,
+                                stdout=subprocess.PIPE, universal_newlines=True).stdout.split()
+        elapsed = float(output[0])
+        best = elapsed if best is None else min(best, elapsed)
+    return best, int(output[1]), output[2] == "True"
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--repeat", type=int, default=5, help="Runs of each statement, the best is kept.")
+    argument_parser.add_argument("--budget", type=float, default=0.005,
+                                 help="Maximum time in seconds of a bare 'import kicad2python'.")
+    argument_parser.add_argument("--output", help="Save results to this JSON file.")
+    argument_parser.add_argument("--compare", help="JSON file of a previous run to compare with.")
+    argument_parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown when comparing.")
+    arguments = argument_parser.parse_args()
+
+    results = {"python": platform.python_version(), "implementation": platform.python_implementation()}
+    for name, statement in statements.items():
+        elapsed, modules, sexpdata_loaded = measure(statement, arguments.repeat)
+        results[name + "_import_time"] = elapsed
+        results[name + "_modules"] = modules
+        results[name + "_loads_sexpdata"] = sexpdata_loaded
+
+    if arguments.output is not None:
+        with open(arguments.output, "w", encoding="UTF-8") as file:
+            json.dump(results, file, indent=2)
+
+    exit_code = 0
+    if results["package_import_time"] > arguments.budget:
+        print("'import kicad2python' takes {:.4f} s, over the budget of {} s".format(results["package_import_time"],
+                                                                                arguments.budget))
+        exit_code = 1
+    if arguments.compare is None:
+        for name, value in results.items():
+            print("{:<32} {}".format(name, value))
+        return exit_code
+    with open(arguments.compare, "r", encoding="UTF-8") as file:
+        baseline = json.load(file)
+    print("{:<24} {:>14} {:>14} {:>9}".format("measure", "baseline", "current", "ratio"))
+    return 1 if compare(results, baseline, arguments.tolerance) else exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+A basic parser from KiCAD files to Python objects.
+
+Importing the package loads nothing else: submodules are imported the first time one of their names is used
+(PEP 562), so that tools only pay for what they use, e.g. the tokenizer and element classes for Schematic,
+compression codecs for compressed files, bounding boxes for queries and rendering.
+
+Example:    import kicad2python
+            schematic = kicad2python.Schematic()
+            schematic.load("file.kicad_sch")
+"""
+import importlib
+
+# Public name -> submodule defining it.
+_exports = {}
+for _module, _names in {
+        "parser": ["Schematic", "SymbolLibrary"],
+        "common": ["KiCADElement", "RawElement", "ElementRegistry", "PositionIdentifier", "CoordinatePoint",
+                   "CoordinatePointList", "StrokeDefinition", "TextEffects", "PageSettings", "TitleBlock",
+                   "UniqueIdentifier", "generate_uuids"],
+        "schematic_file_format": ["class_dict", "register_element", "LibrarySymbols", "Junction", "NoConnect",
+                                  "BusEntry", "Wire", "Bus", "Image", "GraphicalLine", "GraphicalText", "LocalLabel",
+                                  "GlobalLabel", "HierarchicalLabel", "Pin", "SymbolSchematic", "HierarchicalSheet",
+                                  "SymbolInstance", "SymbolInstances"],
+        "schematic_and_symbol_library": ["symbol_graphic_items_dict", "Symbol", "SymbolProperty", "SymbolArc",
+                                         "SymbolCircle", "SymbolCurve", "SymbolLine", "SymbolRectangle",
+                                         "SymbolText", "SymbolPin"],
+        "units": ["mm_to_iu", "iu_to_mm", "format_iu"],
+        "transform": ["Transform"],
+        "builder": ["SchematicBuilder"],
+        "symbol_search": ["SymbolSearchIndex"],
+        "profiling": ["Profiler"],
+        "fidelity": ["verify_round_trip", "canonical_hash"],
+        "snapshot": ["save_snapshot", "load_snapshot"],
+        "async_io": ["AsyncSchematicIO", "load_async", "save_async"],
+        "erc": ["ERCEngine", "Rule", "register_rule", "Violation"],
+        "annotation": ["Annotator"],
+        "svg_renderer": ["SVGRenderer", "render_svg"],
+        "bounding_box": ["BoundingBox", "BoundingBoxes", "sheet_extent"],
+        "query": ["select", "compile_selector", "SchematicIndex"],
+        "transaction": ["Transaction", "TransactionLog", "TransactionError"],
+        "netlist": ["build_netlist"]}.items():
+    for _name in _names:
+        _exports[_name] = _module
+_submodules = {"annotation", "async_io", "bounding_box", "builder", "cli", "common", "compressed_io", "erc",
+               "fidelity", "netlist", "parser", "profiling", "query", "schematic_and_symbol_library",
+               "schematic_file_format", "sexp", "snapshot", "svg_renderer", "symbol_search", "transaction", "transform",
+               "units"}
+del _module, _names, _name
+
+__all__ = sorted(_exports)
+
+
+def __getattr__(name: str):
+    if name in _exports:
+        value = getattr(importlib.import_module("." + _exports[name], __name__), name)
+    elif name in _submodules:
+        value = importlib.import_module("." + name, __name__)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+    # Cached in the module, the next accesses do not go through __getattr__.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_exports) | _submodules)
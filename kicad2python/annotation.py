@@ -0,0 +1,211 @@
+import re
+
+from .schematic_file_format import LibrarySymbols, SymbolSchematic, SymbolInstances
+from .transform import unit_count
+
+_reference_regex = re.compile(r'^(.*?)(\d*)\??$')
+
+# Sort keys of the symbols inside a sheet.
+orders = {"x": lambda position: (position.x, position.y),
+          "y": lambda position: (position.y, position.x)}
+
+
+class _Package:
+    """
+    Units sharing one reference: the SymbolSchematic of the units of a multi-unit symbol, or a single symbol.
+    """
+    __slots__ = ("prefix", "number", "key", "unit_count", "units")
+
+    def __init__(self, prefix: str, number, key: tuple, count: int):
+        self.prefix = prefix
+        self.number = number
+        self.key = key
+        self.unit_count = count
+        self.units = set()
+
+
+class _Item:
+    """
+    One instance of a symbol: a symbol in a sheet used several times has one item per instance path.
+    """
+    __slots__ = ("symbol", "path", "sheet_path", "unit", "prefix", "number", "value", "reference_property",
+                 "instance", "package")
+
+    def __init__(self, symbol: SymbolSchematic, path: str, instance):
+        """
+        :param path: Instance path, "/<symbol uuid>" for a symbol without instance.
+        :param instance: SymbolInstance of the path, None if there is none.
+        """
+        self.symbol = symbol
+        self.path = path
+        self.sheet_path = path.rsplit("/", 1)[0]
+        self.unit = symbol.unit or 1
+        self.instance = instance
+        self.reference_property = None
+        self.value = ""
+        self.package = None
+        reference = ""
+        for prop in symbol.properties:
+            if prop.key == "Reference":
+                self.reference_property = prop
+                reference = prop.value
+            elif prop.key == "Value":
+                self.value = prop.value
+        if self.instance is not None:
+            reference = str(self.instance.reference)
+        match = _reference_regex.match(reference)
+        self.prefix = match.group(1)
+        self.number = int(match.group(2)) if match.group(2) else None
+
+
+class Annotator:
+    """
+    Assign references (R1, R2, ...) to the symbols of a project.
+
+    Symbols are numbered sheet after sheet, in the order of the schematics given, and inside a sheet by position.
+    A symbol of a sheet used several times has one instance path per use (/<sheet uuid>/.../<symbol uuid>), each one
+    gets its own reference; the uses of a sheet are numbered in the order of their paths in symbol_instances.
+    Numbers are allocated per prefix (the reference without its number). Units of a multi-unit symbol keep sharing
+    one reference; an unannotated unit ("U?") joins the first symbol of the same library symbol and value missing
+    that unit. The reference of each SymbolInstance is updated, and the Reference property of each SymbolSchematic
+    gets the reference of its first instance.
+
+    Example:    Annotator(order="y").run([root_schematic, sub_schematic])
+                Annotator(reset=False).run([schematic])     # only number the "R?" symbols
+    """
+
+    def __init__(self, order: str = "x", start: int = 1, reset: bool = True):
+        """
+        :param order: "x" to number by columns (x then y), "y" by rows (y then x).
+        :param start: First number of each prefix.
+        :param reset: Renumber all the symbols if True, otherwise keep the existing numbers and number only the
+                      unannotated symbols, with the lowest free numbers.
+        """
+        self.order = orders[order]
+        self.start = start
+        self.reset = reset
+
+    def run(self, schematics: list) -> dict:
+        """
+        Returns instance path -> new reference, for every symbol instance; the path is "/<symbol uuid>" for symbols
+        without instance.
+        """
+        instances = {}
+        sheet_paths = {}
+        library_symbols = {}
+        sheets = []
+        for schematic in schematics:
+            sheet_symbols = []
+            for element in schematic.kicad_element:
+                if isinstance(element, SymbolSchematic):
+                    sheet_symbols.append(element)
+                elif isinstance(element, SymbolInstances):
+                    for instance in element.path_list:
+                        path = str(instance.instance_path)
+                        sheet_path, uuid = path.rsplit("/", 1)
+                        instances.setdefault(uuid, {}).setdefault(path, instance)
+                        sheet_paths.setdefault(sheet_path, len(sheet_paths))
+                elif isinstance(element, LibrarySymbols):
+                    for library_symbol in element.symbol_list:
+                        library_symbols[library_symbol.library_identifier] = library_symbol
+            sheets.append(sheet_symbols)
+
+        items = []
+        for sheet_symbols in sheets:
+            sheet_items = []
+            for symbol in sheet_symbols:
+                uuid = symbol.unique_identifier.uuid
+                symbol_instances = instances.get(uuid)
+                if symbol_instances:
+                    sheet_items.extend([_Item(symbol, path, instance) for path, instance in symbol_instances.items()])
+                else:
+                    sheet_items.append(_Item(symbol, "/" + uuid, None))
+            sheet_items.sort(key=lambda item: (sheet_paths.get(item.sheet_path, len(sheet_paths)),
+                                               self.order(item.symbol.position_identifier)))
+            items.extend(sheet_items)
+        self._build_packages(items, library_symbols)
+        self._number_packages(items)
+
+        references = {}
+        for item in items:
+            reference = "{}{}".format(item.prefix, item.package.number)
+            if item.instance is not None:
+                item.instance.reference = reference
+            references[item.path] = reference
+        # The first instance of a symbol is written last.
+        for item in reversed(items):
+            if item.reference_property is not None:
+                item.reference_property.value = references[item.path]
+        return references
+
+    @staticmethod
+    def _build_packages(items: list, library_symbols: dict):
+        """
+        Group the items in packages, in sort order. Annotated items join the package of their reference, unless that
+        unit is already taken; the others join an incomplete package of the same part, or start a new one.
+        """
+        counts = {}
+        packages = {}
+        open_packages = {}
+        for item in items:
+            library_identifier = item.symbol.library_identifier
+            count = counts.get(library_identifier)
+            if count is None:
+                library_symbol = library_symbols.get(library_identifier)
+                count = counts[library_identifier] = unit_count(library_symbol) if library_symbol is not None else 1
+
+            package = None
+            if item.number is not None:
+                package = packages.get((item.prefix, item.number))
+                if package is None:
+                    package = packages[(item.prefix, item.number)] = _Package(item.prefix, item.number,
+                                                                              (item.prefix, library_identifier,
+                                                                               item.value), count)
+                elif item.unit in package.units:
+                    package = None
+            if package is None and count > 1:
+                for candidate in open_packages.get((item.prefix, library_identifier, item.value), ()):
+                    if item.unit not in candidate.units:
+                        package = candidate
+                        break
+            if package is None:
+                package = _Package(item.prefix, None, (item.prefix, library_identifier, item.value), count)
+
+            item.package = package
+            package.units.add(item.unit)
+            if package.unit_count > 1:
+                # Packages missing units, where unannotated units can go.
+                if len(package.units) == 1:
+                    open_packages.setdefault(package.key, []).append(package)
+                elif len(package.units) == package.unit_count:
+                    open_packages[package.key].remove(package)
+
+    def _number_packages(self, items: list):
+        if self.reset:
+            next_numbers = {}
+            numbered = set()
+            for item in items:
+                package = item.package
+                if id(package) in numbered:
+                    continue
+                numbered.add(id(package))
+                package.number = next_numbers.get(package.prefix, self.start)
+                next_numbers[package.prefix] = package.number + 1
+            return
+
+        used = {}
+        for item in items:
+            if item.package.number is not None:
+                used.setdefault(item.prefix, set()).add(item.package.number)
+        next_numbers = {}
+        for item in items:
+            package = item.package
+            if package.number is not None:
+                continue
+            taken = used.setdefault(package.prefix, set())
+            number = next_numbers.get(package.prefix, self.start)
+            while number in taken:
+                number += 1
+            package.number = number
+            taken.add(number)
+            next_numbers[package.prefix] = number + 1
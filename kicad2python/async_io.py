@@ -0,0 +1,119 @@
+import asyncio
+import concurrent.futures
+
+from . import sexp
+from .compressed_io import compression_from_file_name, read_blocks, open_text_writer
+from .parser import Schematic
+
+
+def _read_file(file_name: str) -> str:
+    # Decompressed here, on the io executor, so that the parse step gets plain text.
+    return "".join(read_blocks(file_name))
+
+
+def _write_file(file_name: str, content: str):
+    with open_text_writer(file_name, compression_from_file_name(file_name)) as file:
+        file.write(content)
+
+
+def _parse_schematic(raw_string: str, file_name: str) -> Schematic:
+    """
+    Parse step of Schematic.load(), module level so that it can run in a process pool.
+    """
+    schematic = Schematic()
+    schematic.file_name = file_name
+    schematic.raw_string = raw_string
+    schematic.from_s_expression(sexp.load(raw_string))
+    return schematic
+
+
+def _serialize_schematic(schematic: Schematic) -> str:
+    return schematic.to_s_expression()
+
+
+class AsyncSchematicIO:
+    """
+    Load and save schematics from asyncio code without blocking the event loop.
+
+    File reads and writes run on io_executor (a small thread pool by default), parsing and serialization on
+    executor, which can be a ThreadPoolExecutor or a ProcessPoolExecutor; with a process pool the Schematic is pickled
+    back to the caller. At most max_concurrency loads or saves are in progress at the same time, the others wait.
+
+    Cancelling a load or save stops waiting for it; a step already running in an executor completes, but its result
+    is discarded and the following steps are not started.
+
+    Example:    schematic_io = AsyncSchematicIO(ProcessPoolExecutor(4), max_concurrency=8)
+                schematic = await schematic_io.load("file.kicad_sch")
+    """
+
+    def __init__(self, executor: concurrent.futures.Executor = None, max_concurrency: int = 8,
+                 io_executor: concurrent.futures.Executor = None):
+        self.executor = executor
+        self.io_executor = io_executor
+        self.max_concurrency = max_concurrency
+        self._semaphore = None
+        self._owned_executors = []
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created on first use, so that it belongs to the running event loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _get_io_executor(self) -> concurrent.futures.Executor:
+        if self.io_executor is None:
+            self.io_executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(self.max_concurrency, 8),
+                                                                     thread_name_prefix="KiCAD2Python-io")
+            self._owned_executors.append(self.io_executor)
+        return self.io_executor
+
+    async def load(self, file_name: str) -> Schematic:
+        loop = asyncio.get_running_loop()
+        async with self._get_semaphore():
+            raw_string = await loop.run_in_executor(self._get_io_executor(), _read_file, file_name)
+            return await loop.run_in_executor(self.executor, _parse_schematic, raw_string, file_name)
+
+    async def save(self, schematic: Schematic, file_name: str = None):
+        """
+        :param file_name: File where save, if None the original file will be overwritten.
+        """
+        if file_name is None:
+            file_name = schematic.file_name
+        loop = asyncio.get_running_loop()
+        async with self._get_semaphore():
+            content = await loop.run_in_executor(self.executor, _serialize_schematic, schematic)
+            await loop.run_in_executor(self._get_io_executor(), _write_file, file_name, content)
+
+    async def load_many(self, file_names: list) -> list:
+        """
+        Load schematics concurrently, returns them in the order of file_names.
+        """
+        return list(await asyncio.gather(*[self.load(file_name) for file_name in file_names]))
+
+    def close(self):
+        """
+        Shut down the executors created by this object, the ones passed by the caller are left running.
+        """
+        for executor in self._owned_executors:
+            executor.shutdown(wait=False)
+        self._owned_executors = []
+        self.io_executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+async def load_async(file_name: str, executor: concurrent.futures.Executor = None) -> Schematic:
+    """
+    Load a single schematic without blocking the event loop, see AsyncSchematicIO for many files.
+    """
+    async with AsyncSchematicIO(executor) as schematic_io:
+        return await schematic_io.load(file_name)
+
+
+async def save_async(schematic: Schematic, file_name: str = None, executor: concurrent.futures.Executor = None):
+    async with AsyncSchematicIO(executor) as schematic_io:
+        await schematic_io.save(schematic, file_name)
@@ -0,0 +1,315 @@
+import hashlib
+import math
+
+from .schematic_and_symbol_library import SymbolArc, SymbolCircle, SymbolCurve, SymbolLine, SymbolRectangle, \
+    SymbolText, SymbolPin
+from .schematic_file_format import LibrarySymbols, SymbolSchematic, Wire, Bus, BusEntry, Junction, NoConnect, \
+    GraphicalLine, GraphicalText, LocalLabel, GlobalLabel, HierarchicalLabel
+from .transform import symbol_orientation_matrix, unit_sub_symbols
+from .units import mm_to_iu
+
+default_text_size = 12700
+# Width of a character relative to the text size, an estimate: the real width depends on the font and characters.
+text_width_ratio = 0.75
+no_connect_size = 6350
+junction_diameter = 9144
+
+
+class BoundingBox:
+    """
+    Axis aligned box in internal units, (x1, y1) is the top left corner and (x2, y2) the bottom right one.
+    """
+    def __init__(self, x1: int, y1: int, x2: int, y2: int):
+        self.x1 = x1
+        self.y1 = y1
+        self.x2 = x2
+        self.y2 = y2
+
+    @staticmethod
+    def from_points(points) -> "BoundingBox":
+        """
+        Returns the box enclosing (x, y) points, None if there is no point.
+        """
+        points = list(points)
+        if not points:
+            return None
+        xs = [point[0] for point in points]
+        ys = [point[1] for point in points]
+        return BoundingBox(min(xs), min(ys), max(xs), max(ys))
+
+    @property
+    def width(self) -> int:
+        return self.x2 - self.x1
+
+    @property
+    def height(self) -> int:
+        return self.y2 - self.y1
+
+    def merge(self, other: "BoundingBox") -> "BoundingBox":
+        if other is None:
+            return self
+        return BoundingBox(min(self.x1, other.x1), min(self.y1, other.y1), max(self.x2, other.x2),
+                           max(self.y2, other.y2))
+
+    def intersects(self, other: "BoundingBox") -> bool:
+        return self.x1 <= other.x2 and other.x1 <= self.x2 and self.y1 <= other.y2 and other.y1 <= self.y2
+
+    def contains(self, x: int, y: int) -> bool:
+        return self.x1 <= x <= self.x2 and self.y1 <= y <= self.y2
+
+    def inflate(self, margin: int) -> "BoundingBox":
+        return BoundingBox(self.x1 - margin, self.y1 - margin, self.x2 + margin, self.y2 + margin)
+
+    def transform(self, xx: int, xy: int, yx: int, yy: int, dx: int = 0, dy: int = 0) -> "BoundingBox":
+        """
+        Returns the box moved by a rotation by a multiple of 90 degrees or a mirror, then a translation: the result
+        is exact, corners are mapped to corners.
+        """
+        x1 = xx * self.x1 + xy * self.y1
+        y1 = yx * self.x1 + yy * self.y1
+        x2 = xx * self.x2 + xy * self.y2
+        y2 = yx * self.x2 + yy * self.y2
+        return BoundingBox(min(x1, x2) + dx, min(y1, y2) + dy, max(x1, x2) + dx, max(y1, y2) + dy)
+
+    def flip_y(self) -> "BoundingBox":
+        return BoundingBox(self.x1, -self.y2, self.x2, -self.y1)
+
+    def __eq__(self, other):
+        return isinstance(other, BoundingBox) and (self.x1, self.y1, self.x2, self.y2) == \
+            (other.x1, other.y1, other.x2, other.y2)
+
+    def __repr__(self):
+        return "BoundingBox({}, {}, {}, {})".format(self.x1, self.y1, self.x2, self.y2)
+
+
+def merge_boxes(boxes) -> BoundingBox:
+    """
+    Returns the box enclosing all the boxes, None values are skipped; None if there is no box.
+    """
+    result = None
+    for box in boxes:
+        if box is not None:
+            result = box if result is None else result.merge(box)
+    return result
+
+
+def arc_center(start, mid, end):
+    """
+    Returns the (x, y) center of the circle through three points, None if they are aligned.
+    """
+    (x1, y1), (x2, y2), (x3, y3) = start, mid, end
+    d = 2 * (x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
+    if d == 0:
+        return None
+    s1, s2, s3 = x1 * x1 + y1 * y1, x2 * x2 + y2 * y2, x3 * x3 + y3 * y3
+    return ((s1 * (y2 - y3) + s2 * (y3 - y1) + s3 * (y1 - y2)) / d,
+            (s1 * (x3 - x2) + s2 * (x1 - x3) + s3 * (x2 - x1)) / d)
+
+
+def arc_box(start, mid, end) -> BoundingBox:
+    """
+    Returns the box of the arc from start to end through mid: its ends plus the extreme points of the circle (right,
+    top, left, bottom) lying on the arc.
+    """
+    center = arc_center(start, mid, end)
+    if center is None:
+        return BoundingBox.from_points([start, mid, end])
+    center_x, center_y = center
+    radius = math.hypot(start[0] - center_x, start[1] - center_y)
+    start_angle = math.atan2(start[1] - center_y, start[0] - center_x)
+    mid_angle = (math.atan2(mid[1] - center_y, mid[0] - center_x) - start_angle) % (2 * math.pi)
+    end_angle = (math.atan2(end[1] - center_y, end[0] - center_x) - start_angle) % (2 * math.pi)
+    # Arc going the positive way if mid is met before end, the negative way otherwise.
+    positive = mid_angle < end_angle
+    points = [start, end]
+    for quarter in range(4):
+        angle = (quarter * math.pi / 2 - start_angle) % (2 * math.pi)
+        if (angle <= end_angle) if positive else (angle >= end_angle):
+            points.append((int(round(center_x + radius * math.cos(quarter * math.pi / 2))),
+                           int(round(center_y + radius * math.sin(quarter * math.pi / 2)))))
+    box = BoundingBox.from_points(points)
+    return BoundingBox(int(math.floor(box.x1)), int(math.floor(box.y1)), int(math.ceil(box.x2)),
+                       int(math.ceil(box.y2)))
+
+
+def text_box(text: str, x: int, y: int, angle, text_effects) -> BoundingBox:
+    """
+    Returns the estimated box of a text in sheet coordinates (Y axis pointing down), see text_width_ratio.
+    """
+    size = default_text_size
+    if text_effects is not None and text_effects.size:
+        size = mm_to_iu(text_effects.size[0])
+    width = int(len(str(text)) * size * text_width_ratio)
+    justify = (text_effects.justify or "").split() if text_effects is not None else []
+    if "left" in justify:
+        x1 = 0
+    elif "right" in justify:
+        x1 = -width
+    else:
+        x1 = -width // 2
+    if "top" in justify:
+        y1 = 0
+    elif "bottom" in justify:
+        y1 = -size
+    else:
+        y1 = -size // 2
+    box = BoundingBox(x1, y1, x1 + width, y1 + size)
+    if (angle or 0) % 180:
+        # Vertical text, read from bottom to top.
+        box = box.transform(0, 1, -1, 0)
+    return box.transform(1, 0, 0, 1, x, y)
+
+
+def library_item_box(item) -> BoundingBox:
+    """
+    Returns the box of a library symbol item (graphic item or pin) in library coordinates (Y axis pointing up),
+    None for items without geometry.
+    """
+    if isinstance(item, SymbolRectangle):
+        return BoundingBox.from_points([item.start, item.end])
+    if isinstance(item, SymbolCircle):
+        x, y = item.center
+        radius = item.radius[0]
+        return BoundingBox(x - radius, y - radius, x + radius, y + radius)
+    if isinstance(item, SymbolArc):
+        return arc_box(item.start, item.mid, item.end)
+    if isinstance(item, (SymbolLine, SymbolCurve)):
+        return BoundingBox.from_points([(point.x, point.y) for point in item.coordinate_point_list.coordinate_points])
+    if isinstance(item, SymbolText):
+        position = item.position_identifier
+        # text_box works with the Y axis pointing down.
+        return text_box(item.text, position.x, -position.y, position.angle, item.text_effects).flip_y()
+    if isinstance(item, SymbolPin):
+        position = item.position_identifier
+        angle = int(position.angle or 0) % 360
+        dx, dy = {0: (1, 0), 90: (0, 1), 180: (-1, 0), 270: (0, -1)}.get(angle, (0, 0))
+        return BoundingBox.from_points([(position.x, position.y),
+                                        (position.x + dx * item.length, position.y + dy * item.length)])
+    return None
+
+
+def library_symbol_key(library_symbol) -> bytes:
+    """
+    Returns a digest of the content of a library symbol: schematics may embed different symbols under the same lib_id,
+    e.g. before and after a library update, caches of symbol drawings are keyed by it.
+    """
+    return hashlib.blake2b(library_symbol.to_s_expression().encode("UTF-8"), digest_size=16).digest()
+
+
+class BoundingBoxes:
+    """
+    Compute bounding boxes of sheet elements, in internal units with the Y axis pointing down.
+
+    The box of a library symbol unit is computed once and cached by (library_symbol_key(), unit), so that the cache
+    can be shared by schematics embedding different versions of a symbol. A placed symbol box is the cached box moved
+    by the symbol orientation and position, merged with the boxes of its visible fields.
+    Boxes are geometric: stroke widths are not included and text boxes are estimates.
+
+    Example:    boxes = BoundingBoxes()
+                visible = [element for element, box in boxes.element_boxes(schematic) if box.intersects(viewport)]
+                extent = boxes.sheet_extent(schematic)
+    """
+
+    def __init__(self, include_fields: bool = True):
+        self.include_fields = include_fields
+        self.library_symbols = {}
+        # lib_id -> library_symbol_key() of the symbols in library_symbols.
+        self._library_keys = {}
+        self._symbol_boxes = {}
+
+    def clear_cache(self):
+        self._symbol_boxes = {}
+
+    def add_library_symbols(self, schematic):
+        for element in schematic.kicad_element:
+            if isinstance(element, LibrarySymbols):
+                for library_symbol in element.symbol_list:
+                    self.library_symbols[library_symbol.library_identifier] = library_symbol
+                    self._library_keys[library_symbol.library_identifier] = library_symbol_key(library_symbol)
+
+    def library_symbol_box(self, library_symbol, unit: int = 1) -> BoundingBox:
+        """
+        Returns the box of a library symbol unit in sheet orientation (Y axis pointing down), None if it draws
+        nothing. Cached.
+        """
+        if self.library_symbols.get(library_symbol.library_identifier) is library_symbol:
+            key = (self._library_keys[library_symbol.library_identifier], unit)
+        else:
+            key = (library_symbol_key(library_symbol), unit)
+        if key in self._symbol_boxes:
+            return self._symbol_boxes[key]
+        boxes = []
+        for symbol in [library_symbol] + unit_sub_symbols(library_symbol, unit):
+            boxes.extend([library_item_box(item) for item in symbol.graphic_items])
+            boxes.extend([library_item_box(pin) for pin in symbol.pins])
+        box = merge_boxes(boxes)
+        if box is not None:
+            box = box.flip_y()
+        self._symbol_boxes[key] = box
+        return box
+
+    def symbol_box(self, symbol: SymbolSchematic) -> BoundingBox:
+        position = symbol.position_identifier
+        box = None
+        library_symbol = self.library_symbols.get(symbol.library_identifier)
+        if library_symbol is not None:
+            box = self.library_symbol_box(library_symbol, symbol.unit or 1)
+        if box is not None:
+            box = box.transform(*symbol_orientation_matrix(position.angle, symbol.mirror), position.x, position.y)
+        else:
+            box = BoundingBox(position.x, position.y, position.x, position.y)
+        if self.include_fields:
+            for prop in symbol.properties:
+                if not prop.text_effects.is_hide and prop.value:
+                    box = box.merge(text_box(prop.value, prop.position_identifier.x, prop.position_identifier.y,
+                                             prop.position_identifier.angle, prop.text_effects))
+        return box
+
+    def element_box(self, element) -> BoundingBox:
+        """
+        Returns the box of a sheet element, None for elements without geometry.
+        Library symbols must have been added with add_library_symbols() for symbol boxes to include their drawing.
+        """
+        if isinstance(element, SymbolSchematic):
+            return self.symbol_box(element)
+        if isinstance(element, (Wire, Bus, GraphicalLine)):
+            return BoundingBox.from_points([(point.x, point.y)
+                                            for point in element.coordinate_point_list.coordinate_points])
+        if isinstance(element, Junction):
+            x, y = element.position_identifier.x, element.position_identifier.y
+            radius = (mm_to_iu(element.diameter or 0) or junction_diameter) // 2
+            return BoundingBox(x - radius, y - radius, x + radius, y + radius)
+        if isinstance(element, NoConnect):
+            x, y = element.position_identifier.x, element.position_identifier.y
+            return BoundingBox(x - no_connect_size, y - no_connect_size, x + no_connect_size, y + no_connect_size)
+        if isinstance(element, BusEntry):
+            x, y = element.position_identifier.x, element.position_identifier.y
+            return BoundingBox.from_points([(x, y), (x + element.size[0], y + element.size[1])])
+        if isinstance(element, (LocalLabel, GlobalLabel, HierarchicalLabel, GraphicalText)):
+            position = element.position_identifier
+            return text_box(element.text, position.x, position.y, position.angle, element.text_effects)
+        return None
+
+    def element_boxes(self, schematic) -> list:
+        """
+        Returns (element, box) for each element of the schematic with a geometry.
+        """
+        self.library_symbols = {}
+        self._library_keys = {}
+        self.add_library_symbols(schematic)
+        boxes = []
+        for element in schematic.kicad_element:
+            box = self.element_box(element)
+            if box is not None:
+                boxes.append((element, box))
+        return boxes
+
+    def sheet_extent(self, schematic) -> BoundingBox:
+        """
+        Returns the box enclosing all the elements of the schematic, None for an empty sheet.
+        """
+        return merge_boxes([box for element, box in self.element_boxes(schematic)])
+
+
+def sheet_extent(schematic) -> BoundingBox:
+    return BoundingBoxes().sheet_extent(schematic)
@@ -0,0 +1,250 @@
+import re
+
+from .common import PositionIdentifier, CoordinatePoint, PageSettings, UniqueIdentifier, TextEffects, generate_uuids
+from .schematic_and_symbol_library import SymbolProperty
+from .schematic_file_format import LibrarySymbols, Junction, NoConnect, Wire, LocalLabel, GlobalLabel, Pin, \
+    SymbolSchematic, HierarchicalSheetInstance, HierarchicalSheetInstances, SymbolInstance, SymbolInstances
+from .parser import Schematic
+
+default_version = 20211123
+default_text_size = [1.27, 1.27]
+hidden_properties = ("Footprint", "Datasheet")
+
+_unit_regex = re.compile(r"_(\d+)_\d+$")
+
+
+def _text_effects(justify=None, is_hide=False) -> TextEffects:
+    text_effects = TextEffects()
+    text_effects.size = list(default_text_size)
+    text_effects.justify = justify
+    text_effects.is_hide = is_hide
+    return text_effects
+
+
+def _position(x, y, angle=None) -> PositionIdentifier:
+    position_identifier = PositionIdentifier()
+    position_identifier.x = x
+    position_identifier.y = y
+    position_identifier.angle = angle
+    return position_identifier
+
+
+def _default_stroke(stroke_definition):
+    stroke_definition.width = 0
+    stroke_definition.type = "default"
+    stroke_definition.color = [0, 0, 0, 0]
+
+
+class SchematicBuilder:
+    """
+    Create schematic elements in bulk from columns of data.
+    All coordinates are in internal units, see units.py.
+
+    Example:    builder = SchematicBuilder()
+                builder.add_library_symbol(resistor)
+                builder.add_symbols(["Device:R"] * 2, [(0, 0), (50800, 0)], [{"Reference": "R1", "Value": "1k"},
+                                                                           {"Reference": "R2", "Value": "1k"}])
+                builder.schematic.save("generated.kicad_sch")
+    """
+
+    def __init__(self, schematic: Schematic = None):
+        if schematic is None:
+            schematic = Schematic()
+            schematic.version = default_version
+            schematic.generator = "KiCAD2Python"
+        self.schematic = schematic
+        self.library_symbols = self._find_or_append(LibrarySymbols)
+        self.sheet_instances = self._find_or_append(HierarchicalSheetInstances)
+        self.symbol_instances = self._find_or_append(SymbolInstances)
+        self.pin_numbers = {}
+
+        if not any(isinstance(item, UniqueIdentifier) for item in self.schematic.kicad_element):
+            unique_identifier = UniqueIdentifier()
+            unique_identifier.generate()
+            page_settings = PageSettings()
+            page_settings.paper_size = "\"A4\""
+            self.schematic.kicad_element[0:0] = [unique_identifier, page_settings]
+        if len(self.sheet_instances.sheet_instances) == 0:
+            root_sheet = HierarchicalSheetInstance()
+            root_sheet.instance_path = "/"
+            root_sheet.page = "1"
+            self.sheet_instances.sheet_instances.append(root_sheet)
+        for symbol in self.library_symbols.symbol_list:
+            self._index_pins(symbol)
+
+    def _find_or_append(self, element_class):
+        for item in self.schematic.kicad_element:
+            if isinstance(item, element_class):
+                return item
+        new_class_instance = element_class()
+        self.schematic.kicad_element.append(new_class_instance)
+        return new_class_instance
+
+    def _index_pins(self, symbol):
+        """
+        Store the pin numbers of every unit of a library symbol, unit 0 holds the pins common to all units.
+        """
+        pin_numbers = {}
+        for unit in [symbol] + symbol.sub_symbols:
+            match = _unit_regex.search(unit.library_identifier)
+            unit_number = int(match.group(1)) if match is not None and unit is not symbol else 0
+            pin_numbers.setdefault(unit_number, []).extend([str(pin.number[0]) for pin in unit.pins])
+        self.pin_numbers[symbol.library_identifier] = pin_numbers
+
+    def _append(self, elements):
+        """
+        Insert new elements before the instances sections, which KiCad expects at the end of the file.
+        """
+        kicad_element = self.schematic.kicad_element
+        index = min(kicad_element.index(self.sheet_instances), kicad_element.index(self.symbol_instances))
+        kicad_element[index:index] = elements
+
+    def add_library_symbol(self, symbol):
+        """
+        Add a library Symbol, its library_identifier must be the full lib_id, e.g. "Device:R".
+        """
+        self.library_symbols.symbol_list.append(symbol)
+        self._index_pins(symbol)
+
+    def add_symbols(self, lib_ids: list, positions: list, properties: list = None, angles: list = None,
+                    units: list = None, in_bom: bool = True, on_board: bool = True) -> list:
+        """
+        Add symbols and their symbol_instances entries.
+
+        :param lib_ids: Library identifier of each symbol, e.g. "Device:R".
+        :param positions: (x, y) of each symbol.
+        :param properties: Dictionary of properties of each symbol, e.g. {"Reference": "R1", "Value": "10k"}.
+                           Reference, Value, Footprint and Datasheet are always written, empty if missing.
+        :param angles: Angle of each symbol, 0 if None.
+        :param units: Unit of each symbol, 1 if None.
+        :return: The new SymbolSchematic elements.
+        """
+        count = len(lib_ids)
+        properties = properties if properties is not None else [{}] * count
+        angles = angles if angles is not None else [0] * count
+        units = units if units is not None else [1] * count
+
+        pin_numbers_list = []
+        for lib_id, unit in zip(lib_ids, units):
+            pin_numbers = self.pin_numbers.get(lib_id, {})
+            pin_numbers_list.append(pin_numbers.get(0, []) + pin_numbers.get(unit, []))
+        uuids = iter(generate_uuids(count + sum([len(pin_numbers) for pin_numbers in pin_numbers_list])))
+
+        new_symbols = []
+        new_instances = []
+        for lib_id, (x, y), symbol_properties, angle, unit, pin_numbers in zip(lib_ids, positions, properties, angles,
+                                                                               units, pin_numbers_list):
+            new_symbol = SymbolSchematic()
+            new_symbol.library_identifier = lib_id
+            new_symbol.position_identifier = _position(x, y, angle)
+            new_symbol.unit = unit
+            new_symbol.in_bom = in_bom
+            new_symbol.on_board = on_board
+            new_symbol.unique_identifier.uuid = next(uuids)
+
+            all_properties = {"Reference": "", "Value": "", "Footprint": "", "Datasheet": ""}
+            all_properties.update(symbol_properties)
+            for property_id, (key, value) in enumerate(all_properties.items()):
+                new_property = SymbolProperty()
+                new_property.key = key
+                new_property.value = value.replace("\"", "\\\"")
+                new_property.id = property_id
+                new_property.position_identifier = _position(x, y, 0)
+                new_property.text_effects = _text_effects(is_hide=key in hidden_properties or property_id > 3)
+                new_symbol.properties.append(new_property)
+
+            for number in pin_numbers:
+                new_pin = Pin()
+                new_pin.number = number
+                new_pin.unique_identifier.uuid = next(uuids)
+                new_symbol.pins.append(new_pin)
+
+            new_instance = SymbolInstance()
+            new_instance.instance_path = "/{}".format(new_symbol.unique_identifier.uuid)
+            new_instance.reference = all_properties["Reference"]
+            new_instance.unit = unit
+            new_instance.value = all_properties["Value"]
+            new_instance.footprint = all_properties["Footprint"]
+
+            new_symbols.append(new_symbol)
+            new_instances.append(new_instance)
+
+        self._append(new_symbols)
+        self.symbol_instances.path_list.extend(new_instances)
+        return new_symbols
+
+    def add_wires(self, segments: list) -> list:
+        """
+        :param segments: ((x1, y1), (x2, y2)) of each wire.
+        """
+        uuids = generate_uuids(len(segments))
+        new_wires = []
+        for points, uuid in zip(segments, uuids):
+            new_wire = Wire()
+            for x, y in points:
+                new_point = CoordinatePoint()
+                new_point.x = x
+                new_point.y = y
+                new_wire.coordinate_point_list.coordinate_points.append(new_point)
+            _default_stroke(new_wire.stroke_definition)
+            new_wire.unique_identifier.uuid = uuid
+            new_wires.append(new_wire)
+        self._append(new_wires)
+        return new_wires
+
+    def add_junctions(self, positions: list) -> list:
+        uuids = generate_uuids(len(positions))
+        new_junctions = []
+        for (x, y), uuid in zip(positions, uuids):
+            new_junction = Junction()
+            new_junction.position_identifier = _position(x, y)
+            new_junction.diameter = 0
+            new_junction.color = [0, 0, 0, 0]
+            new_junction.unique_identifier.uuid = uuid
+            new_junctions.append(new_junction)
+        self._append(new_junctions)
+        return new_junctions
+
+    def add_no_connects(self, positions: list) -> list:
+        uuids = generate_uuids(len(positions))
+        new_no_connects = []
+        for (x, y), uuid in zip(positions, uuids):
+            new_no_connect = NoConnect()
+            new_no_connect.position_identifier = _position(x, y)
+            new_no_connect.unique_identifier.uuid = uuid
+            new_no_connects.append(new_no_connect)
+        self._append(new_no_connects)
+        return new_no_connects
+
+    def add_labels(self, texts: list, positions: list, angles: list = None) -> list:
+        angles = angles if angles is not None else [0] * len(texts)
+        uuids = generate_uuids(len(texts))
+        new_labels = []
+        for text, (x, y), angle, uuid in zip(texts, positions, angles, uuids):
+            new_label = LocalLabel()
+            new_label.text = text
+            new_label.position_identifier = _position(x, y, angle)
+            new_label.text_effects = _text_effects("left bottom")
+            new_label.unique_identifier.uuid = uuid
+            new_labels.append(new_label)
+        self._append(new_labels)
+        return new_labels
+
+    def add_global_labels(self, texts: list, positions: list, shapes: list = None, angles: list = None) -> list:
+        """
+        :param shapes: Shape of each label (input, output, bidirectional, tri_state, passive), passive if None.
+        """
+        shapes = shapes if shapes is not None else ["passive"] * len(texts)
+        angles = angles if angles is not None else [0] * len(texts)
+        uuids = generate_uuids(len(texts))
+        new_labels = []
+        for text, (x, y), shape, angle, uuid in zip(texts, positions, shapes, angles, uuids):
+            new_label = GlobalLabel()
+            new_label.text = text
+            new_label.shape = shape
+            new_label.position_identifier = _position(x, y, angle)
+            new_label.text_effects = _text_effects("left")
+            new_label.unique_identifier.uuid = uuid
+            new_labels.append(new_label)
+        self._append(new_labels)
+        return new_labels
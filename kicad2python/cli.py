@@ -0,0 +1,218 @@
+"""
+Batch processing of schematic files from the command line.
+
+Usage:  python -m kicad2python {stats,bom,netlist,roundtrip,validate} FILE_OR_DIRECTORY [...] [--jobs N]
+                               [--output results.jsonl] [--ordered] [--max-tasks-per-child N]
+
+Directories are searched recursively for .kicad_sch files, compressed ones included. Files are processed by a pool of
+worker processes, at most 2 * --jobs files are in flight so that memory stays bounded whatever the number of files.
+One JSON object is written per file and per line (JSON Lines) as soon as the file is done, in completion order unless
+--ordered:
+
+    {"file": ..., "command": ..., "ok": true, "result": ..., "timing": {"read": s, "tokenize": s, "decode": s,
+     "<command>": s}, "error": null}
+
+A summary with the total time of each stage is written to stderr. The exit code is 1 if a file failed, has round trip
+differences or ERC violations.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from . import sexp
+from .compressed_io import read_blocks
+from .parser import Schematic
+
+schematic_suffixes = (".kicad_sch", ".kicad_sch.gz", ".kicad_sch.xz", ".kicad_sch.bz2", ".kicad_sch.zst")
+
+
+def _stats(s_expression_list: list, schematic: Schematic) -> tuple:
+    from .query import element_token, class_tokens
+    from .schematic_file_format import LibrarySymbols
+    tokens = class_tokens()
+    elements = {}
+    for element in schematic.kicad_element:
+        token = element_token(element, tokens)
+        elements[token] = elements.get(token, 0) + 1
+    library_symbols = sum(len(element.symbol_list) for element in schematic.kicad_element
+                          if isinstance(element, LibrarySymbols))
+    return {"version": schematic.version, "generator": schematic.generator, "elements": elements,
+            "library_symbols": library_symbols}, True
+
+
+def _bom(s_expression_list: list, schematic: Schematic) -> tuple:
+    from .netlist import instance_references, symbol_reference, property_value
+    from .schematic_file_format import SymbolSchematic, SymbolInstances
+    references = {}
+    for element in schematic.kicad_element:
+        if isinstance(element, SymbolInstances):
+            references.update(instance_references(element.path_list))
+    groups = {}
+    seen = set()
+    for element in schematic.kicad_element:
+        if not isinstance(element, SymbolSchematic) or not element.in_bom:
+            continue
+        reference = symbol_reference(element, references)
+        # Units of a package share the reference, power and flag symbols start with "#".
+        if reference.startswith("#") or reference in seen:
+            continue
+        seen.add(reference)
+        key = (element.library_identifier, property_value(element, "Value"), property_value(element, "Footprint"))
+        groups.setdefault(key, []).append(reference)
+    bom = [{"lib_id": lib_id, "value": value, "footprint": footprint, "quantity": len(group_references),
+            "references": sorted(group_references)}
+           for (lib_id, value, footprint), group_references in sorted(groups.items())]
+    return bom, True
+
+
+def _netlist(s_expression_list: list, schematic: Schematic) -> tuple:
+    from .netlist import build_netlist
+    return build_netlist([schematic]), True
+
+
+def _roundtrip(s_expression_list: list, schematic: Schematic) -> tuple:
+    from .fidelity import compare
+    differences = compare(s_expression_list, sexp.load(schematic.to_s_expression()))
+    return [{"status": status, "token": token, "identifier": str(identifier), "detail": detail}
+            for status, token, identifier, detail in differences], not differences
+
+
+def _validate(s_expression_list: list, schematic: Schematic) -> tuple:
+    from .erc import ERCEngine
+    violations = ERCEngine().run([schematic])
+    return [violation.to_dict() for violation in violations], not violations
+
+
+# Command -> function(tokenized file, schematic) returning (JSON serializable result, ok).
+commands = {"stats": _stats, "bom": _bom, "netlist": _netlist, "roundtrip": _roundtrip, "validate": _validate}
+
+
+def process_file(command: str, file_name: str) -> dict:
+    """
+    Run one command on one file, returns its JSON Lines record. Exceptions are reported in the record, not raised.
+    """
+    record = {"file": file_name, "command": command, "ok": False, "result": None, "timing": {}, "error": None}
+    timing = record["timing"]
+    try:
+        start = time.perf_counter()
+        text = "".join(read_blocks(file_name))
+        timing["read"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        s_expression_list = sexp.load(text)
+        del text
+        timing["tokenize"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        schematic = Schematic()
+        schematic.file_name = file_name
+        schematic.from_s_expression(s_expression_list, workers=1)
+        timing["decode"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        record["result"], record["ok"] = commands[command](s_expression_list, schematic)
+        timing[command] = time.perf_counter() - start
+    except Exception as error:
+        record["error"] = "{}: {}".format(type(error).__name__, error)
+    for stage, elapsed in timing.items():
+        timing[stage] = round(elapsed, 6)
+    return record
+
+
+def expand_files(paths: list) -> list:
+    """
+    Returns the files of paths, directories replaced by the schematic files they contain, sorted, recursively.
+    """
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        found = []
+        for directory, directory_names, file_names in os.walk(path):
+            directory_names.sort()
+            found.extend(os.path.join(directory, file_name) for file_name in file_names
+                         if file_name.endswith(schematic_suffixes))
+        files.extend(sorted(found))
+    return files
+
+
+def run(command: str, files: list, jobs: int = 1, ordered: bool = False, max_tasks_per_child: int = None):
+    """
+    Yields the records of process_file() for each file, using jobs worker processes.
+
+    :param ordered: Yield in the order of files, else as soon as each file is done.
+    :param max_tasks_per_child: Files processed by a worker before it is replaced, to return memory to the system.
+    """
+    if jobs <= 1 or len(files) <= 1:
+        for file_name in files:
+            yield process_file(command, file_name)
+        return
+    # Imported here, only needed with several jobs.
+    import collections
+    import concurrent.futures
+    options = {}
+    if max_tasks_per_child is not None:
+        options["max_tasks_per_child"] = max_tasks_per_child
+    window = 2 * jobs
+    pending = collections.deque()
+    file_iterator = iter(files)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, **options) as executor:
+        for file_name in file_iterator:
+            pending.append(executor.submit(process_file, command, file_name))
+            if len(pending) >= window:
+                break
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+            for future in done:
+                yield future.result()
+                file_name = next(file_iterator, None)
+                if file_name is not None:
+                    pending.append(executor.submit(process_file, command, file_name))
+
+
+def main(argv: list = None) -> int:
+    argument_parser = argparse.ArgumentParser(prog="kicad2python", description=__doc__,
+                                              formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("command", choices=sorted(commands))
+    argument_parser.add_argument("paths", nargs="+", help="Schematic files or directories.")
+    argument_parser.add_argument("--jobs", "-j", type=int, default=os.cpu_count() or 1, help="Worker processes.")
+    argument_parser.add_argument("--output", "-o", help="Write the JSON Lines to this file instead of stdout.")
+    argument_parser.add_argument("--ordered", action="store_true", help="Write records in the order of the files.")
+    argument_parser.add_argument("--max-tasks-per-child", type=int,
+                                 help="Replace a worker after this many files (Python 3.11+).")
+    arguments = argument_parser.parse_args(argv)
+
+    files = expand_files(arguments.paths)
+    output = open(arguments.output, "w", encoding="UTF-8") if arguments.output is not None else sys.stdout
+    start = time.perf_counter()
+    stage_times = {}
+    failed = 0
+    try:
+        for record in run(arguments.command, files, arguments.jobs, arguments.ordered,
+                          arguments.max_tasks_per_child):
+            for stage, elapsed in record["timing"].items():
+                stage_times[stage] = stage_times.get(stage, 0.0) + elapsed
+            if not record["ok"]:
+                failed += 1
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    print("{} files, {} not ok, {:.3f} s".format(len(files), failed, time.perf_counter() - start), file=sys.stderr)
+    for stage, elapsed in stage_times.items():
+        print("  {:<10} {:.3f} s".format(stage, elapsed), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,47 @@
 # https://dev-docs.kicad.org/en/file-formats/sexpr-intro/
 
 
-import sexp
+import os
+import sys
+
+from . import sexp
+from .units import mm_to_iu, format_iu
+
+
+def is_free_threaded() -> bool:
+    """
+    Returns True when running on a free-threaded (no GIL) Python build with the GIL actually disabled.
+    """
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+# Threads decoding elements in parallel: on builds with the GIL threads would only slow decoding down.
+decode_workers = (os.cpu_count() or 1) if is_free_threaded() else 1
+decode_chunk_size = 256
+_pool_thread_prefix = "kicad2python-decode"
+
+
+def map_chunks(function, items: list, workers: int = None) -> list:
+    """
+    Returns [function(item) for item in items], computed by chunks of decode_chunk_size items on a thread pool of
+    workers threads (decode_workers if None). Sequential when workers is 1, there is only one chunk or when called
+    from a thread of the pool, e.g. to decode the library symbols of a top level element: nested pools would multiply
+    the threads. function must not modify state shared with other items.
+    """
+    if workers is None:
+        workers = decode_workers
+    if workers <= 1 or len(items) <= decode_chunk_size:
+        return [function(item) for item in items]
+    # Imported here, concurrent.futures is slow to import and only needed on free-threaded builds.
+    import concurrent.futures
+    import threading
+    if threading.current_thread().name.startswith(_pool_thread_prefix):
+        return [function(item) for item in items]
+    chunks = [items[index:index + decode_chunk_size] for index in range(0, len(items), decode_chunk_size)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers, thread_name_prefix=_pool_thread_prefix) as executor:
+        results = executor.map(lambda chunk: [function(item) for item in chunk], chunks)
+        return [result for chunk_results in results for result in chunk_results]
 
 
 class KiCADElement:
@@ -16,6 +56,88 @@ class KiCADElement:
         raise NotImplementedError
 
 
+class RawElement(KiCADElement):
+    """
+    Placeholder for tokens without a dedicated class: the S-Expression is kept as-is so that it is written back
+    unchanged on save.
+    """
+    def __init__(self):
+        KiCADElement.__init__(self)
+        self.token = ""
+        self.s_expression = None
+
+    def from_s_expression(self, s_expression):
+        self.token = sexp.get_symbol_value(s_expression)
+        self.s_expression = s_expression
+
+    def to_s_expression(self):
+        return sexp.dump(self.s_expression)
+
+
+def element_decoder(element_class):
+    """
+    Returns a function building an instance of element_class from an S-Expression.
+    """
+    def decode(s_expression):
+        new_class_instance = element_class()
+        new_class_instance.from_s_expression(s_expression)
+        return new_class_instance
+    return decode
+
+
+class ElementRegistry(dict):
+    """
+    Maps the head token of an S-Expression to the KiCADElement class handling it.
+    Each entry also holds a decoder, a function taking the S-Expression and returning the new element; by default it
+    is built by element_decoder().
+
+    Tokens without an entry are decoded by the unknown decoder, if any; classes not implemented yet must not be
+    registered, their tokens are then kept by the unknown decoder.
+    """
+    def __init__(self, elements=None, unknown=None):
+        dict.__init__(self)
+        self.decoders = {}
+        self.unknown = unknown
+        if elements is not None:
+            for token, element_class in elements.items():
+                self.register(token, element_class)
+
+    def __setitem__(self, token, element_class):
+        self.register(token, element_class)
+
+    def __delitem__(self, token):
+        dict.__delitem__(self, token)
+        del self.decoders[token]
+
+    def register(self, token: str, element_class=None, decoder=None):
+        """
+        Register element_class as the handler of token, replacing any previous one.
+        Can be used as class decorator: @registry.register("sheet")
+
+        :param token: Head token of the S-Expression, e.g. "wire".
+        :param element_class: KiCADElement subclass.
+        :param decoder: Function taking the S-Expression and returning the element, if None element_decoder() is used.
+        """
+        if element_class is None:
+            return lambda cls: self.register(token, cls, decoder)
+        dict.__setitem__(self, token, element_class)
+        self.decoders[token] = decoder if decoder is not None else element_decoder(element_class)
+        return element_class
+
+    def decode(self, s_expression, token: str = None):
+        """
+        Returns the element built from s_expression, None if the token is unknown and there is no unknown decoder.
+
+        :param token: Head token of s_expression, if already known by the caller.
+        """
+        if token is None:
+            token = sexp.get_symbol_value(s_expression)
+        decoder = self.decoders.get(token, self.unknown)
+        if decoder is None:
+            return None
+        return decoder(s_expression)
+
+
 class LibraryIdentifier(KiCADElement):
     def __init__(self):
         KiCADElement.__init__(self)
@@ -29,39 +151,46 @@ class LibraryIdentifier(KiCADElement):
 
 
 class PositionIdentifier(KiCADElement):
+    """
+    x and y are in internal units, see units.py.
+    """
     def __init__(self):
         KiCADElement.__init__(self)
-        self.x = 0.0
-        self.y = 0.0
+        self.x = 0
+        self.y = 0
         self.angle = None
 
     def from_s_expression(self, s_expression):
         property_values = sexp.get_symbol_data_by_token(s_expression, "at")
         if property_values is not None:
-            self.x = property_values[0]
-            self.y = property_values[1]
+            self.x = mm_to_iu(property_values[0])
+            self.y = mm_to_iu(property_values[1])
             if len(property_values) > 2:
                 self.angle = property_values[2]
 
     def to_s_expression(self):
         if self.angle is None:
-            return "(at {} {})".format(self.x, self.y)
+            return "(at {} {})".format(format_iu(self.x), format_iu(self.y))
         else:
-            return "(at {} {} {})".format(self.x, self.y, self.angle)
+            return "(at {} {} {})".format(format_iu(self.x), format_iu(self.y), self.angle)
 
 
 class CoordinatePoint(KiCADElement):
+    """
+    x and y are in internal units, see units.py.
+    """
     def __init__(self):
         KiCADElement.__init__(self)
-        self.x = 0.0
-        self.y = 0.0
+        self.x = 0
+        self.y = 0
 
     def from_s_expression(self, s_expression):
-        self.x = sexp.get_symbol_data_by_token(s_expression, "xy")[0]
-        self.y = sexp.get_symbol_data_by_token(s_expression, "xy")[1]
+        property_values = sexp.get_symbol_data_by_token(s_expression, "xy")
+        self.x = mm_to_iu(property_values[0])
+        self.y = mm_to_iu(property_values[1])
 
     def to_s_expression(self):
-        return "(xy {} {})".format(self.x, self.y)
+        return "(xy {} {})".format(format_iu(self.x), format_iu(self.y))
 
 
 class CoordinatePointList(KiCADElement):
@@ -236,19 +365,33 @@ class Properties(KiCADElement):
         return base_string
 
 
+def generate_uuids(count: int) -> list:
+    """
+    Returns count new random (version 4) UUID strings, generated from a single call to the random source.
+    """
+    random_bytes = bytearray(os.urandom(16 * count))
+    random_bytes[6::16] = bytes([byte & 0x0F | 0x40 for byte in random_bytes[6::16]])
+    random_bytes[8::16] = bytes([byte & 0x3F | 0x80 for byte in random_bytes[8::16]])
+    hex_string = random_bytes.hex()
+    return ["{}-{}-{}-{}-{}".format(hex_string[i:i + 8], hex_string[i + 8:i + 12], hex_string[i + 12:i + 16],
+                                    hex_string[i + 16:i + 20], hex_string[i + 20:i + 32])
+            for i in range(0, len(hex_string), 32)]
+
+
 class UniqueIdentifier(KiCADElement):
     def __init__(self):
         KiCADElement.__init__(self)
         self.uuid = ""
 
+    def generate(self):
+        """
+        Assign a new random UUID.
+        """
+        self.uuid = generate_uuids(1)[0]
+
     def from_s_expression(self, s_expression):
         self.uuid = sexp.get_symbol_data_by_token(s_expression, "uuid")[0].value()
 
     def to_s_expression(self):
         return "(uuid {})".format(self.uuid)
 
-
-class_dict = {"uuid": UniqueIdentifier,
-              "paper": PageSettings,
-              "title_block": TitleBlock
-              }
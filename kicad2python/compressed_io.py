@@ -0,0 +1,93 @@
+import io
+
+# The codec modules are imported by open_binary(), only when a compressed file is read or written.
+block_size = 1 << 20
+
+magic_numbers = {b"\x1f\x8b": "gzip",
+                 b"\xfd7zXZ\x00": "xz",
+                 b"BZh": "bz2",
+                 b"\x28\xb5\x2f\xfd": "zstd"}
+file_extensions = {".gz": "gzip",
+                   ".xz": "xz",
+                   ".bz2": "bz2",
+                   ".zst": "zstd"}
+
+
+def detect_compression(file_name: str):
+    """
+    Returns the compression of a file from its first bytes: "gzip", "xz", "bz2", "zstd" or None.
+    """
+    with open(file_name, "rb") as file:
+        header = file.read(6)
+    for magic_number, compression in magic_numbers.items():
+        if header.startswith(magic_number):
+            return compression
+    return None
+
+
+def compression_from_file_name(file_name: str):
+    for extension, compression in file_extensions.items():
+        if file_name.endswith(extension):
+            return compression
+    return None
+
+
+def _zstd_module():
+    try:
+        from compression import zstd
+    except ImportError:
+        try:
+            import zstandard as zstd
+        except ImportError:
+            raise ImportError("zstd compressed files need Python 3.14 or the zstandard package")
+    return zstd
+
+
+def open_binary(file_name: str, mode: str, compression: str):
+    """
+    Returns a binary file object (de)compressing on the fly.
+
+    :param mode: "rb" or "wb".
+    """
+    if compression == "gzip":
+        import gzip
+        return gzip.open(file_name, mode)
+    if compression == "xz":
+        import lzma
+        return lzma.open(file_name, mode)
+    if compression == "bz2":
+        import bz2
+        return bz2.open(file_name, mode)
+    if compression == "zstd":
+        module = _zstd_module()
+        if hasattr(module, "ZstdDecompressor") and hasattr(module.ZstdDecompressor, "stream_reader"):
+            # zstandard package
+            if mode == "rb":
+                # Files written by concatenation or streaming writers can hold several frames.
+                return module.ZstdDecompressor().stream_reader(open(file_name, "rb"), closefd=True,
+                                                               read_across_frames=True)
+            return module.ZstdCompressor().stream_writer(open(file_name, "wb"), closefd=True)
+        return module.open(file_name, mode)
+    return open(file_name, mode)
+
+
+def read_blocks(file_name: str, compression: str = None):
+    """
+    Yields the text of a file by blocks of block_size characters, decompressing it if needed.
+
+    :param compression: Compression of the file, detected from its content if None.
+    """
+    if compression is None:
+        compression = detect_compression(file_name)
+    with io.TextIOWrapper(open_binary(file_name, "rb", compression), encoding="UTF-8") as file:
+        block = file.read(block_size)
+        while block:
+            yield block
+            block = file.read(block_size)
+
+
+def open_text_writer(file_name: str, compression: str = None):
+    """
+    Returns a text file object writing to file_name, compressed as requested.
+    """
+    return io.TextIOWrapper(open_binary(file_name, "wb", compression), encoding="UTF-8")
@@ -0,0 +1,338 @@
+from . import sexp
+from .common import RawElement
+from .schematic_file_format import LibrarySymbols, Junction, NoConnect, Wire, LocalLabel, GlobalLabel, \
+    HierarchicalLabel, HierarchicalSheetPin, SymbolSchematic, SymbolInstances
+from .transform import pin_positions
+from .units import format_iu
+
+default_grid = 12700
+_cell_size = 254000
+
+
+class Violation:
+    def __init__(self, rule: str, message: str, uuids: list, position: tuple = None, file_name: str = ""):
+        self.rule = rule
+        self.message = message
+        self.uuids = uuids
+        self.position = position
+        self.file_name = file_name
+
+    def to_dict(self) -> dict:
+        return {"rule": self.rule, "message": self.message, "uuids": self.uuids, "file_name": self.file_name,
+                "position": list(self.position) if self.position is not None else None}
+
+    def __repr__(self):
+        return "Violation({}, {!r}, {})".format(self.rule, self.message, self.uuids)
+
+
+class SheetIndex:
+    """
+    Indexes of one schematic sheet, built by a single traversal of its elements.
+    All coordinates are in internal units.
+
+    points:     (x, y) -> list of (kind, item) connected there: "pin", "wire", "label", "sheet_pin", "junction",
+                "no_connect"
+    segments:   grid cell -> list of (x1, y1, x2, y2, wire), to find points lying inside a wire
+    pins:       (symbol, pin number, x, y, library SymbolPin, pin uuid) of each placed symbol pin
+    """
+
+    def __init__(self, schematic):
+        self.schematic = schematic
+        self.file_name = schematic.file_name
+        self.library_symbols = {}
+        self.symbols = []
+        self.wires = []
+        self.labels = []
+        self.sheet_pins = []
+        self.junctions = []
+        self.no_connects = []
+        self.symbol_instances = []
+        self.pins = []
+        self.points = {}
+        self.segments = {}
+
+    def add_point(self, x: int, y: int, kind: str, item):
+        self.points.setdefault((x, y), []).append((kind, item))
+
+    def add_segment(self, x1: int, y1: int, x2: int, y2: int, wire):
+        for cell_x in range(min(x1, x2) // _cell_size, max(x1, x2) // _cell_size + 1):
+            for cell_y in range(min(y1, y2) // _cell_size, max(y1, y2) // _cell_size + 1):
+                self.segments.setdefault((cell_x, cell_y), []).append((x1, y1, x2, y2, wire))
+
+    def index_element(self, element):
+        if isinstance(element, SymbolSchematic):
+            self.symbols.append(element)
+        elif isinstance(element, Wire):
+            self.wires.append(element)
+            points = element.coordinate_point_list.coordinate_points
+            for point in points:
+                self.add_point(point.x, point.y, "wire", element)
+            for start, end in zip(points, points[1:]):
+                self.add_segment(start.x, start.y, end.x, end.y, element)
+        elif isinstance(element, (LocalLabel, GlobalLabel, HierarchicalLabel)):
+            self.labels.append(element)
+            self.add_point(element.position_identifier.x, element.position_identifier.y, "label", element)
+        elif isinstance(element, Junction):
+            self.junctions.append(element)
+            self.add_point(element.position_identifier.x, element.position_identifier.y, "junction", element)
+        elif isinstance(element, NoConnect):
+            self.no_connects.append(element)
+            self.add_point(element.position_identifier.x, element.position_identifier.y, "no_connect", element)
+        elif isinstance(element, LibrarySymbols):
+            for symbol in element.symbol_list:
+                self.library_symbols[symbol.library_identifier] = symbol
+        elif isinstance(element, SymbolInstances):
+            self.symbol_instances.extend(element.path_list)
+        elif isinstance(element, RawElement) and element.token == "sheet":
+            # Sheets are not decoded, only the pins are needed for connectivity.
+            for item in element.s_expression[1:]:
+                if isinstance(item, list) and sexp.get_symbol_value(item) == "pin":
+                    sheet_pin = HierarchicalSheetPin()
+                    sheet_pin.from_s_expression(item)
+                    self.sheet_pins.append(sheet_pin)
+                    self.add_point(sheet_pin.position_identifier.x, sheet_pin.position_identifier.y, "sheet_pin",
+                                   sheet_pin)
+
+    def index_pins(self):
+        """
+        Place the pins of every symbol, once all library symbols are known.
+        """
+        for symbol in self.symbols:
+            library_symbol = self.library_symbols.get(symbol.library_identifier)
+            if library_symbol is None:
+                continue
+            pin_uuids = {str(pin.number): pin.unique_identifier.uuid for pin in symbol.pins}
+            for number, x, y, library_pin in pin_positions(symbol, library_symbol):
+                self.pins.append((symbol, number, x, y, library_pin, pin_uuids.get(number)))
+                self.add_point(x, y, "pin", symbol)
+
+    def wires_at(self, x: int, y: int, exclude=None) -> list:
+        """
+        Returns the wires other than exclude passing through (x, y), ends included.
+        """
+        wires = []
+        for x1, y1, x2, y2, wire in self.segments.get((x // _cell_size, y // _cell_size), ()):
+            if wire is exclude:
+                continue
+            if min(x1, x2) <= x <= max(x1, x2) and min(y1, y2) <= y <= max(y1, y2) \
+                    and (x2 - x1) * (y - y1) == (y2 - y1) * (x - x1):
+                wires.append(wire)
+        return wires
+
+    def on_segment(self, x: int, y: int, exclude=None) -> bool:
+        """
+        Returns True if (x, y) lies on a wire other than exclude, ends included.
+        """
+        return bool(self.wires_at(x, y, exclude))
+
+    def connections(self, x: int, y: int, exclude=None) -> list:
+        """
+        Returns the (kind, item) at (x, y), except exclude.
+        """
+        return [(kind, item) for kind, item in self.points.get((x, y), ()) if item is not exclude]
+
+
+class ProjectIndex:
+    """
+    Indexes of all the sheets of a project.
+
+    references: reference -> list of (unit, symbol uuid, sheet), built by index_references() once all sheets are in
+                sheets. Each (symbol uuid, instance path) of the (symbol_instances ...) of any sheet counts once, the
+                root sheet lists the symbols of all the sheets. Symbols without an instance anywhere in the project
+                use their Reference property.
+    """
+
+    def __init__(self):
+        self.sheets = []
+        self.references = {}
+
+    def index_references(self):
+        symbol_sheets = {}
+        for sheet in self.sheets:
+            for symbol in sheet.symbols:
+                symbol_sheets.setdefault(symbol.unique_identifier.uuid, (symbol, sheet))
+        instances = set()
+        instance_uuids = set()
+        for sheet in self.sheets:
+            for instance in sheet.symbol_instances:
+                path = str(instance.instance_path)
+                uuid = path.split("/")[-1]
+                if (uuid, path) in instances:
+                    continue
+                instances.add((uuid, path))
+                instance_uuids.add(uuid)
+                # The sheet holding the symbol, the one listing the instance if the symbol is not loaded.
+                symbol_sheet = symbol_sheets.get(uuid, (None, sheet))[1]
+                self.references.setdefault(str(instance.reference), []).append((instance.unit, uuid, symbol_sheet))
+        for uuid, (symbol, sheet) in symbol_sheets.items():
+            if uuid in instance_uuids:
+                continue
+            for prop in symbol.properties:
+                if prop.key == "Reference":
+                    self.references.setdefault(prop.value, []).append((symbol.unit, uuid, sheet))
+
+
+class Rule:
+    """
+    Base class of ERC rules.
+    visit() is called during the traversal for each element whose class is in element_classes, check() once all
+    indexes are built. Both return a list of Violation.
+    """
+    name = ""
+    element_classes = ()
+
+    def visit(self, element, sheet: SheetIndex) -> list:
+        return []
+
+    def check(self, project: ProjectIndex) -> list:
+        return []
+
+
+rule_registry = {}
+
+
+def register_rule(rule_class):
+    """
+    Register a Rule subclass under its name, can be used as class decorator.
+    """
+    rule_registry[rule_class.name] = rule_class
+    return rule_class
+
+
+@register_rule
+class UnconnectedPinRule(Rule):
+    name = "unconnected_pin"
+
+    def check(self, project):
+        violations = []
+        for sheet in project.sheets:
+            for symbol, number, x, y, library_pin, pin_uuid in sheet.pins:
+                if library_pin.pin_electrical_type == "no_connect":
+                    continue
+                if sheet.connections(x, y, symbol) or sheet.on_segment(x, y):
+                    continue
+                violations.append(Violation(self.name, "Pin {} of {} is not connected"
+                                            .format(number, symbol.library_identifier),
+                                            [symbol.unique_identifier.uuid] + ([pin_uuid] if pin_uuid else []),
+                                            (x, y), sheet.file_name))
+        return violations
+
+
+@register_rule
+class DanglingWireRule(Rule):
+    name = "dangling_wire"
+
+    def check(self, project):
+        violations = []
+        for sheet in project.sheets:
+            for wire in sheet.wires:
+                points = wire.coordinate_point_list.coordinate_points
+                for point in (points[0], points[-1]) if points else ():
+                    if sheet.connections(point.x, point.y, wire) or sheet.on_segment(point.x, point.y, wire):
+                        continue
+                    violations.append(Violation(self.name, "Wire end at ({}, {}) is not connected"
+                                                .format(format_iu(point.x), format_iu(point.y)),
+                                                [wire.unique_identifier.uuid], (point.x, point.y), sheet.file_name))
+        return violations
+
+
+@register_rule
+class UnconnectedLabelRule(Rule):
+    name = "unconnected_label"
+
+    def check(self, project):
+        violations = []
+        for sheet in project.sheets:
+            for label in sheet.labels:
+                x, y = label.position_identifier.x, label.position_identifier.y
+                if sheet.connections(x, y, label) or sheet.on_segment(x, y):
+                    continue
+                violations.append(Violation(self.name, "Label {} is not connected".format(label.text),
+                                            [label.unique_identifier.uuid], (x, y), sheet.file_name))
+        return violations
+
+
+@register_rule
+class DuplicateReferenceRule(Rule):
+    """
+    The same reference may be used by several units of a multi-unit symbol, but only once per unit.
+    """
+    name = "duplicate_reference"
+
+    def check(self, project):
+        violations = []
+        for reference, instances in project.references.items():
+            if len(instances) < 2 or reference.endswith("?"):
+                continue
+            units = {}
+            for unit, uuid, sheet in instances:
+                units.setdefault(unit, []).append(uuid)
+            duplicated = [uuid for uuids in units.values() if len(uuids) > 1 for uuid in uuids]
+            if duplicated:
+                violations.append(Violation(self.name, "Reference {} is used {} times".format(reference,
+                                                                                             len(duplicated)),
+                                            duplicated))
+        return violations
+
+
+@register_rule
+class OffGridRule(Rule):
+    name = "off_grid"
+    element_classes = (SymbolSchematic, Wire, Junction, NoConnect, LocalLabel, GlobalLabel, HierarchicalLabel)
+
+    def __init__(self, grid: int = default_grid):
+        self.grid = grid
+
+    def visit(self, element, sheet):
+        if isinstance(element, Wire):
+            points = [(point.x, point.y) for point in element.coordinate_point_list.coordinate_points]
+        else:
+            points = [(element.position_identifier.x, element.position_identifier.y)]
+        for x, y in points:
+            if x % self.grid or y % self.grid:
+                return [Violation(self.name, "{} at ({}, {}) is off grid".format(type(element).__name__,
+                                                                               format_iu(x), format_iu(y)),
+                                  [element.unique_identifier.uuid], (x, y), sheet.file_name)]
+        return []
+
+
+class ERCEngine:
+    """
+    Run ERC rules on one or more schematics (the sheets of a project).
+
+    Each schematic is traversed once: the traversal builds the shared indexes and calls visit() of the rules
+    interested in each element, then check() of every rule runs on the indexes.
+
+    Example:    violations = ERCEngine().run([schematic])
+                violations = ERCEngine([OffGridRule(grid=25400), "dangling_wire"]).run(schematics)
+    """
+
+    def __init__(self, rules: list = None):
+        """
+        :param rules: Rule instances or names of registered rules, all the registered rules if None.
+        """
+        if rules is None:
+            rules = list(rule_registry)
+        self.rules = [rule_registry[rule]() if isinstance(rule, str) else rule for rule in rules]
+
+    def run(self, schematics: list) -> list:
+        project = ProjectIndex()
+        violations = []
+        visitors = {}
+        for rule in self.rules:
+            for element_class in rule.element_classes:
+                visitors.setdefault(element_class, []).append(rule)
+
+        for schematic in schematics:
+            sheet = SheetIndex(schematic)
+            for element in schematic.kicad_element:
+                sheet.index_element(element)
+                for rule in visitors.get(type(element), ()):
+                    violations.extend(rule.visit(element, sheet))
+            sheet.index_pins()
+            project.sheets.append(sheet)
+        project.index_references()
+
+        for rule in self.rules:
+            violations.extend(rule.check(project))
+        return violations
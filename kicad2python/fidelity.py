@@ -0,0 +1,120 @@
+import hashlib
+import json
+import sys
+
+import sexpdata
+
+from . import sexp
+from .compressed_io import read_blocks
+from .parser import Schematic
+
+ignored_tokens = ("version", "generator")
+
+
+def canonical_string(item) -> str:
+    """
+    Returns a canonical text of an S-Expression: children order is kept, numbers are written exactly, integral values
+    without decimals (1.0 as 1), strings are always quoted the same way.
+    """
+    if isinstance(item, list):
+        return "(" + " ".join([canonical_string(child) for child in item]) + ")"
+    if isinstance(item, sexpdata.Symbol):
+        return item.value()
+    if isinstance(item, bool):
+        return "yes" if item else "no"
+    if isinstance(item, int):
+        return str(item)
+    if isinstance(item, float):
+        return str(int(item)) if item.is_integer() else repr(item)
+    return json.dumps(item)
+
+
+def canonical_hash(item) -> str:
+    return hashlib.blake2b(canonical_string(item).encode("UTF-8"), digest_size=16).hexdigest()
+
+
+def _element_key(item, occurrences: dict) -> tuple:
+    """
+    Returns (token, uuid) for top level elements with an uuid, (token, occurrence number) otherwise.
+    """
+    token = sexp.get_symbol_value(item)
+    for child in item[1:]:
+        if isinstance(child, list) and len(child) == 2 and sexp.get_symbol_value(child) == "uuid":
+            return token, sexp.get_symbol_data(child)
+    occurrences[token] = occurrences.get(token, 0) + 1
+    return token, occurrences[token] - 1
+
+
+def _element_hashes(s_expression_list) -> dict:
+    hashes = {}
+    occurrences = {}
+    for item in s_expression_list[1:]:
+        if isinstance(item, list) and sexp.get_symbol_value(item) not in ignored_tokens:
+            hashes[_element_key(item, occurrences)] = (canonical_hash(item), item)
+    return hashes
+
+
+def first_difference(original: list, saved: list, path: str = None) -> str:
+    """
+    Returns the path of the first node differing between two S-Expressions and how it differs.
+    Example:    "symbol/property[1]: \"10k\" instead of \"1k\""
+    """
+    if path is None:
+        path = sexp.get_symbol_value(original)
+    if len(original) != len(saved):
+        return "{}: {} children instead of {}".format(path, len(saved) - 1, len(original) - 1)
+    occurrences = {}
+    for original_child, saved_child in zip(original, saved):
+        child_token = None
+        if isinstance(original_child, list) and len(original_child) > 0:
+            child_token = sexp.get_symbol_value(original_child)
+            occurrences[child_token] = occurrences.get(child_token, -1) + 1
+        if canonical_string(original_child) == canonical_string(saved_child):
+            continue
+        if child_token is not None and isinstance(saved_child, list):
+            return first_difference(original_child, saved_child,
+                                    "{}/{}[{}]".format(path, child_token, occurrences[child_token]))
+        return "{}: {} instead of {}".format(path, canonical_string(saved_child), canonical_string(original_child))
+    return path
+
+
+def compare(original_list, saved_list) -> list:
+    """
+    Compare two tokenized schematics element by element.
+    Returns a list of (status, token, identifier, detail), status is "missing", "added" or "changed".
+    """
+    original_hashes = _element_hashes(original_list)
+    saved_hashes = _element_hashes(saved_list)
+    differences = []
+    for key, (original_hash, original_item) in original_hashes.items():
+        saved = saved_hashes.get(key)
+        if saved is None:
+            differences.append(("missing", key[0], key[1], ""))
+        elif saved[0] != original_hash:
+            differences.append(("changed", key[0], key[1], first_difference(original_item, saved[1])))
+    for key in saved_hashes:
+        if key not in original_hashes:
+            differences.append(("added", key[0], key[1], ""))
+    return differences
+
+
+def verify_round_trip(file_name: str) -> list:
+    """
+    Load a schematic, compressed or not, save it in memory and compare the result with the original file, see
+    compare(). Values saved with less precision than in the file, beyond the 4 decimals of KiCad, are changes.
+    """
+    original_list = sexp.load("".join(read_blocks(file_name)))
+    schematic = Schematic()
+    schematic.from_s_expression(original_list)
+    saved_list = sexp.load(schematic.to_s_expression())
+    return compare(original_list, saved_list)
+
+
+if __name__ == "__main__":
+    # Usage: python -m kicad2python.fidelity file.kicad_sch [file.kicad_sch ...]
+    exit_code = 0
+    for file_name in sys.argv[1:]:
+        for status, token, identifier, detail in verify_round_trip(file_name):
+            exit_code = 1
+            print("{}: {} {} {} {}".format(file_name, status, token, identifier, detail).rstrip())
+    sys.exit(exit_code)
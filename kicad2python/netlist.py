@@ -0,0 +1,121 @@
+from .erc import SheetIndex
+from .schematic_file_format import GlobalLabel
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parents = {}
+
+    def find(self, item):
+        parents = self.parents
+        root = parents.setdefault(item, item)
+        while parents[root] != root:
+            root = parents[root]
+        while parents[item] != root:
+            parents[item], item = root, parents[item]
+        return root
+
+    def union(self, first, second):
+        first = self.find(first)
+        second = self.find(second)
+        if first != second:
+            self.parents[second] = first
+
+
+def instance_references(symbol_instances: list) -> dict:
+    """
+    Returns symbol uuid -> reference of a list of SymbolInstance.
+    """
+    return {str(instance.instance_path).rsplit("/", 1)[-1]: str(instance.reference) for instance in symbol_instances}
+
+
+def symbol_reference(symbol, references: dict) -> str:
+    """
+    Returns the reference of a placed symbol, from the instances of the sheet if there.
+
+    :param references: Symbol uuid -> reference, from the (symbol_instances ...) of the sheet.
+    """
+    reference = references.get(symbol.unique_identifier.uuid)
+    if reference is not None:
+        return reference
+    for prop in symbol.properties:
+        if prop.key == "Reference":
+            return prop.value
+    return ""
+
+
+def property_value(symbol, key: str) -> str:
+    for prop in symbol.properties:
+        if prop.key == key:
+            return prop.value
+    return ""
+
+
+def build_netlist(schematics: list) -> list:
+    """
+    Returns the nets connecting the pins of the symbols of one or more sheets, sorted by name:
+    {"name": net name, "nodes": [{"reference": "R1", "pin": "2", "type": "passive"}, ...]}.
+
+    Items are connected when they meet at a point: wire ends, wire bodies (a wire end or a pin on another wire, or a
+    junction on crossing wires), pins and labels. Local labels join nets of the same sheet with the same text, global
+    labels and power symbols (references starting with "#", named by their value) join nets of all the sheets.
+    Nets are named after a global label, a power symbol or a local label, otherwise "Net-(<reference>-Pad<pin>)".
+    """
+    connections = _UnionFind()
+    net_names = {}
+    pins = []
+    for sheet_number, schematic in enumerate(schematics):
+        sheet = SheetIndex(schematic)
+        for element in schematic.kicad_element:
+            sheet.index_element(element)
+        sheet.index_pins()
+        references = instance_references(sheet.symbol_instances)
+
+        for (x, y), items in sheet.points.items():
+            point = ("point", sheet_number, x, y)
+            for kind, item in items:
+                if kind != "pin":
+                    connections.union(point, id(item))
+            # A point on the body of a wire is connected to it: T connections and junctions on crossing wires.
+            for wire in sheet.wires_at(x, y):
+                connections.union(point, id(wire))
+
+        for label in sheet.labels:
+            if isinstance(label, GlobalLabel):
+                key = ("global", str(label.text))
+                net_names.setdefault(key, (0, str(label.text)))
+            else:
+                key = ("local", sheet_number, str(label.text))
+                net_names.setdefault(key, (2, str(label.text)))
+            connections.union(key, id(label))
+
+        for symbol, number, x, y, library_pin, pin_uuid in sheet.pins:
+            point = ("point", sheet_number, x, y)
+            reference = symbol_reference(symbol, references)
+            if reference.startswith("#"):
+                # Power symbol: its pin names the net for all the sheets.
+                name = property_value(symbol, "Value")
+                key = ("global", name)
+                net_names.setdefault(key, (1, name))
+                connections.union(key, point)
+                continue
+            pins.append((point, reference, number, library_pin.pin_electrical_type))
+
+    nets = {}
+    names = {}
+    for key, (priority, name) in net_names.items():
+        root = connections.find(key)
+        if root not in names or (priority, name) < names[root]:
+            names[root] = (priority, name)
+    for point, reference, number, pin_type in sorted(pins, key=lambda pin: (pin[1], pin[2])):
+        root = connections.find(point)
+        nets.setdefault(root, []).append({"reference": reference, "pin": number, "type": str(pin_type)})
+    netlist = []
+    for root, nodes in nets.items():
+        if root in names:
+            name = names[root][1]
+        else:
+            name = "Net-({}-Pad{})".format(nodes[0]["reference"], nodes[0]["pin"])
+        netlist.append({"name": name, "nodes": nodes})
+    netlist.sort(key=lambda net: net["name"])
+    return netlist
@@ -0,0 +1,404 @@
+import copy
+import re
+import sys
+
+from . import sexp
+from .common import KiCADElement, map_chunks
+from .compressed_io import detect_compression, compression_from_file_name, read_blocks, open_text_writer
+from .schematic_and_symbol_library import Symbol
+from .schematic_file_format import class_dict, LibrarySymbols
+
+_header_regex = re.compile(rb'\((version|generator)\s+([^\s()]+)\)')
+_symbol_regex = re.compile(rb'\(symbol\s+"((?:[^"\\]|\\.)*)"')
+_form_regex = re.compile(rb'"(?:[^"\\]|\\.)*"|[()]')
+# Text without parenthesis inside quoted strings.
+_plain_regex = re.compile(rb'[^"]*(?:"(?:[^"\\()]|\\[^()])*"[^"]*)*')
+
+
+class Schematic:
+
+    def __init__(self):
+        self.file_name = ""
+        self.raw_string = ""
+
+        self.version = ""
+        self.generator = ""
+        self.kicad_element = []
+        # ids of the elements that may be shared with clones and of the library symbols copied since, see clone().
+        self._shared = None
+        self._private_symbols = set()
+        # ids of the objects changed by transactions, edit() and transform() since the last to_s_expression(), see
+        # transaction.Transaction.
+        self.dirty = set()
+        # id -> (element, output) of the elements written by the last to_s_expression(), None unless track_changes().
+        self._element_strings = None
+
+    def load(self, file_name: str, workers: int = None):
+        """
+        Load a schematic file, gzip, xz, bz2 and zstd compressed files are detected from their content and
+        decompressed while tokenizing; raw_string is left empty for them.
+
+        :param workers: Threads decoding the elements, see from_s_expression().
+        """
+        self.file_name = file_name
+        compression = detect_compression(self.file_name)
+        if compression is not None:
+            self.raw_string = ""
+            self.from_s_expression(sexp.load_stream(read_blocks(self.file_name, compression)), workers)
+            return
+        with open(self.file_name, "r", encoding="UTF-8") as file:
+            self.raw_string = file.read()
+        self.from_s_expression(sexp.load(self.raw_string), workers)
+
+    def from_s_expression(self, s_expression_list: list, workers: int = None):
+        """
+        Decode the elements of an already tokenized schematic, the (kicad_sch ...) list.
+
+        :param workers: Threads decoding the elements, if None common.decode_workers: all the CPUs on free-threaded
+                        Python builds, 1 otherwise.
+        """
+        items = []
+        for item in s_expression_list:
+            if not isinstance(item, list):
+                continue
+            value = sexp.get_symbol_value(item)
+            if value == "version":
+                self.version = sexp.get_symbol_data(item)
+            elif value == "generator":
+                self.generator = sexp.get_symbol_data(item)
+            else:
+                items.append(item)
+        self.kicad_element.extend(map_chunks(class_dict.decode, items, workers))
+
+    def clone(self):
+        """
+        Returns a copy of the schematic sharing its elements (copy-on-write): nothing is copied until edit() is
+        called on an element, of the clone or of the original. The elements must not be modified in place without
+        edit(), which would change every schematic sharing them; this includes transform() and annotation.Annotator,
+        give them edited elements.
+
+        Example:    variant = base.clone()
+                    symbol = variant.edit(next(variant.select("symbol[Reference=R1]")))
+                    symbol.properties[1].value = "22k"
+        """
+        if self._shared is None or any(id(element) not in self._shared for element in self.kicad_element):
+            self._shared = frozenset([id(element) for element in self.kicad_element])
+        self._private_symbols = set()
+        new_schematic = Schematic()
+        new_schematic.file_name = self.file_name
+        new_schematic.raw_string = self.raw_string
+        new_schematic.version = self.version
+        new_schematic.generator = self.generator
+        new_schematic.kicad_element = list(self.kicad_element)
+        new_schematic._shared = self._shared
+        return new_schematic
+
+    def edit_elements(self, elements: list) -> list:
+        """
+        Returns elements made private to this schematic, copying the ones shared with clones and replacing them in
+        kicad_element, and adds them to dirty. Library symbols are copied one by one, see edit_library_symbol().
+        """
+        copies = list(elements)
+        if self._shared is None:
+            self.dirty.update(id(element) for element in copies)
+            return copies
+        for index, element in enumerate(copies):
+            if id(element) not in self._shared:
+                continue
+            # Elements have no __eq__, list.index() compares identities.
+            position = self.kicad_element.index(element)
+            if isinstance(element, LibrarySymbols):
+                new_element = copy.copy(element)
+                new_element.symbol_list = list(element.symbol_list)
+            else:
+                new_element = copy.deepcopy(element)
+            self.kicad_element[position] = new_element
+            copies[index] = new_element
+        self.dirty.update(id(element) for element in copies)
+        return copies
+
+    def edit(self, element):
+        """
+        Returns element made private to this schematic, see clone().
+        """
+        return self.edit_elements([element])[0]
+
+    def edit_library_symbol(self, library_identifier: str):
+        """
+        Returns the library Symbol named library_identifier made private to this schematic, None if not found.
+        """
+        for element in self.kicad_element:
+            if not isinstance(element, LibrarySymbols):
+                continue
+            for index, symbol in enumerate(element.symbol_list):
+                if symbol.library_identifier == library_identifier:
+                    element = self.edit(element)
+                    self.dirty.add(id(element))
+                    if self._shared is not None and id(element.symbol_list[index]) not in self._private_symbols:
+                        element.symbol_list[index] = copy.deepcopy(symbol)
+                        self._private_symbols.add(id(element.symbol_list[index]))
+                    return element.symbol_list[index]
+        return None
+
+    def select(self, selector: str, where=None):
+        """
+        Returns a lazy iterator over the elements matching selector, see query.compile_selector() for the syntax.
+        For repeated queries on an unchanged schematic, query.SchematicIndex avoids scanning all the elements.
+
+        Example:    labels = list(schematic.select("global_label[shape=input]"))
+        """
+        # Imported here: the query engine and the bounding boxes it uses are only loaded by the first query.
+        from .query import compile_selector
+        return compile_selector(selector).run(self, where=where)
+
+    def transform(self, transform, elements: list = None):
+        """
+        Move, rotate or mirror elements of the schematic.
+
+        :param transform: Transform to apply, e.g. Transform.rotation(90, x, y) * Transform.translation(dx, dy).
+        :param elements: Elements to transform, if None the whole schematic is transformed.
+        """
+        from .transform import transform_elements
+        if elements is None:
+            elements = self.kicad_element
+        self.dirty.update(id(element) for element in elements)
+        transform_elements(elements, transform)
+
+    def track_changes(self):
+        """
+        Make to_s_expression() and save() reuse the output of the elements not changed since the previous call, the
+        elements in dirty are written again. From now on the elements must only be changed through transactions,
+        edit(), edit_elements(), edit_library_symbol() or transform(): other changes in place, e.g. by
+        annotation.Annotator, are not written until the element is marked dirty.
+        """
+        if self._element_strings is None:
+            self._element_strings = {}
+
+    def save(self, file_name: str = None, compression: str = None):
+        """
+        Save schematic to file.
+
+        :param file_name: File where save, if None the original file will be overwritten.
+        :param compression: "gzip", "xz", "bz2" or "zstd", if None taken from the file extension (.gz, .xz, .bz2,
+                            .zst), no compression for other extensions.
+        """
+        if file_name is None:
+            file_name = self.file_name
+        if compression is None:
+            compression = compression_from_file_name(file_name)
+        with open_text_writer(file_name, compression) as file:
+            file.write(self.to_s_expression())
+
+    def to_s_expression(self) -> str:
+        """
+        Returns the whole schematic file content.
+        """
+        element_strings = ["(kicad_sch (version {}) (generator KiCAD2Python)\n\n".format(self.version)]
+        if self._element_strings is None:
+            for item in self.kicad_element:
+                element_strings.append("  {}\n\n".format(item.to_s_expression()))
+        else:
+            dirty = self._dirty_elements()
+            cache = {}
+            for item in self.kicad_element:
+                cached = self._element_strings.get(id(item))
+                # The element is kept in the cache so that its id cannot be reused by another one.
+                if cached is None or cached[0] is not item or id(item) in dirty:
+                    cached = (item, "  {}\n\n".format(item.to_s_expression()))
+                cache[id(item)] = cached
+                element_strings.append(cached[1])
+            self._element_strings = cache
+        self.dirty = set()
+        element_strings.append(")")
+        return "".join(element_strings)
+
+    def _dirty_elements(self) -> set:
+        """
+        Returns the ids of the elements in dirty or containing an object in dirty, at any depth. Objects inside the
+        elements are found by walking the elements until all of them are found, objects no longer in the schematic
+        make the walk go through all the elements.
+        """
+        element_ids = {id(element) for element in self.kicad_element}
+        dirty = self.dirty & element_ids
+        nested = self.dirty - element_ids
+        for element in self.kicad_element:
+            if not nested:
+                break
+            if id(element) in dirty or id(element) not in self._element_strings:
+                continue
+            stack = [element]
+            while stack:
+                item = stack.pop()
+                if type(item) is list:
+                    stack.extend(item)
+                elif isinstance(item, KiCADElement):
+                    if id(item) in nested:
+                        nested.discard(id(item))
+                        dirty.add(id(element))
+                    stack.extend(item.__dict__.values())
+        return dirty
+
+
+def _scan_symbol_index(raw_bytes: bytes) -> dict:
+    """
+    Returns symbol name -> (start, end) of the top level symbols of a library: the (symbol ...) forms directly inside
+    (kicad_symbol_lib ...), found by tracking the parenthesis depth. Quoted strings are matched whole so that
+    parenthesis inside them are skipped.
+    """
+    symbol_index = {}
+    depth = 0
+    start = None
+    name = None
+    for match in _form_regex.finditer(raw_bytes):
+        if raw_bytes[match.start()] == 40:  # (
+            depth += 1
+            if depth == 2:
+                symbol_match = _symbol_regex.match(raw_bytes, match.start())
+                if symbol_match is not None:
+                    start = match.start()
+                    name = sexp.unescape(symbol_match.group(1).decode("UTF-8"))
+        elif raw_bytes[match.start()] == 41:  # )
+            depth -= 1
+            if depth == 1 and name is not None:
+                symbol_index[name] = (start, match.end())
+                name = None
+    if depth != 0:
+        raise ValueError("Unbalanced parenthesis in symbol library, {} not closed".format(depth))
+    return symbol_index
+
+
+def _count_symbol_index(raw_bytes: bytes, symbol_matches: list):
+    """
+    Same as _scan_symbol_index() but faster, the depth of each (symbol "...") form is computed by counting parenthesis
+    between consecutive ones. Returns None when that is not enough: strings with parenthesis, or forms other than
+    symbols between top level symbols; _scan_symbol_index() must be used then.
+    """
+    symbol_index = {}
+    end_of_library = raw_bytes.rfind(b")")
+    if end_of_library < 0:
+        return None
+    depth = 0
+    previous = 0
+    start = None
+    name = None
+    for position, next_name in [(match.start(), match.group(1)) for match in symbol_matches] + [(end_of_library, None)]:
+        if _plain_regex.match(raw_bytes, previous, position).end() != position:
+            return None
+        depth += raw_bytes.count(b"(", previous, position) - raw_bytes.count(b")", previous, position)
+        if depth < 1:
+            return None
+        if depth == 1 and name is not None:
+            # No parenthesis can follow the end of the symbol in this range, unless another top level form is there:
+            # then the last one opened is at depth 2.
+            last_open = raw_bytes.rfind(b"(", previous, position)
+            if last_open != start and raw_bytes.count(b")", last_open, position) == 1:
+                return None
+            symbol_index[name] = (start, raw_bytes.rfind(b")", previous, position) + 1)
+            name = None
+        if next_name is None:
+            break
+        if depth == 1:
+            start = position
+            name = sexp.unescape(next_name.decode("UTF-8"))
+        elif name is None:
+            return None
+        previous = position
+    return symbol_index if depth == 1 and name is None else None
+
+
+class SymbolLibrary:
+    """
+    Symbol library file (.kicad_sym), loaded lazily.
+
+    load() only builds an index from symbol name to its byte range in the file, each Symbol is parsed the first time
+    it is requested. Symbols never requested are written back verbatim by save().
+    """
+
+    def __init__(self):
+        self.file_name = ""
+        self.raw_bytes = b""
+
+        self.version = ""
+        self.generator = ""
+        self.symbol_index = {}
+        self.symbols = {}
+
+    def load(self, file_name: str):
+        """
+        Raises ValueError if the file is not a symbol library or its parenthesis are not balanced, e.g. truncated.
+        """
+        self.file_name = file_name
+        with open(self.file_name, "rb") as file:
+            self.raw_bytes = file.read()
+        self.symbol_index = {}
+        self.symbols = {}
+
+        if not self.raw_bytes.lstrip().startswith(b"(kicad_symbol_lib"):
+            raise ValueError("Not a symbol library: {}".format(file_name))
+        symbol_matches = list(_symbol_regex.finditer(self.raw_bytes))
+        header_end = symbol_matches[0].start() if symbol_matches else len(self.raw_bytes)
+        for match in _header_regex.finditer(self.raw_bytes, 0, header_end):
+            setattr(self, match.group(1).decode("ascii"), match.group(2).decode("UTF-8").strip("\""))
+        self.symbol_index = _count_symbol_index(self.raw_bytes, symbol_matches)
+        if self.symbol_index is None:
+            self.symbol_index = _scan_symbol_index(self.raw_bytes)
+
+    def get_symbol(self, name: str) -> Symbol:
+        """
+        Returns the symbol with given name, parsing it if needed.
+        Raises KeyError if the library has no such symbol.
+        """
+        symbol = self.symbols.get(name)
+        if symbol is None:
+            start, end = self.symbol_index[name]
+            symbol = Symbol()
+            symbol.from_s_expression(sexp.load(self.raw_bytes[start:end].decode("UTF-8")))
+            self.symbols[name] = symbol
+        return symbol
+
+    def get_symbol_string(self, name: str) -> str:
+        """
+        Returns the S-Expression of the symbol with given name as stored in the file, without parsing it.
+        """
+        start, end = self.symbol_index[name]
+        return self.raw_bytes[start:end].decode("UTF-8").rstrip()
+
+    def __contains__(self, name):
+        return name in self.symbol_index
+
+    def __iter__(self):
+        return iter(self.symbol_index)
+
+    def __len__(self):
+        return len(self.symbol_index)
+
+    def save(self, file_name: str = None):
+        """
+        Save symbol library to file.
+
+        :param file_name: File where save, if None the original file will be overwritten.
+        """
+        if file_name is None:
+            file_name = self.file_name
+        symbol_strings = []
+        for name in self.symbol_index:
+            if name in self.symbols:
+                symbol_strings.append(self.symbols[name].to_s_expression())
+            else:
+                symbol_strings.append(self.get_symbol_string(name))
+        with open(file_name, "w", encoding="UTF-8") as file:
+            file.write("(kicad_symbol_lib (version {}) (generator KiCAD2Python)\n".format(self.version))
+            for symbol_string in symbol_strings:
+                file.write("  {}\n".format(symbol_string))
+            file.write(")\n")
+
+
+########################################################################################################################
+
+
+if __name__ == "__main__":
+    # Usage: python -m kicad2python.parser input.kicad_sch [output.kicad_sch]
+    schematic = Schematic()
+    schematic.load(sys.argv[1])
+    # Do stuff...
+    schematic.save(sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,148 @@
+import json
+import sys
+import time
+
+from . import sexp
+from .common import RawElement
+from .schematic_and_symbol_library import symbol_graphic_items_dict
+from .schematic_file_format import class_dict
+
+registries = [class_dict, symbol_graphic_items_dict]
+
+
+class Profiler:
+    """
+    Record time and allocated memory blocks per element type, for both from_s_expression and to_s_expression.
+
+    While enabled the decoders of registries and the to_s_expression methods of the registered classes are replaced
+    by timed wrappers, disabling restores the originals: when not enabled there is no overhead at all.
+    Allocated blocks are the net number of memory blocks still allocated after the call (sys.getallocatedblocks()).
+    Timings are attributed through a single stack, so profile with sequential decoding (workers=1).
+
+    Example:    with Profiler() as profiler:
+                    schematic.load("file.kicad_sch")
+                profiler.save_json("profile.json")
+    """
+
+    def __init__(self):
+        self.stats = {}
+        self._frames = []
+        self._saved_decoders = None
+        self._saved_methods = None
+        self._saved_load = None
+        self._saved_load_stream = None
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+    def enable(self):
+        if self._saved_decoders is not None:
+            return
+        self._saved_decoders = []
+        self._saved_methods = {}
+        for registry in registries:
+            self._saved_decoders.append((registry, dict(registry.decoders), registry.unknown))
+            for token, decoder in registry.decoders.items():
+                registry.decoders[token] = self._wrap(decoder, "from_s_expression", token)
+                element_class = registry[token]
+                if element_class not in self._saved_methods:
+                    self._saved_methods[element_class] = element_class.__dict__.get("to_s_expression")
+                    element_class.to_s_expression = self._wrap(element_class.to_s_expression, "to_s_expression",
+                                                               token)
+            if registry.unknown is not None:
+                registry.unknown = self._wrap(registry.unknown, "from_s_expression", None)
+        self._saved_methods[RawElement] = RawElement.__dict__.get("to_s_expression")
+        RawElement.to_s_expression = self._wrap(RawElement.to_s_expression, "to_s_expression", None)
+        self._saved_load = sexp.load
+        sexp.load = self._wrap(sexp.load, "tokenize", "sexp.load")
+        # Compressed files are tokenized while they are read and decompressed, included in its time.
+        self._saved_load_stream = sexp.load_stream
+        sexp.load_stream = self._wrap(sexp.load_stream, "tokenize", "sexp.load_stream")
+
+    def disable(self):
+        if self._saved_decoders is None:
+            return
+        for registry, decoders, unknown in self._saved_decoders:
+            registry.decoders.update(decoders)
+            registry.unknown = unknown
+        for element_class, method in self._saved_methods.items():
+            if method is None:
+                del element_class.to_s_expression
+            else:
+                element_class.to_s_expression = method
+        sexp.load = self._saved_load
+        sexp.load_stream = self._saved_load_stream
+        self._saved_decoders = None
+        self._saved_methods = None
+        self._saved_load = None
+        self._saved_load_stream = None
+
+    def reset(self):
+        self.stats = {}
+
+    def _wrap(self, function, stage, token):
+        """
+        Returns function timed under token, if token is None it is taken from the element (RawElement).
+        """
+        frames = self._frames
+        stats = self.stats
+
+        def timed(*args):
+            name = token
+            if name is None:
+                name = args[0].token if isinstance(args[0], RawElement) else sexp.get_symbol_value(args[0])
+            frame = [name, 0.0]
+            frames.append(frame)
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                elapsed = time.perf_counter() - start
+                blocks = sys.getallocatedblocks() - blocks
+                frames.pop()
+                if frames:
+                    frames[-1][1] += elapsed
+                key = (stage,) + tuple([item[0] for item in frames]) + (name,)
+                entry = stats.get(key)
+                if entry is None:
+                    entry = stats[key] = [0, 0.0, 0.0, 0]
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] += elapsed - frame[1]
+                entry[3] += blocks
+        return timed
+
+    def report(self) -> list:
+        """
+        Returns one dictionary per stage and stack of element types, slowest first.
+        self_time excludes the time spent in nested element types.
+        """
+        report = []
+        for key, (calls, total_time, self_time, blocks) in self.stats.items():
+            report.append({"stage": key[0], "stack": list(key[1:]), "calls": calls, "total_time": total_time,
+                           "self_time": self_time, "allocated_blocks": blocks})
+        report.sort(key=lambda item: item["total_time"], reverse=True)
+        return report
+
+    def save_json(self, file_name: str):
+        with open(file_name, "w", encoding="UTF-8") as file:
+            json.dump(self.report(), file, indent=2)
+
+    def to_collapsed_stacks(self) -> str:
+        """
+        Returns the profile in collapsed stack format (one "stage;type;type microseconds" line per stack), the input
+        of flamegraph.pl and speedscope.
+        """
+        lines = []
+        for key, (calls, total_time, self_time, blocks) in sorted(self.stats.items()):
+            lines.append("{} {}".format(";".join(key), int(round(self_time * 1e6))))
+        return "\n".join(lines) + "\n"
+
+    def save_collapsed_stacks(self, file_name: str):
+        with open(file_name, "w", encoding="UTF-8") as file:
+            file.write(self.to_collapsed_stacks())
@@ -0,0 +1,343 @@
+import functools
+import re
+
+from .bounding_box import BoundingBox, BoundingBoxes
+from .common import RawElement
+from .schematic_file_format import class_dict
+from .units import format_iu, mm_to_iu
+
+_type_regex = re.compile(r'\s*([A-Za-z_][\w]*|\*)?')
+_filter_regex = re.compile(r'\[\s*(!)?\s*([\w.]+)\s*(?:(=|!=|\^=|\$=|\*=|~=)\s*("(?:[^"\\]|\\.)*"|[^\]]*?))?\s*\]')
+_pseudo_regex = re.compile(r':overlaps\(\s*([^)]*)\)')
+_separator_regex = re.compile(r'\s*,')
+_cell_size = 254000
+
+_operators = {"=": lambda value, expected: value == expected,
+              "!=": lambda value, expected: value != expected,
+              "^=": lambda value, expected: value.startswith(expected),
+              "$=": lambda value, expected: value.endswith(expected),
+              "*=": lambda value, expected: expected in value}
+
+# Attribute names usable in selectors for nested or renamed element attributes.
+aliases = {"lib_id": lambda element: element.library_identifier,
+           "uuid": lambda element: element.unique_identifier.uuid,
+           "x": lambda element: format_iu(element.position_identifier.x),
+           "y": lambda element: format_iu(element.position_identifier.y),
+           "angle": lambda element: element.position_identifier.angle}
+
+
+def element_token(element, tokens: dict = None) -> str:
+    """
+    Returns the head token of an element, e.g. "symbol" for a SymbolSchematic.
+
+    :param tokens: class -> token from class_tokens(), built if None; pass it when called for many elements.
+    """
+    if isinstance(element, RawElement):
+        return element.token
+    if tokens is None:
+        tokens = class_tokens()
+    return tokens.get(type(element))
+
+
+def class_tokens() -> dict:
+    """
+    Returns element class -> head token, from class_dict.
+    """
+    return {element_class: token for token, element_class in class_dict.items()}
+
+
+def attribute_value(element, name: str):
+    """
+    Returns the value of name for an element as a string, None if it has none: an alias (lib_id, uuid, x, y, angle),
+    a plain attribute (text, shape, unit...) or the value of a property (Reference, Value, Footprint...).
+    """
+    try:
+        if name in aliases:
+            value = aliases[name](element)
+        else:
+            value = getattr(element, name, None)
+            if value is None or isinstance(value, (list, dict)) or hasattr(value, "to_s_expression"):
+                value = None
+                for prop in getattr(element, "properties", ()):
+                    if prop.key == name:
+                        value = prop.value.replace('\\"', '"')
+                        break
+    except AttributeError:
+        return None
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return "yes" if value else "no"
+    return str(value)
+
+
+class _Filter:
+    def __init__(self, name: str, operator: str = None, expected: str = None, negated: bool = False):
+        self.name = name
+        self.operator = operator
+        self.expected = expected
+        self.negated = negated
+        if operator == "~=":
+            pattern = re.compile(expected)
+            self.test = lambda value: pattern.search(value) is not None
+        elif operator is not None:
+            compare = _operators[operator]
+            self.test = lambda value: compare(value, expected)
+        else:
+            self.test = None
+
+    def __call__(self, element) -> bool:
+        value = attribute_value(element, self.name)
+        if self.test is None:
+            # [name] and [!name]: present and not empty.
+            return bool(value) != self.negated
+        return (value is not None and self.test(value)) != self.negated
+
+
+class _Alternative:
+    """
+    One comma separated part of a selector: a token, filters and an optional area.
+    """
+    def __init__(self, token: str, filters: list, area: BoundingBox):
+        self.token = token
+        self.filters = filters
+        self.area = area
+
+    def matches(self, element, token: str) -> bool:
+        if self.token is not None and token != self.token:
+            return False
+        for element_filter in self.filters:
+            if not element_filter(element):
+                return False
+        return True
+
+    def plan(self, index) -> tuple:
+        """
+        Returns (description, candidates) for the cheapest way to find candidates with the index: an equality
+        filter through an attribute index, the area through the spatial grid, the token through the type index, or
+        a scan of all the elements.
+        """
+        if index is not None:
+            for element_filter in self.filters:
+                if element_filter.operator == "=" and not element_filter.negated:
+                    return ("attribute {}".format(element_filter.name),
+                            index.by_attribute(self.token, element_filter.name).get(element_filter.expected, ()))
+            if self.area is not None:
+                return "spatial", index.overlapping(self.area)
+            if self.token is not None:
+                return "type {}".format(self.token), index.by_token().get(self.token, ())
+            return "scan", index.elements
+        return "scan", None
+
+
+class Query:
+    """
+    Compiled selector, see compile_selector().
+    """
+    def __init__(self, selector: str, alternatives: list):
+        self.selector = selector
+        self.alternatives = alternatives
+
+    def explain(self, index=None) -> list:
+        """
+        Returns how each alternative finds its candidates with the index, e.g. ["attribute uuid", "type wire"].
+        """
+        return [alternative.plan(index)[0] for alternative in self.alternatives]
+
+    def run(self, schematic=None, index=None, where=None):
+        """
+        Returns a lazy iterator over the matching elements, in document order for each alternative; an element
+        matching several alternatives is returned once.
+
+        :param schematic: Schematic to scan, not needed if index is given.
+        :param index: SchematicIndex of the schematic, used to avoid full scans.
+        :param where: Additional predicate taking the element.
+        """
+        if index is not None:
+            schematic = index.schematic
+        tokens = index.tokens if index is not None else class_tokens()
+        seen = set() if len(self.alternatives) > 1 else None
+        boxes = None
+        for alternative in self.alternatives:
+            description, candidates = alternative.plan(index)
+            if candidates is None:
+                candidates = schematic.kicad_element
+            check_area = alternative.area is not None and description != "spatial"
+            if check_area and boxes is None:
+                boxes = BoundingBoxes()
+                boxes.add_library_symbols(schematic)
+            for element in candidates:
+                if not alternative.matches(element, element_token(element, tokens)):
+                    continue
+                if check_area:
+                    box = boxes.element_box(element)
+                    if box is None or not box.intersects(alternative.area):
+                        continue
+                if where is not None and not where(element):
+                    continue
+                if seen is not None:
+                    if id(element) in seen:
+                        continue
+                    seen.add(id(element))
+                yield element
+
+
+@functools.lru_cache(maxsize=256)
+def compile_selector(selector: str) -> Query:
+    """
+    Returns the Query of a selector, compiled queries are cached.
+
+    Syntax, CSS like:   token[filter][filter]:overlaps(x1, y1, x2, y2), other alternative, ...
+    token:      head token of the element ("symbol", "wire", "global_label"...) or * for any element.
+    filter:     [name] present and not empty, [!name] missing or empty,
+                [name=value], [name!=value], [name^=prefix], [name$=suffix], [name*=part], [name~=regex];
+                values can be quoted. See attribute_value() for names.
+    overlaps:   elements whose bounding box meets the rectangle, corners in millimeters.
+
+    Example:    compile_selector('global_label[shape=input]')
+                compile_selector('symbol[lib_id="Device:R"][!Footprint]')
+    """
+    alternatives = []
+    position = 0
+    while True:
+        match = _type_regex.match(selector, position)
+        token = match.group(1)
+        position = match.end()
+        filters = []
+        area = None
+        while True:
+            match = _filter_regex.match(selector, position)
+            if match is not None:
+                negated, name, operator, value = match.groups()
+                if value is not None and value.startswith('"'):
+                    value = re.sub(r'\\(.)', r'\1', value[1:-1])
+                filters.append(_Filter(name, operator, value, negated is not None))
+                position = match.end()
+                continue
+            match = _pseudo_regex.match(selector, position)
+            if match is not None:
+                corners = [mm_to_iu(value) for value in re.split(r'[\s,]+', match.group(1).strip())]
+                if len(corners) != 4:
+                    raise ValueError("overlaps() needs 4 coordinates: {}".format(selector))
+                area = BoundingBox(min(corners[0], corners[2]), min(corners[1], corners[3]),
+                                   max(corners[0], corners[2]), max(corners[1], corners[3]))
+                position = match.end()
+                continue
+            break
+        if token is None and not filters and area is None:
+            raise ValueError("Empty selector at {}: {}".format(position, selector))
+        alternatives.append(_Alternative(None if token == "*" else token, filters, area))
+        match = _separator_regex.match(selector, position)
+        if match is None:
+            break
+        position = match.end()
+    if selector[position:].strip():
+        raise ValueError("Invalid selector at {}: {}".format(position, selector))
+    return Query(selector, alternatives)
+
+
+class SchematicIndex:
+    """
+    Indexes of a schematic used by queries, each built on first use: elements by token, by attribute value (per
+    token and attribute name) and a spatial grid of bounding boxes.
+    The indexes are a snapshot: call refresh() after editing the schematic.
+
+    Example:    index = SchematicIndex(schematic)
+                resistors = list(index.select('symbol[lib_id="Device:R"]'))
+                same = index.get(uuid)
+    """
+
+    def __init__(self, schematic):
+        self.schematic = schematic
+        self.refresh()
+
+    def refresh(self):
+        self.elements = list(self.schematic.kicad_element)
+        self.tokens = class_tokens()
+        self._by_token = None
+        self._by_attribute = {}
+        self._grid = None
+        # (x1, y1, x2, y2) range of the occupied cells of the grid.
+        self._grid_cells = None
+        self._boxes = None
+
+    def by_token(self) -> dict:
+        if self._by_token is None:
+            self._by_token = {}
+            for element in self.elements:
+                self._by_token.setdefault(element_token(element, self.tokens), []).append(element)
+        return self._by_token
+
+    def by_attribute(self, token: str, name: str) -> dict:
+        """
+        Returns value -> elements for the elements of token (all if None) having the attribute name.
+        """
+        key = (token, name)
+        values = self._by_attribute.get(key)
+        if values is None:
+            values = self._by_attribute[key] = {}
+            elements = self.elements if token is None else self.by_token().get(token, ())
+            for element in elements:
+                value = attribute_value(element, name)
+                if value is not None:
+                    values.setdefault(value, []).append(element)
+        return values
+
+    def get(self, uuid: str):
+        """
+        Returns the element with given uuid, None if not found.
+        """
+        elements = self.by_attribute(None, "uuid").get(uuid)
+        return elements[0] if elements else None
+
+    def overlapping(self, area: BoundingBox) -> list:
+        """
+        Returns the elements whose bounding box meets area, in document order.
+        """
+        if self._grid is None:
+            self._grid = {}
+            self._boxes = {}
+            boxes = BoundingBoxes()
+            for position, (element, box) in enumerate(boxes.element_boxes(self.schematic)):
+                self._boxes[id(element)] = (position, box)
+                for cell_x in range(box.x1 // _cell_size, box.x2 // _cell_size + 1):
+                    for cell_y in range(box.y1 // _cell_size, box.y2 // _cell_size + 1):
+                        self._grid.setdefault((cell_x, cell_y), []).append(element)
+            if self._grid:
+                self._grid_cells = (min(cell_x for cell_x, cell_y in self._grid),
+                                    min(cell_y for cell_x, cell_y in self._grid),
+                                    max(cell_x for cell_x, cell_y in self._grid),
+                                    max(cell_y for cell_x, cell_y in self._grid))
+        if not self._grid:
+            return []
+        # Cells of area clamped to the cells of the grid, the occupied cells are filtered instead when there are fewer.
+        cell_x1 = max(area.x1 // _cell_size, self._grid_cells[0])
+        cell_y1 = max(area.y1 // _cell_size, self._grid_cells[1])
+        cell_x2 = min(area.x2 // _cell_size, self._grid_cells[2])
+        cell_y2 = min(area.y2 // _cell_size, self._grid_cells[3])
+        if cell_x1 > cell_x2 or cell_y1 > cell_y2:
+            return []
+        if (cell_x2 - cell_x1 + 1) * (cell_y2 - cell_y1 + 1) > len(self._grid):
+            cells = [(cell_x, cell_y) for cell_x, cell_y in self._grid
+                     if cell_x1 <= cell_x <= cell_x2 and cell_y1 <= cell_y <= cell_y2]
+        else:
+            cells = [(cell_x, cell_y) for cell_x in range(cell_x1, cell_x2 + 1)
+                     for cell_y in range(cell_y1, cell_y2 + 1)]
+        found = {}
+        for cell in cells:
+            for element in self._grid.get(cell, ()):
+                position, box = self._boxes[id(element)]
+                if position not in found and box.intersects(area):
+                    found[position] = element
+        return [found[position] for position in sorted(found)]
+
+    def select(self, selector: str, where=None):
+        return compile_selector(selector).run(index=self, where=where)
+
+
+def select(schematic, selector: str, where=None):
+    """
+    Returns a lazy iterator over the elements of schematic matching selector, scanning the elements once; use a
+    SchematicIndex for repeated queries on the same schematic.
+    """
+    return compile_selector(selector).run(schematic, where=where)
@@ -1,6 +1,7 @@
-import sexp
-from common import KiCADElement
-from common import PositionIdentifier, TextEffects, StrokeDefinition, CoordinatePointList
+from . import sexp
+from .common import KiCADElement, ElementRegistry, RawElement, element_decoder
+from .common import PositionIdentifier, TextEffects, StrokeDefinition, CoordinatePointList
+from .units import mm_to_iu, format_iu, mm_list_to_iu, format_iu_list
 
 
 class FillDefinition(KiCADElement):
@@ -15,6 +16,10 @@ class FillDefinition(KiCADElement):
         return "(fill (type {}))".format(self.type)
 
 
+# Tokens of a symbol decoded by Symbol itself, not by symbol_graphic_items_dict.
+_symbol_tokens = {"symbol", "property", "pin", "in_bom", "on_board", "pin_numbers", "pin_names"}
+
+
 class Symbol(KiCADElement):
     """
     The symbol token defines a symbol or sub-unit of a parent symbol.
@@ -33,6 +38,8 @@ class Symbol(KiCADElement):
         self.graphic_items = []
         self.pins = []
         self.units = []
+        # Tokens without a dedicated class, written back unchanged.
+        self.raw_elements = []
 
         self.sub_symbols = []
 
@@ -40,7 +47,7 @@ class Symbol(KiCADElement):
         self.library_identifier = sexp.get_symbol_data_by_token(s_expression, "symbol")[0]
 
         for item in sexp.get_symbol_data_by_token(s_expression, "symbol"):
-            if len(item) == 1:
+            if isinstance(item, list) and len(item) == 1:
                 self.extends = sexp.get_symbol_value(item)
 
         try:
@@ -61,14 +68,17 @@ class Symbol(KiCADElement):
             self.properties.append(new_property)
 
         for item in s_expression:
-            if isinstance(item, list):
-                value = sexp.get_symbol_value(item)
-                try:
-                    new_class_instance = eval("{}()".format(symbol_graphic_items_dict[value].__name__))
-                    new_class_instance.from_s_expression(item)
-                    self.graphic_items.append(new_class_instance)
-                except KeyError:
-                    pass
+            # Lists of one item are the extends/power flag read above.
+            if not isinstance(item, list) or len(item) == 1:
+                continue
+            token = sexp.get_symbol_value(item)
+            if token in _symbol_tokens:
+                continue
+            new_class_instance = symbol_graphic_items_dict.decode(item, token)
+            if isinstance(new_class_instance, RawElement):
+                self.raw_elements.append(new_class_instance)
+            elif new_class_instance is not None:
+                self.graphic_items.append(new_class_instance)
 
         sub_symbol_expression_list = [item for item in s_expression
                                       if sexp.get_symbol_data_by_token(item, "symbol") is not None]
@@ -85,7 +95,7 @@ class Symbol(KiCADElement):
             self.pins.append(new_pin)
 
     def to_s_expression(self):
-        base_string = "(symbol \"{}\"".format(self.library_identifier)
+        base_string = "(symbol \"{}\"".format(sexp.escape(self.library_identifier))
 
         if self.extends is not None:
             base_string += " ({})".format(self.extends)
@@ -105,6 +115,8 @@ class Symbol(KiCADElement):
             base_string += " (in_bom {})".format("yes" if self.in_bom else "no")
         if self.on_board is not None:
             base_string += " (on_board {})".format("yes" if self.on_board else "no")
+        for raw_element in self.raw_elements:
+            base_string += " {}".format(raw_element.to_s_expression())
 
         for prop in self.properties:
             base_string += "\n  {}".format(prop.to_s_expression())
@@ -156,9 +168,9 @@ class SymbolArc(KiCADElement):
         self.fill_definition = FillDefinition()
 
     def from_s_expression(self, s_expression):
-        self.start = sexp.get_symbol_data_by_token(s_expression, "start")
-        self.mid = sexp.get_symbol_data_by_token(s_expression, "mid")
-        self.end = sexp.get_symbol_data_by_token(s_expression, "end")
+        self.start = mm_list_to_iu(sexp.get_symbol_data_by_token(s_expression, "start"))
+        self.mid = mm_list_to_iu(sexp.get_symbol_data_by_token(s_expression, "mid"))
+        self.end = mm_list_to_iu(sexp.get_symbol_data_by_token(s_expression, "end"))
         self.stroke_definition.from_s_expression(sexp.get_symbol_data_by_token(s_expression, "stroke"))
         self.fill_definition.from_s_expression(sexp.get_symbol_data_by_token(s_expression, "fill"))
 
@@ -166,7 +178,7 @@ class SymbolArc(KiCADElement):
         return "(arc (start {}) (mid {}) (end {})\n" \
                "  {}\n" \
                "  {}\n" \
-               ")".format(" ".join(map(str, self.start)), " ".join(map(str, self.mid)), " ".join(map(str, self.end)),
+               ")".format(format_iu_list(self.start), format_iu_list(self.mid), format_iu_list(self.end),
                           self.stroke_definition.to_s_expression(), self.fill_definition.to_s_expression())
 
 
@@ -179,8 +191,8 @@ class SymbolCircle(KiCADElement):
         self.fill_definition = FillDefinition()
 
     def from_s_expression(self, s_expression):
-        self.center = sexp.get_symbol_data_by_token(s_expression, "center")
-        self.radius = sexp.get_symbol_data_by_token(s_expression, "radius")
+        self.center = mm_list_to_iu(sexp.get_symbol_data_by_token(s_expression, "center"))
+        self.radius = mm_list_to_iu(sexp.get_symbol_data_by_token(s_expression, "radius"))
         self.stroke_definition.from_s_expression(sexp.get_symbol_data_by_token(s_expression, "stroke"))
         self.fill_definition.from_s_expression(sexp.get_symbol_data_by_token(s_expression, "fill"))
 
@@ -188,7 +200,7 @@ class SymbolCircle(KiCADElement):
         return "(circle (center {}) (radius {})\n" \
                "  {}\n" \
                "  {}\n" \
-               ")".format(" ".join(map(str, self.center)), " ".join(map(str, self.radius)),
+               ")".format(format_iu_list(self.center), format_iu_list(self.radius),
                           self.stroke_definition.to_s_expression(), self.fill_definition.to_s_expression())
 
 
@@ -243,8 +255,8 @@ class SymbolRectangle(KiCADElement):
         self.fill_definition = FillDefinition()
 
     def from_s_expression(self, s_expression):
-        self.start = sexp.get_symbol_data_by_token(s_expression, "start")
-        self.end = sexp.get_symbol_data_by_token(s_expression, "end")
+        self.start = mm_list_to_iu(sexp.get_symbol_data_by_token(s_expression, "start"))
+        self.end = mm_list_to_iu(sexp.get_symbol_data_by_token(s_expression, "end"))
         self.stroke_definition.from_s_expression(sexp.get_symbol_data_by_token(s_expression, "stroke"))
         self.fill_definition.from_s_expression(sexp.get_symbol_data_by_token(s_expression, "fill"))
 
@@ -252,7 +264,7 @@ class SymbolRectangle(KiCADElement):
         return "(rectangle (start {}) (end {})\n" \
                "  {}\n" \
                "  {}\n" \
-               ")".format(" ".join(map(str, self.start)), " ".join(map(str, self.end)),
+               ")".format(format_iu_list(self.start), format_iu_list(self.end),
                           self.stroke_definition.to_s_expression(), self.fill_definition.to_s_expression())
 
 
@@ -280,7 +292,7 @@ class SymbolPin(KiCADElement):
         self.pin_electrical_type = ""
         self.pin_graphic_style = ""
         self.position_identifier = PositionIdentifier()
-        self.length = ""
+        self.length = 0
         self.name = ["", TextEffects()]
         self.number = ["", TextEffects()]
 
@@ -290,7 +302,7 @@ class SymbolPin(KiCADElement):
         self.pin_electrical_type = sexp.get_symbol_data(s_expression)
         self.pin_graphic_style = sexp.get_symbol_data(s_expression, 1)
         self.position_identifier.from_s_expression(s_expression)
-        self.length = sexp.get_symbol_data_by_token(s_expression, "length")[0]
+        self.length = mm_to_iu(sexp.get_symbol_data_by_token(s_expression, "length")[0])
         name, text_effects = sexp.get_symbol_data_by_token(s_expression, "name")
         self.name[0] = name
         self.name[1].from_s_expression(text_effects)
@@ -302,7 +314,7 @@ class SymbolPin(KiCADElement):
 
     def to_s_expression(self):
         base_string = "(pin {} {} {} (length {})".format(self.pin_electrical_type, self.pin_graphic_style,
-                                                         self.position_identifier.to_s_expression(), self.length)
+                                                         self.position_identifier.to_s_expression(), format_iu(self.length))
         if self.hide is not None:
             base_string += " hide"
         base_string += "\n  (name \"{}\" {})".format(self.name[0], self.name[1].to_s_expression())
@@ -311,9 +323,10 @@ class SymbolPin(KiCADElement):
         return base_string
 
 
-symbol_graphic_items_dict = {"arc": SymbolArc,
-                             "circle": SymbolCircle,
-                             "gr_curve": SymbolCurve,
-                             "polyline": SymbolLine,
-                             "rectangle": SymbolRectangle,
-                             "text": SymbolText}
+symbol_graphic_items_dict = ElementRegistry({"arc": SymbolArc,
+                                             "circle": SymbolCircle,
+                                             "gr_curve": SymbolCurve,
+                                             "polyline": SymbolLine,
+                                             "rectangle": SymbolRectangle,
+                                             "text": SymbolText},
+                                            unknown=element_decoder(RawElement))
@@ -1,10 +1,11 @@
 # https://dev-docs.kicad.org/en/file-formats/sexpr-schematic/
 
 
-import sexp
-from common import KiCADElement
-from common import PositionIdentifier, UniqueIdentifier, StrokeDefinition, CoordinatePointList, TextEffects
-from schematic_and_symbol_library import Symbol, SymbolProperty, FillDefinition
+from . import sexp
+from .common import KiCADElement, ElementRegistry, RawElement, element_decoder, map_chunks
+from .common import PositionIdentifier, UniqueIdentifier, StrokeDefinition, CoordinatePointList, TextEffects
+from .schematic_and_symbol_library import Symbol, SymbolProperty, FillDefinition
+from .units import mm_list_to_iu, format_iu_list
 
 
 class Header(KiCADElement):
@@ -27,11 +28,8 @@ class LibrarySymbols(KiCADElement):
         self.symbol_list = []
 
     def from_s_expression(self, s_expression):
-        for item in s_expression:
-            if isinstance(item, list):
-                new_symbol = Symbol()
-                new_symbol.from_s_expression(item)
-                self.symbol_list.append(new_symbol)
+        self.symbol_list = map_chunks(element_decoder(Symbol), [item for item in s_expression
+                                                                 if isinstance(item, list)])
 
     def to_s_expression(self):
         base_string = "(lib_symbols"
@@ -87,7 +85,8 @@ class BusEntry(KiCADElement):
 
     def from_s_expression(self, s_expression):
         self.position_identifier.from_s_expression(s_expression)
-        self.size = sexp.get_symbol_data_by_token(s_expression, "size")
+        # Internal units, see units.py.
+        self.size = mm_list_to_iu(sexp.get_symbol_data_by_token(s_expression, "size"))
         self.stroke_definition.from_s_expression(s_expression)
         self.unique_identifier.from_s_expression(s_expression)
 
@@ -95,7 +94,7 @@ class BusEntry(KiCADElement):
         base_string = "(bus_entry {} (size {})" \
                       "\n  {}" \
                       "\n  {}" \
-                      "\n)".format(self.position_identifier.to_s_expression(), " ".join(map(str, self.size)),
+                      "\n)".format(self.position_identifier.to_s_expression(), format_iu_list(self.size),
                                    self.stroke_definition.to_s_expression(), self.unique_identifier.to_s_expression())
         return base_string
 
@@ -271,19 +270,32 @@ class HierarchicalLabel(KiCADElement):
         KiCADElement.__init__(self)
         self.text = ""
         self.shape = None
+        self.fields_autoplaced = ""
         self.position_identifier = PositionIdentifier()
         self.text_effects = TextEffects()
         self.unique_identifier = UniqueIdentifier()
 
     def from_s_expression(self, s_expression):
-        # ...
+        self.text = sexp.get_symbol_data(s_expression)
         self.position_identifier.from_s_expression(s_expression)
-        self.text_effects.from_s_expression(s_expression)
+        self.text_effects.from_s_expression(sexp.get_symbol_data_by_token(s_expression, "effects"))
         self.unique_identifier.from_s_expression(s_expression)
-        raise NotImplementedError
+        for item in s_expression[2:]:
+            value = sexp.get_symbol_value(item)
+            if value == "shape":
+                self.shape = sexp.get_symbol_data(item)
+            elif value == "fields_autoplaced":
+                self.fields_autoplaced = sexp.get_symbol_value(item)
 
     def to_s_expression(self):
-        raise NotImplementedError
+        base_string = "(hierarchical_label \"{}\" (shape {}) {} (FIELDS_AUTOPLACED)\n  {}\n  {}\n)"\
+            .format(sexp.escape(self.text), self.shape, self.position_identifier.to_s_expression(),
+                    self.text_effects.to_s_expression(), self.unique_identifier.to_s_expression())
+        if self.fields_autoplaced != "":
+            base_string = base_string.replace("FIELDS_AUTOPLACED", self.fields_autoplaced)
+        else:
+            base_string = base_string.replace(" (FIELDS_AUTOPLACED)", "")
+        return base_string
 
 
 class Pin(KiCADElement):
@@ -400,10 +412,17 @@ class HierarchicalSheetPin(KiCADElement):
         self.unique_identifier = UniqueIdentifier()
 
     def from_s_expression(self, s_expression):
-        raise NotImplementedError
+        self.name = sexp.get_symbol_data(s_expression)
+        self.type = sexp.get_symbol_data(s_expression, 1)
+        self.position_identifier.from_s_expression(s_expression)
+        self.text_effects.from_s_expression(sexp.get_symbol_data_by_token(s_expression, "effects"))
+        self.unique_identifier.from_s_expression(s_expression)
 
     def to_s_expression(self):
-        raise NotImplementedError
+        return "(pin \"{}\" {} {}\n  {}\n  {}\n)".format(sexp.escape(self.name), self.type,
+                                                         self.position_identifier.to_s_expression(),
+                                                         self.text_effects.to_s_expression(),
+                                                         self.unique_identifier.to_s_expression())
 
 
 class HierarchicalSheetInstance(KiCADElement):
@@ -484,20 +503,30 @@ class SymbolInstances(KiCADElement):
         return base_string
 
 
-class_dict = {#"kicad_sch": Header,
-              "uuid": UniqueIdentifier,
-              "lib_symbols": LibrarySymbols,
-              "junction": Junction,
-              "no_connect": NoConnect,
-              "bus_entry": BusEntry,
-              "wire": Wire,
-              "bus": Bus,
-              "image": Image,
-              "polyline": GraphicalLine,
-              "text": GraphicalText,
-              "label": LocalLabel,
-              "global_label": GlobalLabel,
-              "symbol": SymbolSchematic,
-              "sheet_instances": HierarchicalSheetInstances,
-              "symbol_instances": SymbolInstances,
-              }
+class_dict = ElementRegistry({#"kicad_sch": Header,
+                              "uuid": UniqueIdentifier,
+                              "lib_symbols": LibrarySymbols,
+                              "junction": Junction,
+                              "no_connect": NoConnect,
+                              "bus_entry": BusEntry,
+                              "wire": Wire,
+                              "bus": Bus,
+                              #"image": Image,
+                              "polyline": GraphicalLine,
+                              "text": GraphicalText,
+                              "label": LocalLabel,
+                              "global_label": GlobalLabel,
+                              "hierarchical_label": HierarchicalLabel,
+                              "symbol": SymbolSchematic,
+                              "sheet_instances": HierarchicalSheetInstances,
+                              "symbol_instances": SymbolInstances,
+                              }, unknown=element_decoder(RawElement))
+
+
+def register_element(token: str, element_class=None, decoder=None):
+    """
+    Register a handler for a top level schematic token (e.g. "sheet", "bus_alias", "text_box").
+    Tokens without a handler are kept as RawElement.
+    Can be used as class decorator: @register_element("bus_alias")
+    """
+    return class_dict.register(token, element_class, decoder)
@@ -0,0 +1,179 @@
+import re
+
+import sexpdata
+from sexpdata import loads, dumps
+
+# One token per match, leading whitespace and "#" comments included: "(", ")", a string (group 3) or an atom (group 4).
+_token_regex = re.compile(r'(?:\s+|#[^\n]*\n)*(?:(\()|(\))|"((?:[^"\\]|\\.)*)"|((?:[^\s()"#\\]|\\.)+))', re.DOTALL)
+_trailing_regex = re.compile(r'(?:\s+|#[^\n]*(?:\n|$))*')
+_escape_regex = re.compile(r'\\(.)', re.DOTALL)
+
+
+def load(raw_string: str):
+    """
+    Returns a list of S-Expression Symbols.
+    """
+    return loads(raw_string, true="yes", false="no", line_comment="#")
+
+
+def dump(s_expression) -> str:
+    """
+    Returns the string representation of a list of S-Expression Symbols, inverse of load().
+    """
+    return dumps(s_expression, true_as="yes", false_as="no")
+
+
+def unescape(string: str) -> str:
+    """
+    Returns the value of the content of a quoted string, its escapes replaced.
+    """
+    if "\\" not in string:
+        return string
+    return _escape_regex.sub(lambda escape: sexpdata.String.unquote(escape.group()), string)
+
+
+def escape(string: str) -> str:
+    """
+    Returns string with the escapes needed to write it between quotes, inverse of unescape().
+    """
+    return sexpdata.String.quote(string)
+
+
+def _atom(token: str):
+    """
+    Returns the value of an atom, as sexpdata does with load() settings.
+    """
+    if token == "yes":
+        return True
+    if token == "no":
+        return False
+    try:
+        return int(token)
+    except ValueError:
+        try:
+            return float(token)
+        except ValueError:
+            if "\\" in token:
+                token = _escape_regex.sub(lambda match: sexpdata.Symbol.unquote(match.group()), token)
+            return sexpdata.Symbol(token)
+
+
+def load_stream(chunks):
+    """
+    Same as load(), but reading the text from an iterable of strings, e.g. blocks read from a decompressor: only the
+    last incomplete token of each block is kept in memory, never the whole text.
+    Square brackets and quote (') have no special meaning, KiCad files do not use them.
+    """
+    stack = [[]]
+    current = stack[-1]
+    atoms = {}
+    rest = ""
+    for chunk in chunks:
+        buffer = rest + chunk if rest else chunk
+        position = 0
+        length = len(buffer)
+        for match in _token_regex.finditer(buffer):
+            # Stop at a gap (string not terminated yet), at a token touching the end of the buffer or followed by a
+            # backslash ending it (an escape inside an atom): all may continue in the next chunk.
+            end = match.end()
+            if match.start() != position or end == length or end == length - 1 and buffer[end] == "\\":
+                break
+            position = end
+            kind = match.lastindex
+            if kind == 4:
+                token = match.group(4)
+                value = atoms.get(token)
+                if value is None:
+                    value = atoms[token] = _atom(token)
+                current.append(value)
+            elif kind == 1:
+                current = []
+                stack.append(current)
+            elif kind == 2:
+                if len(stack) == 1:
+                    raise sexpdata.ExpectNothing(buffer[match.start(2):])
+                item = stack.pop()
+                current = stack[-1]
+                current.append(item)
+            else:
+                string = match.group(3)
+                if "\\" in string:
+                    string = _escape_regex.sub(lambda escape: sexpdata.String.unquote(escape.group()), string)
+                current.append(string)
+        rest = buffer[position:]
+
+    # Whatever is left is the last token of the text, or an error.
+    match = _token_regex.match(rest)
+    while match is not None and match.end() > 0:
+        if match.group(1) is not None:
+            stack.append([])
+        elif match.group(2) is not None:
+            if len(stack) == 1:
+                raise sexpdata.ExpectNothing(rest[match.start(2):])
+            item = stack.pop()
+            stack[-1].append(item)
+        elif match.group(3) is not None:
+            stack[-1].append(_escape_regex.sub(lambda escape: sexpdata.String.unquote(escape.group()),
+                                               match.group(3)))
+        else:
+            stack[-1].append(_atom(match.group(4)))
+        rest = rest[match.end():]
+        match = _token_regex.match(rest)
+    if _trailing_regex.match(rest).end() != len(rest):
+        raise sexpdata.ExpectClosingBracket('"', None)
+    if len(stack) > 1:
+        raise sexpdata.ExpectClosingBracket(None, ")")
+    if len(stack[0]) != 1:
+        raise ValueError("Expected one S-Expression, found {}".format(len(stack[0])))
+    return stack[0][0]
+
+
+def get_symbol_value(item):
+    """
+    Returns the value of the topmost child of an S-Expression Symbol.
+    Example:    item = (user (name John) (surname Doe))
+                return 'user'
+    """
+    if type(item) != sexpdata.Symbol:
+        name = get_symbol_value(sexpdata.car(item))
+    else:
+        name = item.value()
+    return name
+
+
+def get_symbol_data(item, index=0):
+    """
+    Returns the element at a given index inside an S-Expression Symbol.
+    Example:    item = (user (name John) (surname Doe))
+                return (name John)
+    """
+    cons = sexpdata.cdr(item)[index]
+    if type(cons) == sexpdata.Symbol:
+        data = cons.value()
+    else:
+        data = cons
+    return data
+
+
+def get_symbol_data_by_token(item, token, recursive=True):
+    """
+    Returns all the data of an S-Expression Symbol matching given token.
+    Example:    item = (user (name John) (surname Doe))
+                token = user
+                return (name John) (surname Doe)
+    Example:    item = (user (name John) (surname Doe))
+                token = name
+                return 'John'
+    """
+    data = None
+    if type(item) == list:
+        for cons in item:
+            if type(cons) == sexpdata.Symbol:
+                if cons.value() == token:
+                    data = sexpdata.cdr(item)
+            elif type(cons) != sexpdata.Symbol and type(cons) == list:
+                if recursive:
+                    data = get_symbol_data_by_token(cons, token)
+            if data is not None:
+                break
+    return data
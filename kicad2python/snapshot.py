@@ -0,0 +1,362 @@
+import mmap
+import struct
+import sys
+from array import array
+
+import sexpdata
+
+from .common import KiCADElement, PositionIdentifier, CoordinatePoint, UniqueIdentifier
+from .parser import Schematic
+
+# File layout: header, then the sections in this order, each one starting at a multiple of 8 bytes.
+#   string_offsets  uint32[string count + 1]  offsets of each string inside string_data
+#   string_data     UTF-8 bytes of all distinct strings
+#   tags            uint8[node count]         type of each node of the object graph, in depth-first order
+#   values          int32[node count]         payload of each node, meaning depends on the tag
+#   integers        int64[]                   integer values not fitting in values
+#   floats          float64[]                 float values
+#   x, y            int64[point count]        coordinates of PositionIdentifier and CoordinatePoint, internal units
+#   uuids           16 bytes per UniqueIdentifier
+#   elements        uint32[element count]     index in tags of the first node of each element of kicad_element
+magic = b"K2PSNAP2"
+section_names = ("string_offsets", "string_data", "tags", "values", "integers", "floats", "x", "y", "uuids",
+                 "elements")
+_header = struct.Struct("<8s8sQ" + "QQ" * len(section_names))
+_section_types = {"string_offsets": "I", "tags": "B", "values": "i", "integers": "q", "floats": "d", "x": "q",
+                  "y": "q", "elements": "I"}
+
+# Node tags. The payload (values) is given in brackets, nodes following a node are its children.
+NONE = 0
+TRUE = 1
+FALSE = 2
+INT = 3             # [the integer] if it fits in 32 bits
+FLOAT = 4           # [index in floats]
+STRING = 5          # [index in strings]
+SYMBOL = 6          # [index in strings] sexpdata.Symbol
+LIST = 7            # [length] followed by the items
+TUPLE = 8           # [length] followed by the items
+ELEMENT = 9         # [index in strings of "ClassName attribute ..."] followed by the value of each attribute
+POSITION = 10       # [index in x, y] followed by the angle
+POINT = 11          # [index in x, y]
+UUID = 12           # [index in uuids]
+LONG_INT = 13       # [index in integers]
+BIG_INT = 14        # [index in strings of its decimal text], integers not fitting in 64 bits
+
+
+def _element_classes(base=KiCADElement, classes=None) -> dict:
+    if classes is None:
+        classes = {}
+    for element_class in base.__subclasses__():
+        classes[element_class.__name__] = element_class
+        _element_classes(element_class, classes)
+    return classes
+
+
+class _Encoder:
+    def __init__(self):
+        self.strings = {}
+        self.tags = array("B")
+        self.values = array("i")
+        self.integers = array("q")
+        self.floats = array("d")
+        self.x = array("q")
+        self.y = array("q")
+        self.uuids = bytearray()
+        self.elements = array("I")
+
+    def string(self, text: str) -> int:
+        index = self.strings.get(text)
+        if index is None:
+            index = self.strings[text] = len(self.strings)
+        return index
+
+    def node(self, tag: int, value: int = 0):
+        self.tags.append(tag)
+        self.values.append(value)
+
+    def encode(self, item):
+        item_type = type(item)
+        if item is None:
+            self.node(NONE)
+        elif item is True:
+            self.node(TRUE)
+        elif item is False:
+            self.node(FALSE)
+        elif item_type == int:
+            if -2 ** 31 <= item < 2 ** 31:
+                self.node(INT, item)
+            elif -2 ** 63 <= item < 2 ** 63:
+                self.node(LONG_INT, len(self.integers))
+                self.integers.append(item)
+            else:
+                self.node(BIG_INT, self.string(str(item)))
+        elif item_type == float:
+            self.node(FLOAT, len(self.floats))
+            self.floats.append(item)
+        elif item_type == str:
+            self.node(STRING, self.string(item))
+        elif item_type == sexpdata.Symbol:
+            self.node(SYMBOL, self.string(item.value()))
+        elif item_type == list or item_type == tuple:
+            self.node(LIST if item_type == list else TUPLE, len(item))
+            for child in item:
+                self.encode(child)
+        elif item_type == PositionIdentifier and type(item.x) == int and type(item.y) == int:
+            self.node(POSITION, len(self.x))
+            self.x.append(item.x)
+            self.y.append(item.y)
+            self.encode(item.angle)
+        elif item_type == CoordinatePoint and type(item.x) == int and type(item.y) == int:
+            self.node(POINT, len(self.x))
+            self.x.append(item.x)
+            self.y.append(item.y)
+        elif item_type == UniqueIdentifier and self._is_uuid(item.uuid):
+            self.node(UUID, len(self.uuids) // 16)
+            self.uuids += bytes.fromhex(item.uuid.replace("-", ""))
+        elif isinstance(item, KiCADElement):
+            self.node(ELEMENT, self.string(" ".join([item_type.__name__] + list(item.__dict__))))
+            for value in item.__dict__.values():
+                self.encode(value)
+        else:
+            raise TypeError("Cannot store {} in a snapshot".format(item_type.__name__))
+
+    @staticmethod
+    def _is_uuid(text) -> bool:
+        if type(text) != str or len(text) != 36 or text.lower() != text:
+            return False
+        try:
+            return "{}-{}-{}-{}-{}".format(text[0:8], text[9:13], text[14:18], text[19:23], text[24:36]) == text \
+                and len(bytes.fromhex(text.replace("-", ""))) == 16
+        except ValueError:
+            return False
+
+    def sections(self) -> dict:
+        string_data = bytearray()
+        string_offsets = array("I", [0])
+        for text in self.strings:
+            string_data += text.encode("UTF-8")
+            string_offsets.append(len(string_data))
+        return {"string_offsets": string_offsets.tobytes(), "string_data": bytes(string_data),
+                "tags": self.tags.tobytes(), "values": self.values.tobytes(), "integers": self.integers.tobytes(),
+                "floats": self.floats.tobytes(), "x": self.x.tobytes(), "y": self.y.tobytes(),
+                "uuids": bytes(self.uuids), "elements": self.elements.tobytes()}
+
+
+def save_snapshot(schematic: Schematic, file_name: str):
+    """
+    Save a parsed schematic in the binary snapshot format, see load_snapshot() and Snapshot.
+    """
+    encoder = _Encoder()
+    # Same as encoding [file_name, version, generator, kicad_element], recording where each element starts.
+    encoder.node(LIST, 4)
+    encoder.encode(schematic.file_name)
+    encoder.encode(schematic.version)
+    encoder.encode(schematic.generator)
+    encoder.node(LIST, len(schematic.kicad_element))
+    for element in schematic.kicad_element:
+        encoder.elements.append(len(encoder.tags))
+        encoder.encode(element)
+    sections = encoder.sections()
+
+    position = _header.size
+    layout = []
+    for name in section_names:
+        position += -position % 8
+        layout.extend([position, len(sections[name])])
+        position += len(sections[name])
+    with open(file_name, "wb") as file:
+        file.write(_header.pack(magic, sys.byteorder.encode("ascii").ljust(8, b"\0"), len(encoder.tags), *layout))
+        for name in section_names:
+            file.write(b"\0" * (-file.tell() % 8))
+            file.write(sections[name])
+
+
+class _LazyStrings:
+    """
+    Strings of a snapshot decoded one by one when first used.
+    """
+    def __init__(self, string_offsets, string_data):
+        self.string_offsets = string_offsets
+        self.string_data = string_data
+        self.cache = {}
+
+    def __getitem__(self, index: int) -> str:
+        text = self.cache.get(index)
+        if text is None:
+            offsets = self.string_offsets
+            text = self.cache[index] = str(self.string_data[offsets[index]:offsets[index + 1]], "UTF-8")
+        return text
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file.
+
+    Opening a snapshot decodes nothing: the columns (x, y, tags, values, ...) are memoryviews on the mapped file,
+    shared between all processes mapping the same file. element() decodes a single element of kicad_element, reading
+    only its own nodes and strings; to_schematic() builds the whole normal object model.
+
+    Example:    with Snapshot("file.k2psnap") as snapshot:
+                    wires = [snapshot.element(index) for index in range(len(snapshot))
+                             if snapshot.element_class(index) is Wire]
+    """
+
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        with open(file_name, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        header = _header.unpack_from(self._mmap)
+        if header[0] != magic:
+            raise ValueError("{} is not a KiCAD2Python snapshot of this version".format(file_name))
+        if header[1].rstrip(b"\0").decode("ascii") != sys.byteorder:
+            raise ValueError("{} was written on a machine with different byte order".format(file_name))
+        self.node_count = header[2]
+        self._buffer = memoryview(self._mmap)
+        for index, name in enumerate(section_names):
+            offset, length = header[3 + 2 * index], header[4 + 2 * index]
+            section = self._buffer[offset:offset + length]
+            if name in _section_types:
+                section = section.cast(_section_types[name])
+            setattr(self, name, section)
+        self._strings = None
+        self._lazy_strings = None
+        self._element_decoder = None
+        self._classes = None
+
+    def close(self):
+        for name in section_names:
+            getattr(self, name).release()
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self.elements)
+
+    @property
+    def strings(self) -> list:
+        if self._strings is None:
+            data = bytes(self.string_data)
+            offsets = self.string_offsets
+            self._strings = [data[offsets[i]:offsets[i + 1]].decode("UTF-8") for i in range(len(offsets) - 1)]
+        return self._strings
+
+    def uuid(self, index: int) -> str:
+        text = self.uuids[16 * index:16 * index + 16].hex()
+        return "{}-{}-{}-{}-{}".format(text[0:8], text[8:12], text[12:16], text[16:20], text[20:32])
+
+    def element_class(self, index: int):
+        """
+        Returns the class of the element number index of kicad_element, without decoding it.
+        """
+        if self._classes is None:
+            self._classes = _element_classes()
+        node = self.elements[index]
+        tag = self.tags[node]
+        if tag == ELEMENT:
+            if self._lazy_strings is None:
+                self._lazy_strings = _LazyStrings(self.string_offsets, self.string_data)
+            return self._classes[self._lazy_strings[self.values[node]].split(" ", 1)[0]]
+        return {POSITION: PositionIdentifier, POINT: CoordinatePoint, UUID: UniqueIdentifier}.get(tag, type(None))
+
+    def element(self, index: int):
+        """
+        Returns the element number index of kicad_element, decoded from the mapped columns. Each call returns a new
+        object.
+        """
+        if self._element_decoder is None:
+            if self._lazy_strings is None:
+                self._lazy_strings = _LazyStrings(self.string_offsets, self.string_data)
+            self._element_decoder = self._decoder(self._lazy_strings, self.tags, self.values)
+        return self._element_decoder(self.elements[index])
+
+    def _decoder(self, strings, tags, values):
+        """
+        Returns a function decoding the value whose first node is at given position. strings, tags and values are
+        anything indexable: lists for whole decoding, the memoryviews themselves for single elements.
+        """
+        floats = self.floats
+        x = self.x
+        y = self.y
+        classes = _element_classes()
+        shapes = {}
+        position = 0
+
+        def decode():
+            nonlocal position
+            tag = tags[position]
+            value = values[position]
+            position += 1
+            if tag == STRING:
+                return strings[value]
+            if tag == INT:
+                return value
+            if tag == POINT or tag == POSITION:
+                if tag == POINT:
+                    point = CoordinatePoint.__new__(CoordinatePoint)
+                else:
+                    point = PositionIdentifier.__new__(PositionIdentifier)
+                    point.angle = None
+                point.x = x[value]
+                point.y = y[value]
+                if tag == POSITION:
+                    point.angle = decode()
+                return point
+            if tag == ELEMENT:
+                shape = shapes.get(value)
+                if shape is None:
+                    names = strings[value].split(" ")
+                    shape = shapes[value] = (classes[names[0]], names[1:])
+                element = shape[0].__new__(shape[0])
+                element.__dict__.update([(name, decode()) for name in shape[1]])
+                return element
+            if tag == LIST:
+                return [decode() for _ in range(value)]
+            if tag == UUID:
+                unique_identifier = UniqueIdentifier.__new__(UniqueIdentifier)
+                unique_identifier.uuid = self.uuid(value)
+                return unique_identifier
+            if tag == NONE:
+                return None
+            if tag == TRUE:
+                return True
+            if tag == FALSE:
+                return False
+            if tag == FLOAT:
+                return floats[value]
+            if tag == SYMBOL:
+                return sexpdata.Symbol(strings[value])
+            if tag == TUPLE:
+                return tuple([decode() for _ in range(value)])
+            if tag == LONG_INT:
+                return self.integers[value]
+            if tag == BIG_INT:
+                return int(strings[value])
+            raise ValueError("Unknown tag {} in snapshot".format(tag))
+
+        def decode_at(start: int):
+            nonlocal position
+            position = start
+            return decode()
+
+        return decode_at
+
+    def to_schematic(self) -> Schematic:
+        decode_at = self._decoder(self.strings, bytes(self.tags), self.values.tolist())
+        file_name, version, generator, kicad_element = decode_at(0)
+        schematic = Schematic()
+        schematic.file_name = file_name
+        schematic.version = version
+        schematic.generator = generator
+        schematic.kicad_element = kicad_element
+        return schematic
+
+
+def load_snapshot(file_name: str) -> Schematic:
+    with Snapshot(file_name) as snapshot:
+        return snapshot.to_schematic()
@@ -0,0 +1,309 @@
+import math
+
+from .bounding_box import BoundingBoxes, arc_center, library_symbol_key
+from .schematic_and_symbol_library import SymbolArc, SymbolCircle, SymbolLine, SymbolRectangle, SymbolText
+from .schematic_file_format import LibrarySymbols, SymbolSchematic, Wire, Bus, Junction, NoConnect, GraphicalLine, \
+    GraphicalText, LocalLabel, GlobalLabel, HierarchicalLabel
+from .transform import symbol_orientation_matrix, unit_sub_symbols
+from .units import format_iu, mm_to_iu
+
+default_text_size = 12700
+_margin = 50000
+_write_block = 1000
+_anchors = {"left": "start", "right": "end"}
+_baselines = {"top": "hanging", "bottom": "auto"}
+
+style = """
+.symbol {stroke: #840000; stroke-width: 0.254; fill: none; stroke-linecap: round}
+.symbol .outline {fill: #840000}
+.symbol .background {fill: #ffffc2}
+.wire {stroke: #008400; stroke-width: 0.1524; fill: none}
+.bus {stroke: #000084; stroke-width: 0.3048; fill: none}
+.line {stroke: #000084; stroke-width: 0.1524; fill: none; stroke-dasharray: 1 0.5}
+.junction {fill: #008400; stroke: none}
+.no_connect {stroke: #000084; stroke-width: 0.1524}
+text {font-family: sans-serif; fill: #000000; stroke: none}
+.field {fill: #006464}
+.label {fill: #000000}
+"""
+
+
+def _escape(text: str) -> str:
+    # Same as xml.sax.saxutils.escape(), which imports the whole xml.sax package.
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _format(value) -> str:
+    """
+    Returns the millimeters representation of a computed (possibly float) value in internal units.
+    """
+    return format_iu(int(round(value)))
+
+
+def _points(coordinate_points, flip: bool = False) -> str:
+    sign = -1 if flip else 1
+    return " ".join(["{},{}".format(format_iu(point.x), format_iu(sign * point.y)) for point in coordinate_points])
+
+
+def _fill_class(fill_definition) -> str:
+    if fill_definition.type in ("outline", "background"):
+        return ' class="{}"'.format(fill_definition.type)
+    return ""
+
+
+def _stroke_width(stroke_definition) -> str:
+    width = stroke_definition.width
+    if not width:
+        return ""
+    return ' stroke-width="{}"'.format(width)
+
+
+def _text(text: str, x: int, y: int, angle, text_effects, css_class: str = "") -> str:
+    size = default_text_size
+    if text_effects.size:
+        size = mm_to_iu(text_effects.size[0])
+    attributes = ""
+    justify = (text_effects.justify or "").split()
+    anchor = "middle"
+    baseline = "central"
+    for item in justify:
+        anchor = _anchors.get(item, anchor)
+        baseline = _baselines.get(item, baseline)
+    if anchor != "start":
+        attributes += ' text-anchor="{}"'.format(anchor)
+    if baseline != "auto":
+        attributes += ' dominant-baseline="{}"'.format(baseline)
+    if angle and angle % 180:
+        # Text is never drawn upside down, KiCad angles are counterclockwise on screen and SVG ones clockwise.
+        attributes += ' transform="rotate({} {} {})"'.format(-(angle % 180), format_iu(x), format_iu(y))
+    if css_class:
+        attributes += ' class="{}"'.format(css_class)
+    return '<text x="{}" y="{}" font-size="{}"{}>{}</text>'.format(format_iu(x), format_iu(y), format_iu(size),
+                                                                    attributes, _escape(str(text).replace('\\"', '"')))
+
+
+def _arc_path(start: list, mid: list, end: list) -> str:
+    """
+    Returns the path of the arc through start, mid and end, given in SVG coordinates. The arc is drawn as two arcs
+    (start to mid, mid to end) each shorter than half a turn, so that the large arc flag is always 0.
+    """
+    (x1, y1), (x2, y2), (x3, y3) = start, mid, end
+    cross = (x2 - x1) * (y3 - y2) - (y2 - y1) * (x3 - x2)
+    center = arc_center(start, mid, end)
+    if center is None:
+        return "M{},{} L{},{}".format(_format(x1), _format(y1), _format(x3), _format(y3))
+    center_x, center_y = center
+    radius = _format(math.hypot(x1 - center_x, y1 - center_y))
+    sweep = 1 if cross > 0 else 0
+    return "M{},{} A{},{} 0 0 {} {},{} A{},{} 0 0 {} {},{}".format(_format(x1), _format(y1), radius, radius, sweep,
+                                                                   _format(x2), _format(y2), radius, radius, sweep,
+                                                                   _format(x3), _format(y3))
+
+
+def _symbol_item(item) -> str:
+    """
+    Returns the SVG of a library symbol graphic item, the Y axis of the library pointing up is flipped.
+    """
+    if isinstance(item, SymbolRectangle):
+        x1, y1, x2, y2 = item.start[0], -item.start[1], item.end[0], -item.end[1]
+        return '<rect x="{}" y="{}" width="{}" height="{}"{}{}/>'.format(
+            format_iu(min(x1, x2)), format_iu(min(y1, y2)), format_iu(abs(x2 - x1)), format_iu(abs(y2 - y1)),
+            _fill_class(item.fill_definition), _stroke_width(item.stroke_definition))
+    if isinstance(item, SymbolCircle):
+        return '<circle cx="{}" cy="{}" r="{}"{}{}/>'.format(
+            format_iu(item.center[0]), format_iu(-item.center[1]), format_iu(item.radius[0]),
+            _fill_class(item.fill_definition), _stroke_width(item.stroke_definition))
+    if isinstance(item, SymbolArc):
+        return '<path d="{}"{}{}/>'.format(
+            _arc_path((item.start[0], -item.start[1]), (item.mid[0], -item.mid[1]), (item.end[0], -item.end[1])),
+            _fill_class(item.fill_definition), _stroke_width(item.stroke_definition))
+    if isinstance(item, SymbolLine):
+        return '<polyline points="{}"{}{}/>'.format(_points(item.coordinate_point_list.coordinate_points, True),
+                                                    _fill_class(item.fill_definition),
+                                                    _stroke_width(item.stroke_definition))
+    if isinstance(item, SymbolText):
+        if item.text_effects.is_hide:
+            return ""
+        position = item.position_identifier
+        return _text(item.text, position.x, -position.y, position.angle, item.text_effects)
+    return ""
+
+
+def _pin(pin) -> str:
+    if pin.hide is not None:
+        return ""
+    position = pin.position_identifier
+    angle = math.radians(position.angle or 0)
+    x2 = position.x + pin.length * math.cos(angle)
+    y2 = position.y + pin.length * math.sin(angle)
+    return '<line x1="{}" y1="{}" x2="{}" y2="{}"/>'.format(format_iu(position.x), format_iu(-position.y),
+                                                            _format(x2), _format(-y2))
+
+
+class SVGRenderer:
+    """
+    Render schematics to SVG.
+
+    Each library symbol unit is drawn once as a <symbol> in <defs>, placed symbols are <use> of it with their
+    orientation as transform. The drawings of the library symbols are cached by (bounding_box.library_symbol_key(),
+    unit) and reused by the following renders of schematics embedding the same symbols. The SVG is written by blocks
+    while the elements are rendered, the whole document is never held in memory.
+
+    Example:    renderer = SVGRenderer()
+                for schematic in schematics:
+                    renderer.render_to_file(schematic, schematic.file_name.replace(".kicad_sch", ".svg"))
+    """
+
+    def __init__(self):
+        self._symbol_cache = {}
+        self._symbol_ids = {}
+        # lib_id -> (library symbol, library_symbol_key()) of the schematic being rendered.
+        self._library_symbols = {}
+        self._boxes = BoundingBoxes()
+
+    def clear_cache(self):
+        self._symbol_cache = {}
+        self._symbol_ids = {}
+        self._boxes.clear_cache()
+
+    def _library_symbol_key(self, library_symbol) -> bytes:
+        library_symbol_and_key = self._library_symbols.get(library_symbol.library_identifier)
+        if library_symbol_and_key is not None and library_symbol_and_key[0] is library_symbol:
+            return library_symbol_and_key[1]
+        return library_symbol_key(library_symbol)
+
+    def symbol_id(self, library_identifier: str, unit: int) -> str:
+        """
+        Returns the id of the <symbol> of a library symbol unit of the schematic being rendered.
+        """
+        library_symbol_and_key = self._library_symbols.get(library_identifier)
+        key = (library_symbol_and_key[1] if library_symbol_and_key is not None else library_identifier, unit)
+        symbol_id = self._symbol_ids.get(key)
+        if symbol_id is None:
+            symbol_id = self._symbol_ids[key] = "symbol{}".format(len(self._symbol_ids))
+        return symbol_id
+
+    def render_symbol(self, library_symbol, unit: int = 1) -> str:
+        """
+        Returns the <symbol> definition of a library symbol unit, cached.
+        """
+        key = (self._library_symbol_key(library_symbol), unit)
+        definition = self._symbol_cache.get(key)
+        if definition is not None:
+            return definition
+        items = []
+        for symbol in [library_symbol] + unit_sub_symbols(library_symbol, unit):
+            for graphic_item in symbol.graphic_items:
+                items.append(_symbol_item(graphic_item))
+            for pin in symbol.pins:
+                items.append(_pin(pin))
+        symbol_id = self._symbol_ids.get(key)
+        if symbol_id is None:
+            symbol_id = self._symbol_ids[key] = "symbol{}".format(len(self._symbol_ids))
+        definition = '<symbol id="{}" overflow="visible"><g class="symbol">{}</g></symbol>'.format(
+            symbol_id, "".join(items))
+        self._symbol_cache[key] = definition
+        return definition
+
+    def view_box(self, schematic) -> tuple:
+        """
+        Returns (x, y, width, height) in internal units enclosing the drawn elements.
+        """
+        extent = self._boxes.sheet_extent(schematic)
+        if extent is None:
+            return 0, 0, 2970000, 2100000
+        extent = extent.inflate(_margin)
+        return extent.x1, extent.y1, extent.width, extent.height
+
+    def render_element(self, element) -> str:
+        """
+        Returns the SVG of a sheet element, "" for elements not drawn.
+        """
+        if isinstance(element, SymbolSchematic):
+            position = element.position_identifier
+            xx, xy, yx, yy = symbol_orientation_matrix(position.angle, element.mirror)
+            strings = ['<use xlink:href="#{}" transform="matrix({} {} {} {} {} {})"/>'.format(
+                self.symbol_id(element.library_identifier, element.unit or 1), xx, yx, xy, yy,
+                format_iu(position.x), format_iu(position.y))]
+            for prop in element.properties:
+                if prop.text_effects.is_hide:
+                    continue
+                strings.append(_text(prop.value, prop.position_identifier.x, prop.position_identifier.y,
+                                     prop.position_identifier.angle, prop.text_effects, "field"))
+            return "".join(strings)
+        if isinstance(element, Wire):
+            return '<polyline class="wire" points="{}"/>'.format(
+                _points(element.coordinate_point_list.coordinate_points))
+        if isinstance(element, Bus):
+            return '<polyline class="bus" points="{}"/>'.format(
+                _points(element.coordinate_point_list.coordinate_points))
+        if isinstance(element, GraphicalLine):
+            return '<polyline class="line" points="{}"/>'.format(
+                _points(element.coordinate_point_list.coordinate_points))
+        if isinstance(element, Junction):
+            diameter = mm_to_iu(element.diameter) or 9144
+            return '<circle class="junction" cx="{}" cy="{}" r="{}"/>'.format(
+                format_iu(element.position_identifier.x), format_iu(element.position_identifier.y),
+                _format(diameter / 2))
+        if isinstance(element, NoConnect):
+            x, y = element.position_identifier.x, element.position_identifier.y
+            size = 6350
+            return '<path class="no_connect" d="M{},{} L{},{} M{},{} L{},{}"/>'.format(
+                format_iu(x - size), format_iu(y - size), format_iu(x + size), format_iu(y + size),
+                format_iu(x - size), format_iu(y + size), format_iu(x + size), format_iu(y - size))
+        if isinstance(element, (LocalLabel, GlobalLabel, HierarchicalLabel, GraphicalText)):
+            position = element.position_identifier
+            return _text(element.text, position.x, position.y, position.angle, element.text_effects,
+                         "" if isinstance(element, GraphicalText) else "label")
+        return ""
+
+    def render(self, schematic, file):
+        """
+        Write the SVG of a schematic to a text file object.
+        """
+        library_symbols = {}
+        used = []
+        for element in schematic.kicad_element:
+            if isinstance(element, LibrarySymbols):
+                for library_symbol in element.symbol_list:
+                    library_symbols[library_symbol.library_identifier] = (library_symbol,
+                                                                          library_symbol_key(library_symbol))
+            elif isinstance(element, SymbolSchematic):
+                used.append((element.library_identifier, element.unit or 1))
+
+        self._library_symbols = library_symbols
+        x, y, width, height = self.view_box(schematic)
+        file.write('<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                   'width="{}mm" height="{}mm" viewBox="{} {} {} {}">\n'
+                   .format(format_iu(width), format_iu(height), format_iu(x), format_iu(y), format_iu(width),
+                           format_iu(height)))
+        file.write("<style>{}</style>\n<defs>\n".format(style))
+        for library_identifier, unit in dict.fromkeys(used):
+            library_symbol_and_key = library_symbols.get(library_identifier)
+            if library_symbol_and_key is not None:
+                file.write(self.render_symbol(library_symbol_and_key[0], unit))
+                file.write("\n")
+        file.write('</defs>\n')
+
+        block = []
+        for element in schematic.kicad_element:
+            string = self.render_element(element)
+            if string:
+                block.append(string)
+                if len(block) >= _write_block:
+                    file.write("\n".join(block))
+                    file.write("\n")
+                    block = []
+        block.append("</svg>\n")
+        file.write("\n".join(block))
+
+    def render_to_file(self, schematic, file_name: str):
+        with open(file_name, "w", encoding="UTF-8") as file:
+            self.render(schematic, file)
+
+
+def render_svg(schematic, file_name: str):
+    """
+    Render a single schematic, see SVGRenderer to render many with a shared symbol cache.
+    """
+    SVGRenderer().render_to_file(schematic, file_name)
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import re
+import zlib
+
+from .parser import SymbolLibrary
+
+index_file_suffix = ".search.json"
+# Where index files go when the directory of a library is not writable, e.g. system libraries.
+cache_directory = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                               "kicad2python")
+
+_keyword_regex = re.compile(r"[^\W_]+")
+
+
+def _keywords(text: str) -> set:
+    return set(_keyword_regex.findall(text.lower()))
+
+
+def _cache_file_name(file_name: str) -> str:
+    """
+    Returns the name of the index file of a library in cache_directory, unique per library path.
+    """
+    digest = hashlib.blake2b(file_name.encode("UTF-8"), digest_size=8).hexdigest()
+    return os.path.join(cache_directory, "{}-{}{}".format(os.path.basename(file_name), digest, index_file_suffix))
+
+
+def _symbol_record(symbol) -> dict:
+    """
+    Returns the searchable data of a Symbol: its properties and the (number, name) of the pins of all its units.
+    """
+    pins = []
+    for unit in [symbol] + symbol.sub_symbols:
+        for pin in unit.pins:
+            pins.append([str(pin.number[0]), str(pin.name[0])])
+    return {"properties": {prop.key: prop.value.replace("\\\"", "\"") for prop in symbol.properties},
+            "pins": pins}
+
+
+def _is_valid_index(saved) -> bool:
+    """
+    Returns True if saved has the layout of an index file, so that a damaged or foreign file is rebuilt instead of
+    failing the search.
+    """
+    if not isinstance(saved, dict) or not isinstance(saved.get("size"), int) \
+            or not isinstance(saved.get("mtime_ns"), int) or not isinstance(saved.get("symbols"), dict):
+        return False
+    for record in saved["symbols"].values():
+        if not isinstance(record, dict) or not isinstance(record.get("checksum"), int) \
+                or not isinstance(record.get("properties"), dict) or not isinstance(record.get("pins"), list):
+            return False
+        if not all(isinstance(key, str) and isinstance(value, str) for key, value in record["properties"].items()):
+            return False
+        if not all(isinstance(pin, list) and len(pin) == 2 and all(isinstance(item, str) for item in pin)
+                   for pin in record["pins"]):
+            return False
+    return True
+
+
+class SymbolSearchIndex:
+    """
+    Search index over symbol properties and pins of one or more symbol libraries (.kicad_sym).
+
+    The data extracted from each library is saved next to it, in a file named as the library plus index_file_suffix,
+    or in cache_directory if the directory of the library is not writable; if neither is, it is not saved.
+    When a library changes only the symbols whose text changed are parsed again.
+    All queries are answered from in-memory sets, no library is read at query time.
+    """
+
+    def __init__(self):
+        self.libraries = {}
+        # Library file name -> (index, key, item) added for it, so that removing a library does not scan all indexes.
+        self._contributions = {}
+
+        self.keyword_index = {}
+        self.property_index = {}
+        self.pin_name_index = {}
+        self.pin_number_index = {}
+        self.pin_count_index = {}
+
+    def add_library(self, file_name: str):
+        """
+        Add a symbol library to the index, reading its saved index file if still up to date.
+        """
+        file_name = os.path.abspath(file_name)
+        self.remove_library(file_name)
+        stat = os.stat(file_name)
+        saved = self._read_index_file(file_name, stat)
+        if saved is None or saved["size"] != stat.st_size or saved["mtime_ns"] != stat.st_mtime_ns:
+            saved = self._update_index_file(file_name, saved)
+        self.libraries[file_name] = saved
+        contributions = self._contributions[file_name] = []
+        for name, record in saved["symbols"].items():
+            self._add_symbol(file_name, name, record, contributions)
+
+    def remove_library(self, file_name: str):
+        file_name = os.path.abspath(file_name)
+        if self.libraries.pop(file_name, None) is None:
+            return
+        for index, key, item in self._contributions.pop(file_name):
+            items = index.get(key)
+            if items is None:
+                continue
+            items.discard(item)
+            if not items:
+                del index[key]
+
+    def update(self):
+        """
+        Re-index the libraries changed on disk since they were added.
+        """
+        for file_name, saved in list(self.libraries.items()):
+            stat = os.stat(file_name)
+            if saved["size"] != stat.st_size or saved["mtime_ns"] != stat.st_mtime_ns:
+                self.add_library(file_name)
+
+    def search(self, keyword: str = None, properties: dict = None, pin_name: str = None, pin_number: str = None,
+               pin_count: int = None) -> set:
+        """
+        Returns the set of (library file name, symbol name) matching all the given criteria.
+
+        :param keyword: Words that must all appear in the symbol name or in any property value, case insensitive.
+        :param properties: Property values, matched exactly but case insensitive, e.g. {"ki_keywords": "r res"}.
+        :param pin_name: Name of a pin, case insensitive.
+        :param pin_number: Number of a pin.
+        :param pin_count: Number of pins of the symbol, all units included.
+        """
+        candidates = []
+        if keyword is not None:
+            for word in _keywords(keyword):
+                candidates.append(self.keyword_index.get(word, set()))
+        if properties is not None:
+            for key, value in properties.items():
+                candidates.append(self.property_index.get((key, value.lower()), set()))
+        if pin_name is not None:
+            candidates.append(self.pin_name_index.get(pin_name.lower(), set()))
+        if pin_number is not None:
+            candidates.append(self.pin_number_index.get(str(pin_number), set()))
+        if pin_count is not None:
+            candidates.append(self.pin_count_index.get(pin_count, set()))
+        if len(candidates) == 0:
+            return {(file_name, name) for file_name, saved in self.libraries.items() for name in saved["symbols"]}
+        candidates.sort(key=len)
+        return candidates[0].intersection(*candidates[1:])
+
+    def get_record(self, file_name: str, name: str) -> dict:
+        """
+        Returns properties and pins of a symbol as stored in the index.
+        """
+        return self.libraries[os.path.abspath(file_name)]["symbols"][name]
+
+    def _add_symbol(self, file_name, name, record, contributions):
+        item = (file_name, name)
+        keys = []
+        words = _keywords(name)
+        for key, value in record["properties"].items():
+            words.update(_keywords(value))
+            keys.append((self.property_index, (key, value.lower())))
+        for word in words:
+            keys.append((self.keyword_index, word))
+        for number, pin_name in record["pins"]:
+            keys.append((self.pin_number_index, number))
+            keys.append((self.pin_name_index, pin_name.lower()))
+        keys.append((self.pin_count_index, len(record["pins"])))
+        for index, key in keys:
+            index.setdefault(key, set()).add(item)
+            contributions.append((index, key, item))
+
+    @staticmethod
+    def _read_index_file(file_name, stat):
+        """
+        Returns the saved index of a library, preferably one still up to date, None if there is none.
+        Unreadable or invalid index files are ignored, they are overwritten when the library is indexed again.
+        """
+        found = None
+        for index_file_name in (file_name + index_file_suffix, _cache_file_name(file_name)):
+            try:
+                with open(index_file_name, "r", encoding="UTF-8") as file:
+                    saved = json.load(file)
+            except (OSError, ValueError):
+                continue
+            if not _is_valid_index(saved):
+                continue
+            if saved["size"] == stat.st_size and saved["mtime_ns"] == stat.st_mtime_ns:
+                return saved
+            if found is None:
+                found = saved
+        return found
+
+    @staticmethod
+    def _update_index_file(file_name, saved):
+        """
+        Index a library, parsing only the symbols whose text checksum differs from the previous index, then save the
+        new index file.
+        """
+        previous_symbols = saved["symbols"] if saved is not None else {}
+        library = SymbolLibrary()
+        library.load(file_name)
+        stat = os.stat(file_name)
+        symbols = {}
+        for name, (start, end) in library.symbol_index.items():
+            checksum = zlib.crc32(library.raw_bytes[start:end])
+            record = previous_symbols.get(name)
+            if record is None or record["checksum"] != checksum:
+                record = _symbol_record(library.get_symbol(name))
+                record["checksum"] = checksum
+            symbols[name] = record
+        saved = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "symbols": symbols}
+        for index_file_name in (file_name + index_file_suffix, _cache_file_name(file_name)):
+            try:
+                os.makedirs(os.path.dirname(index_file_name), exist_ok=True)
+                with open(index_file_name, "w", encoding="UTF-8") as file:
+                    json.dump(saved, file)
+                break
+            except OSError:
+                # Not writable, try the next place; the index is still usable, only not saved.
+                continue
+        return saved
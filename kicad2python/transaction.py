@@ -0,0 +1,198 @@
+_SET = 0
+_INSERT = 1
+_DELETE = 2
+_REPLACE = 3
+
+
+class TransactionError(Exception):
+    pass
+
+
+class Transaction:
+    """
+    Group of edits on a schematic, recorded as operations so that they can be reverted in O(edits).
+
+    Operations are (kind, target, key, old value, new value) tuples:
+        _SET        setattr(target, key, new value), target being an element or any object inside one
+        _INSERT     element inserted in schematic.kicad_element at position key
+        _DELETE     element removed from schematic.kicad_element at position key
+        _REPLACE    element at position key replaced by its private copy, see Schematic.edit()
+
+    The targets of the operations are added to schematic.dirty, so that the elements they
+    change are written again by Schematic.to_s_expression() after Schematic.track_changes().
+
+    Used as context manager the transaction is committed at the end of the block, or rolled back if an exception is
+    raised in it.
+
+    Example:    with log.begin() as transaction:
+                    symbol = transaction.edit(symbol)
+                    transaction.set(symbol, "unit", 2)
+                    transaction.remove(wire)
+    """
+
+    def __init__(self, schematic, log=None):
+        self.schematic = schematic
+        self.log = log
+        self.operations = []
+        self.state = "open"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.state != "open":
+            return
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+    def _check_open(self):
+        if self.state != "open":
+            raise TransactionError("Transaction already {}".format(self.state))
+
+    def set(self, target, attribute: str, value):
+        self._check_open()
+        self.operations.append((_SET, target, attribute, getattr(target, attribute), value))
+        setattr(target, attribute, value)
+        self.schematic.dirty.add(id(target))
+
+    def add(self, element, position: int = None):
+        """
+        Insert element in the schematic, at the end if position is None.
+        """
+        self._check_open()
+        if position is None:
+            position = len(self.schematic.kicad_element)
+        self.schematic.kicad_element.insert(position, element)
+        self.operations.append((_INSERT, element, position, None, None))
+
+    def remove(self, element):
+        self._check_open()
+        position = self.schematic.kicad_element.index(element)
+        del self.schematic.kicad_element[position]
+        self.operations.append((_DELETE, element, position, None, None))
+
+    def edit(self, element):
+        """
+        Returns element made private to the schematic, see Schematic.edit(); undoing restores the shared one.
+        """
+        self._check_open()
+        new_element = self.schematic.edit(element)
+        if new_element is not element:
+            position = self.schematic.kicad_element.index(new_element)
+            self.operations.append((_REPLACE, new_element, position, element, new_element))
+        return new_element
+
+    def touched(self) -> set:
+        """
+        Returns the ids of the objects changed by the transaction.
+        """
+        return {id(operation[1]) for operation in self.operations}
+
+    def commit(self):
+        self._check_open()
+        self.state = "committed"
+        self.schematic.dirty.update(self.touched())
+        if self.log is not None:
+            self.log.committed(self)
+
+    def rollback(self):
+        self._check_open()
+        self.revert()
+        self.schematic.dirty.update(self.touched())
+        self.state = "rolled back"
+
+    def revert(self):
+        """
+        Undo the operations, last first.
+        """
+        elements = self.schematic.kicad_element
+        for kind, target, key, old, new in reversed(self.operations):
+            if kind == _SET:
+                setattr(target, key, old)
+            elif kind == _INSERT:
+                del elements[self._position(target, key)]
+            elif kind == _DELETE:
+                elements.insert(key, target)
+            else:
+                elements[self._position(new, key)] = old
+
+    def apply(self):
+        """
+        Redo the operations, first first.
+        """
+        elements = self.schematic.kicad_element
+        for kind, target, key, old, new in self.operations:
+            if kind == _SET:
+                setattr(target, key, new)
+            elif kind == _INSERT:
+                elements.insert(key, target)
+            elif kind == _DELETE:
+                del elements[self._position(target, key)]
+            else:
+                elements[self._position(old, key)] = new
+
+    def _position(self, element, position: int) -> int:
+        # The recorded position is right unless kicad_element was changed outside of the transactions.
+        elements = self.schematic.kicad_element
+        if position < len(elements) and elements[position] is element:
+            return position
+        return elements.index(element)
+
+
+class TransactionLog:
+    """
+    Undo and redo history of the transactions of a schematic.
+
+    Example:    log = TransactionLog(schematic)
+                with log.begin() as transaction:
+                    transaction.set(label, "text", "VCC")
+                log.undo()
+                log.redo()
+    """
+
+    def __init__(self, schematic, max_transactions: int = 1000):
+        self.schematic = schematic
+        self.max_transactions = max_transactions
+        self.undo_stack = []
+        self.redo_stack = []
+
+    def begin(self) -> Transaction:
+        return Transaction(self.schematic, self)
+
+    def committed(self, transaction: Transaction):
+        if not transaction.operations:
+            return
+        self.undo_stack.append(transaction)
+        if len(self.undo_stack) > self.max_transactions:
+            del self.undo_stack[0]
+        self.redo_stack = []
+
+    @property
+    def can_undo(self) -> bool:
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self) -> bool:
+        return bool(self.redo_stack)
+
+    def undo(self):
+        if not self.undo_stack:
+            raise TransactionError("Nothing to undo")
+        transaction = self.undo_stack.pop()
+        transaction.revert()
+        self.schematic.dirty.update(transaction.touched())
+        self.redo_stack.append(transaction)
+
+    def redo(self):
+        if not self.redo_stack:
+            raise TransactionError("Nothing to redo")
+        transaction = self.redo_stack.pop()
+        transaction.apply()
+        self.schematic.dirty.update(transaction.touched())
+        self.undo_stack.append(transaction)
+
+    def clear(self):
+        self.undo_stack = []
+        self.redo_stack = []
@@ -0,0 +1,234 @@
+import re
+
+from .common import KiCADElement, RawElement, PositionIdentifier, CoordinatePoint, UniqueIdentifier, TextEffects, \
+    StrokeDefinition
+from .schematic_and_symbol_library import SymbolProperty
+from .schematic_file_format import LibrarySymbols, SymbolSchematic, BusEntry, Pin, SymbolInstances, \
+    HierarchicalSheetInstances
+
+
+# Schematic coordinates have the Y axis pointing down, angles are counterclockwise as seen on screen.
+_rotation_matrices = {0: (1, 0, 0, 1),
+                      90: (0, 1, -1, 0),
+                      180: (-1, 0, 0, -1),
+                      270: (0, -1, 1, 0)}
+_mirror_matrices = {None: (1, 0, 0, 1),
+                    "x": (1, 0, 0, -1),
+                    "y": (-1, 0, 0, 1)}
+_directions = {0: (1, 0), 90: (0, -1), 180: (-1, 0), 270: (0, 1)}
+_unit_regex = re.compile(r"_(\d+)_(\d+)$")
+
+
+def _multiply(first, second):
+    """
+    Returns the 2x2 matrix first * second, matrices are (xx, xy, yx, yy) tuples.
+    """
+    return (first[0] * second[0] + first[1] * second[2], first[0] * second[1] + first[1] * second[3],
+            first[2] * second[0] + first[3] * second[2], first[2] * second[1] + first[3] * second[3])
+
+
+# Symbol orientation: rotation first, then mirror. Some (angle, mirror) pairs give the same matrix: matrix -> its
+# pairs in the order KiCad picks them when saving, mirror only when needed and (mirror y) rather than 180 (mirror x).
+_orientations = {}
+for _angle, _mirror in [(0, None), (90, None), (180, None), (270, None), (0, "x"), (90, "x"), (270, "x"), (0, "y"),
+                        (90, "y"), (180, "y"), (270, "y"), (180, "x")]:
+    _orientations.setdefault(_multiply(_mirror_matrices[_mirror], _rotation_matrices[_angle]), []).append(
+        (_angle, _mirror))
+
+
+def symbol_orientation_matrix(angle, mirror) -> tuple:
+    """
+    Returns the (xx, xy, yx, yy) matrix placing a symbol with given angle and mirror on the sheet.
+    """
+    return _multiply(_mirror_matrices[mirror], _rotation_matrices[int(angle or 0) % 360])
+
+
+class Transform:
+    """
+    Affine transform on internal units restricted to what KiCad can represent: translations, rotations by multiples
+    of 90 degrees and mirrors. A point (x, y) is moved to (xx * x + xy * y + dx, yx * x + yy * y + dy).
+    """
+    def __init__(self, xx=1, xy=0, yx=0, yy=1, dx=0, dy=0):
+        self.xx = xx
+        self.xy = xy
+        self.yx = yx
+        self.yy = yy
+        self.dx = dx
+        self.dy = dy
+
+    @staticmethod
+    def translation(dx: int, dy: int):
+        return Transform(dx=dx, dy=dy)
+
+    @staticmethod
+    def rotation(angle: int, x: int = 0, y: int = 0):
+        """
+        Counterclockwise rotation by angle degrees (multiple of 90) around point (x, y).
+        """
+        xx, xy, yx, yy = _rotation_matrices[angle % 360]
+        return Transform(xx, xy, yx, yy, x - xx * x - xy * y, y - yx * x - yy * y)
+
+    @staticmethod
+    def mirror(axis: str, position: int = 0):
+        """
+        Mirror about the horizontal line y = position if axis is "x", about the vertical line x = position if "y".
+        """
+        if axis == "x":
+            return Transform(yy=-1, dy=2 * position)
+        return Transform(xx=-1, dx=2 * position)
+
+    def __mul__(self, other):
+        """
+        Returns the transform applying other first, then self.
+        """
+        xx, xy, yx, yy = _multiply(self.matrix(), other.matrix())
+        dx, dy = self.apply(other.dx, other.dy)
+        return Transform(xx, xy, yx, yy, dx, dy)
+
+    def matrix(self) -> tuple:
+        return self.xx, self.xy, self.yx, self.yy
+
+    def apply(self, x: int, y: int) -> tuple:
+        return self.xx * x + self.xy * y + self.dx, self.yx * x + self.yy * y + self.dy
+
+    def transform_angle(self, angle):
+        """
+        Returns the angle of a direction after the transform, None if angle is not a multiple of 90 degrees.
+        """
+        direction = _directions.get(int(angle) % 360) if angle == int(angle) else None
+        if direction is None:
+            return None
+        new_direction = (self.xx * direction[0] + self.xy * direction[1],
+                         self.yx * direction[0] + self.yy * direction[1])
+        for new_angle, value in _directions.items():
+            if value == new_direction:
+                return new_angle
+
+    def transform_orientation(self, angle, mirror) -> tuple:
+        """
+        Returns (angle, mirror) of a symbol after the transform, keeping its mirror axis when possible so that the
+        file changes as little as possible, else as KiCad writes it.
+        """
+        orientations = _orientations[_multiply(self.matrix(), symbol_orientation_matrix(angle, mirror))]
+        for orientation in orientations:
+            if orientation[1] == mirror:
+                return orientation
+        return orientations[0]
+
+
+# Classes never holding coordinates, not walked.
+_coordinate_free_classes = {UniqueIdentifier, TextEffects, StrokeDefinition, Pin, SymbolInstances,
+                            HierarchicalSheetInstances, RawElement, LibrarySymbols}
+
+
+def _collect_coordinates(elements, points: list, positions: list):
+    """
+    Appends to points every CoordinatePoint and PositionIdentifier found in the attributes of elements, at any depth,
+    and to positions the (PositionIdentifier, owner element) having an angle.
+    """
+    stack = [element for element in elements if type(element) not in _coordinate_free_classes]
+    while stack:
+        item = stack.pop()
+        values = list(item.__dict__.values())
+        while values:
+            value = values.pop()
+            value_type = type(value)
+            if value_type is CoordinatePoint:
+                points.append(value)
+            elif value_type is PositionIdentifier:
+                points.append(value)
+                if value.angle is not None:
+                    positions.append((value, item))
+            elif value_type is list:
+                values.extend(value)
+            elif value_type not in _coordinate_free_classes and isinstance(value, KiCADElement):
+                stack.append(value)
+
+
+def transform_elements(elements, transform: Transform):
+    """
+    Apply transform to the schematic elements: every coordinate is collected in flat x and y lists, moved in a single
+    pass and written back, then angles, symbols mirror and bus entries direction are updated. Library symbols and
+    elements kept as RawElement are not changed.
+    Pins positions on the sheet derive from their symbol position and orientation, so they follow the symbol.
+    """
+    points = []
+    positions = []
+    _collect_coordinates(elements, points, positions)
+
+    xx, xy, yx, yy, dx, dy = transform.xx, transform.xy, transform.yx, transform.yy, transform.dx, transform.dy
+    x_list = [point.x for point in points]
+    y_list = [point.y for point in points]
+    new_x_list = [xx * x + xy * y + dx for x, y in zip(x_list, y_list)]
+    new_y_list = [yx * x + yy * y + dy for x, y in zip(x_list, y_list)]
+    for point, x, y in zip(points, new_x_list, new_y_list):
+        point.x = x
+        point.y = y
+
+    for position, owner in positions:
+        if isinstance(owner, SymbolSchematic):
+            position.angle, owner.mirror = transform.transform_orientation(position.angle, owner.mirror)
+            continue
+        angle = transform.transform_angle(position.angle)
+        if angle is None:
+            continue
+        if isinstance(owner, SymbolProperty):
+            # Fields text is never drawn upside down.
+            angle %= 180
+        position.angle = angle
+
+    for element in elements:
+        if isinstance(element, BusEntry) and element.size:
+            # The size of a bus entry is a direction vector: rotated and mirrored, not translated.
+            x, y = element.size
+            element.size = [xx * x + xy * y, yx * x + yy * y]
+
+
+def unit_sub_symbols(library_symbol, unit: int = 1) -> list:
+    """
+    Returns the sub-symbols of a library Symbol drawn for given unit: the ones of that unit, the ones common to all
+    units, normal (not De Morgan) body style only.
+    """
+    sub_symbols = []
+    for sub_symbol in library_symbol.sub_symbols:
+        match = _unit_regex.search(sub_symbol.library_identifier)
+        if match is None or (int(match.group(1)) in (0, unit) and int(match.group(2)) in (0, 1)):
+            sub_symbols.append(sub_symbol)
+    return sub_symbols
+
+
+def library_pins(library_symbol, unit: int = 1) -> list:
+    """
+    Returns the SymbolPin of a library Symbol belonging to given unit, see unit_sub_symbols().
+    """
+    pins = list(library_symbol.pins)
+    for sub_symbol in unit_sub_symbols(library_symbol, unit):
+        pins.extend(sub_symbol.pins)
+    return pins
+
+
+def unit_count(library_symbol) -> int:
+    """
+    Returns the number of units of a library Symbol, from the names of its sub-symbols ("Name_<unit>_<style>").
+    """
+    count = 1
+    for sub_symbol in library_symbol.sub_symbols:
+        match = _unit_regex.search(sub_symbol.library_identifier)
+        if match is not None:
+            count = max(count, int(match.group(1)))
+    return count
+
+
+def pin_positions(symbol, library_symbol) -> list:
+    """
+    Returns (number, x, y, library pin) of each pin of a placed SymbolSchematic, (x, y) being the connection point of
+    the pin on the sheet. Library symbols have the Y axis pointing up, the sheet down.
+    """
+    position = symbol.position_identifier
+    xx, xy, yx, yy = symbol_orientation_matrix(position.angle, symbol.mirror)
+    positions = []
+    for pin in library_pins(library_symbol, symbol.unit or 1):
+        x = pin.position_identifier.x
+        y = -pin.position_identifier.y
+        positions.append((str(pin.number[0]), position.x + xx * x + xy * y, position.y + yx * x + yy * y, pin))
+    return positions
@@ -0,0 +1,47 @@
+# https://dev-docs.kicad.org/en/file-formats/sexpr-intro/#_coordinates_and_sizes
+#
+# Schematic and symbol library coordinates are written in millimeters with at most 4 decimals, KiCad stores them
+# internally as integers of 100 nanometers (internal units, IU). Coordinates are kept in IU so that arithmetic and
+# comparisons are exact and the number written back is the same that was read.
+
+
+iu_per_mm = 10000
+
+
+def mm_to_iu(value) -> int:
+    """
+    Returns the internal units corresponding to a value in millimeters (int, float or string).
+    """
+    if type(value) == int:
+        return value * iu_per_mm
+    return int(round(float(value) * iu_per_mm))
+
+
+def iu_to_mm(value: int) -> float:
+    return value / iu_per_mm
+
+
+def format_iu(value: int) -> str:
+    """
+    Returns the millimeters representation of a value in internal units, as written by KiCad.
+    Example:    value = 12700
+                return '1.27'
+    """
+    integer, fraction = divmod(abs(value), iu_per_mm)
+    sign = "-" if value < 0 else ""
+    if fraction == 0:
+        return "{}{}".format(sign, integer)
+    return "{}{}.{}".format(sign, integer, str(fraction + iu_per_mm)[1:].rstrip("0"))
+
+
+def mm_list_to_iu(values) -> list:
+    """
+    Returns a list of internal units from an S-Expression data list, e.g. the data of (start -1.016 -2.54).
+    """
+    if values is None:
+        return []
+    return [mm_to_iu(value) for value in values]
+
+
+def format_iu_list(values) -> str:
+    return " ".join([format_iu(value) for value in values])
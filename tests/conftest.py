@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+data_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+@pytest.fixture
+def schematic_file():
+    return os.path.join(data_directory, "test.kicad_sch")
+
+
+@pytest.fixture
+def schematic_text(schematic_file):
+    with open(schematic_file, "r", encoding="UTF-8") as file:
+        return file.read()
@@ -0,0 +1,69 @@
+from kicad2python import sexp
+from kicad2python.annotation import Annotator
+from kicad2python.builder import SchematicBuilder
+from kicad2python.parser import Schematic
+from kicad2python.schematic_file_format import LibrarySymbols, SymbolInstances, SymbolSchematic
+from test_erc import root_sheet, sub_sheet
+
+
+def library_symbol(schematic_text, multi_unit=False):
+    if multi_unit:
+        schematic_text = schematic_text.replace("(symbol \"R_0_1\"", "(symbol \"R_2_1\"")
+    schematic = Schematic()
+    schematic.from_s_expression(sexp.load(schematic_text))
+    return [element for element in schematic.kicad_element if isinstance(element, LibrarySymbols)][0].symbol_list[0]
+
+
+def build(schematic_text, references, positions, units=None, multi_unit=False):
+    builder = SchematicBuilder()
+    builder.add_library_symbol(library_symbol(schematic_text, multi_unit))
+    symbols = builder.add_symbols(["Device:R"] * len(references), positions,
+                                  [{"Reference": reference, "Value": "10k"} for reference in references],
+                                  units=units)
+    return builder.schematic, symbols
+
+
+def reference_property(symbol):
+    return [prop.value for prop in symbol.properties if prop.key == "Reference"][0]
+
+
+def instance_references(schematic):
+    return {str(instance.instance_path): str(instance.reference) for element in schematic.kicad_element
+            if isinstance(element, SymbolInstances) for instance in element.path_list}
+
+
+def test_number_by_position(schematic_text):
+    schematic, symbols = build(schematic_text, ["R?", "R?", "R?"], [(50800, 0), (0, 25400), (0, 0)])
+    references = Annotator().run([schematic])
+    assert [reference_property(symbol) for symbol in symbols] == ["R3", "R2", "R1"]
+    assert references == instance_references(schematic)
+    assert references["/" + symbols[0].unique_identifier.uuid] == "R3"
+
+    Annotator(order="y").run([schematic])
+    assert [reference_property(symbol) for symbol in symbols] == ["R2", "R3", "R1"]
+
+
+def test_keep_existing_numbers(schematic_text):
+    schematic, symbols = build(schematic_text, ["R?", "R2", "R?", "R2"], [(0, 0), (25400, 0), (50800, 0), (76200, 0)])
+    Annotator(reset=False).run([schematic])
+    assert [reference_property(symbol) for symbol in symbols] == ["R1", "R2", "R3", "R4"]
+
+
+def test_multi_unit_symbols_share_a_reference(schematic_text):
+    schematic, symbols = build(schematic_text, ["R?", "R?", "R?"], [(0, 0), (25400, 0), (50800, 0)], units=[1, 2, 1],
+                               multi_unit=True)
+    Annotator().run([schematic])
+    assert [reference_property(symbol) for symbol in symbols] == ["R1", "R1", "R2"]
+
+
+def test_sheet_used_twice(schematic_text):
+    first_path = "/5d4c3b2a-1111-2222-3333-0000000000aa"
+    second_path = "/5d4c3b2a-1111-2222-3333-0000000000bb"
+    root = root_sheet((first_path, "R5"), (second_path, "R5"))
+    sub = sub_sheet(schematic_text)
+    references = Annotator().run([root, sub])
+    symbol_path = "/0a1b2c3d-0000-0000-0000-000000000007"
+    assert references == {first_path + symbol_path: "R1", second_path + symbol_path: "R2"}
+    assert instance_references(root) == references
+    symbol = [element for element in sub.kicad_element if isinstance(element, SymbolSchematic)][0]
+    assert reference_property(symbol) == "R1"
@@ -0,0 +1,63 @@
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+
+from kicad2python import async_io
+from kicad2python.async_io import AsyncSchematicIO, load_async, save_async
+
+
+def test_load_and_save(schematic_file, tmp_path):
+    async def round_trip():
+        schematic = await load_async(schematic_file)
+        await save_async(schematic, str(tmp_path / "saved.kicad_sch.gz"))
+        async with AsyncSchematicIO(max_concurrency=2) as schematic_io:
+            loaded = await schematic_io.load_many([str(tmp_path / "saved.kicad_sch.gz"), schematic_file])
+        return schematic, loaded
+
+    schematic, loaded = asyncio.run(round_trip())
+    assert [item.file_name for item in loaded] == [str(tmp_path / "saved.kicad_sch.gz"), schematic_file]
+    assert all(item.to_s_expression() == schematic.to_s_expression() for item in loaded)
+
+
+def test_process_pool(schematic_file):
+    async def load():
+        with concurrent.futures.ProcessPoolExecutor(1) as executor:
+            return await load_async(schematic_file, executor)
+
+    assert len(asyncio.run(load()).kicad_element) == 14
+
+
+def test_cancel(schematic_file, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    parsed = []
+    parse_schematic = async_io._parse_schematic
+
+    def slow_read(file_name):
+        started.set()
+        release.wait(5)
+        return "".join(async_io.read_blocks(file_name))
+
+    def parse(raw_string, file_name):
+        parsed.append(file_name)
+        return parse_schematic(raw_string, file_name)
+
+    monkeypatch.setattr(async_io, "_read_file", slow_read)
+    monkeypatch.setattr(async_io, "_parse_schematic", parse)
+
+    async def cancel():
+        async with AsyncSchematicIO(max_concurrency=1) as schematic_io:
+            task = asyncio.ensure_future(schematic_io.load(schematic_file))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            release.set()
+            # The semaphore was released: the next load is not blocked.
+            return await asyncio.wait_for(schematic_io.load(schematic_file), 5)
+
+    assert asyncio.run(cancel()).file_name == schematic_file
+    # The cancelled load was not parsed.
+    assert parsed == [schematic_file]
@@ -0,0 +1,65 @@
+import pytest
+
+from kicad2python import sexp
+from kicad2python.bounding_box import BoundingBox, BoundingBoxes, library_item_box
+from kicad2python.common import element_decoder
+from kicad2python.parser import Schematic
+from kicad2python.schematic_and_symbol_library import symbol_graphic_items_dict, SymbolPin
+from kicad2python.schematic_file_format import SymbolSchematic
+
+stroke = "(stroke (width 0) (type default) (color 0 0 0 0)) (fill (type none))"
+
+
+def item_box(text: str) -> BoundingBox:
+    return library_item_box(symbol_graphic_items_dict.decode(sexp.load(text)))
+
+
+def arc_box(start, mid, end) -> BoundingBox:
+    return item_box("(arc (start {} {}) (mid {} {}) (end {} {}) {})".format(*start, *mid, *end, stroke))
+
+
+def test_circle_and_polyline():
+    assert item_box("(circle (center 1 2) (radius 3) {})".format(stroke)) == BoundingBox(-20000, -10000, 40000, 50000)
+    assert item_box("(polyline (pts (xy 0 0) (xy 5 -2) (xy 3 4)) {})".format(stroke)) == \
+        BoundingBox(0, -20000, 50000, 40000)
+
+
+@pytest.mark.parametrize("start, mid, end, box", [
+    # Counterclockwise through 90 degrees.
+    ((10, 0), (0, 10), (-10, 0), BoundingBox(-100000, 0, 100000, 100000)),
+    # Clockwise through 270 degrees.
+    ((10, 0), (0, -10), (-10, 0), BoundingBox(-100000, -100000, 100000, 0)),
+    # Through 0 degrees, the angle of the arc wraps around.
+    ((0, 10), (10, 0), (0, -10), BoundingBox(0, -100000, 100000, 100000)),
+    ((0, -10), (10, 0), (0, 10), BoundingBox(0, -100000, 100000, 100000)),
+    # Through 180 degrees.
+    ((0, 10), (-10, 0), (0, -10), BoundingBox(-100000, -100000, 0, 100000)),
+    ((-6, -8), (0, -10), (6, -8), BoundingBox(-60000, -100000, 60000, -80000)),
+    # No extreme point of the circle on the arc: only its ends.
+    ((8, 6), (7.0711, 7.0711), (6, 8), BoundingBox(60000, 60000, 80000, 80000)),
+    # Three quarters of a turn, through 90, 180 and 270 degrees.
+    ((10, 0), (-7.0711, 7.0711), (0, -10), BoundingBox(-100000, -100000, 100000, 100000)),
+])
+def test_arc(start, mid, end, box):
+    assert arc_box(start, mid, end) == box
+
+
+def test_pin():
+    pin = element_decoder(SymbolPin)(sexp.load(
+        "(pin passive line (at 1.27 3.81 270) (length 2.54)\n"
+        "  (name \"~\" (effects (font (size 1.27 1.27))))\n  (number \"1\" (effects (font (size 1.27 1.27)))))"))
+    assert library_item_box(pin) == BoundingBox(12700, 12700, 12700, 38100)
+
+
+def test_symbol_versions_with_one_cache(schematic_text):
+    boxes = BoundingBoxes(include_fields=False)
+    old = Schematic()
+    old.from_s_expression(sexp.load(schematic_text))
+    new = Schematic()
+    new.from_s_expression(sexp.load(schematic_text.replace("(rectangle (start -1.016 -2.54) (end 1.016 2.54)",
+                                                          "(rectangle (start -2.032 -2.54) (end 2.032 2.54)")))
+    widths = []
+    for schematic in (old, new, old):
+        symbol_box = [box for element, box in boxes.element_boxes(schematic) if isinstance(element, SymbolSchematic)]
+        widths.append(symbol_box[0].width)
+    assert widths == [20320, 40640, 20320]
@@ -0,0 +1,36 @@
+from kicad2python import sexp
+from kicad2python.builder import SchematicBuilder, default_text_size
+from kicad2python.fidelity import compare
+from kicad2python.parser import Schematic
+from kicad2python.schematic_file_format import LibrarySymbols
+
+
+def library_symbol(schematic_text):
+    schematic = Schematic()
+    schematic.from_s_expression(sexp.load(schematic_text))
+    return [element for element in schematic.kicad_element if isinstance(element, LibrarySymbols)][0].symbol_list[0]
+
+
+def test_text_effects_are_not_shared():
+    builder = SchematicBuilder()
+    first, second = builder.add_labels(["A", "B"], [(0, 0), (25400, 0)])
+    first.text_effects.size[0] = 2.54
+    assert second.text_effects.size == [1.27, 1.27]
+    assert default_text_size == [1.27, 1.27]
+
+
+def test_built_schematic_round_trip(schematic_text):
+    builder = SchematicBuilder()
+    builder.add_library_symbol(library_symbol(schematic_text))
+    symbols = builder.add_symbols(["Device:R"] * 2, [(0, 0), (50800, 0)],
+                                  [{"Reference": "R1", "Value": "1k"}, {"Reference": "R2", "Value": "1k"}])
+    builder.add_wires([((0, 38100), (50800, 38100))])
+    builder.add_junctions([(0, 38100)])
+    builder.add_labels(["NET"], [(25400, 38100)])
+    assert len(symbols) == 2
+
+    text = builder.schematic.to_s_expression()
+    schematic = Schematic()
+    schematic.from_s_expression(sexp.load(text))
+    assert compare(sexp.load(text), sexp.load(schematic.to_s_expression())) == []
+    assert len(list(schematic.select("symbol"))) == 2
@@ -0,0 +1,57 @@
+from kicad2python.parser import Schematic
+from kicad2python.schematic_file_format import SymbolSchematic, Wire
+from kicad2python.transform import Transform
+
+
+def elements_of(schematic, element_class):
+    return [element for element in schematic.kicad_element if isinstance(element, element_class)]
+
+
+def test_clone_shares_until_edit(schematic_file):
+    base = Schematic()
+    base.load(schematic_file)
+    original = base.to_s_expression()
+    variant = base.clone()
+    assert all(first is second for first, second in zip(base.kicad_element, variant.kicad_element))
+
+    symbol = variant.edit(elements_of(variant, SymbolSchematic)[0])
+    symbol.properties[1].value = "22k"
+    assert symbol is not elements_of(base, SymbolSchematic)[0]
+    assert elements_of(variant, SymbolSchematic)[0] is symbol
+    assert base.to_s_expression() == original
+    assert "\"22k\"" in variant.to_s_expression()
+    # Elements not edited are still shared.
+    assert elements_of(variant, Wire)[0] is elements_of(base, Wire)[0]
+
+
+def test_edit_original_after_clone(schematic_file):
+    base = Schematic()
+    base.load(schematic_file)
+    variant = base.clone()
+    original = variant.to_s_expression()
+    wire = base.edit(elements_of(base, Wire)[0])
+    base.transform(Transform.translation(25400, 0), [wire])
+    assert variant.to_s_expression() == original
+    assert base.to_s_expression() != original
+
+
+def test_edit_library_symbol(schematic_file):
+    base = Schematic()
+    base.load(schematic_file)
+    variant = base.clone()
+    symbol = variant.edit_library_symbol("Device:R")
+    symbol.properties[0].value = "RR"
+    assert variant.edit_library_symbol("Device:R") is symbol
+    assert base.edit_library_symbol("Device:R").properties[0].value == "R"
+    assert variant.edit_library_symbol("Device:X") is None
+
+
+def test_clones_of_clones(schematic_file):
+    base = Schematic()
+    base.load(schematic_file)
+    variants = [base.clone() for _ in range(3)]
+    variants.append(variants[0].clone())
+    for number, variant in enumerate(variants):
+        variant.edit(elements_of(variant, SymbolSchematic)[0]).properties[1].value = str(number)
+    values = [elements_of(schematic, SymbolSchematic)[0].properties[1].value for schematic in [base] + variants]
+    assert values == ["10k", "0", "1", "2", "3"]
@@ -0,0 +1,47 @@
+import threading
+
+from kicad2python import common, sexp
+from kicad2python.parser import Schematic
+
+symbol_text = """  (symbol (lib_id "Device:R") (at {x} 43.18 0) (unit 1)
+    (in_bom yes) (on_board yes)
+    (uuid 0a1b2c3d-0000-0000-0000-{number:012d})
+    (property "Reference" "R{number}" (id 0) (at 102.87 41.91 0)
+      (effects (font (size 1.27 1.27)) (justify left))
+    )
+  )
+"""
+library_symbol_text = """    (symbol "Device:R{number}" (in_bom yes) (on_board yes)
+      (property "Reference" "R" (id 0) (at 2.032 0 90)
+        (effects (font (size 1.27 1.27)))
+      )
+    )
+"""
+
+
+def test_nested_map_chunks_is_sequential():
+    threads = []
+
+    def outer(item):
+        outer_thread = threading.current_thread().name
+        inner_threads = common.map_chunks(lambda inner_item: threading.current_thread().name, list(range(600)), 4)
+        threads.append((outer_thread, set(inner_threads)))
+        return item * 2
+
+    assert common.map_chunks(outer, list(range(600)), 4) == [item * 2 for item in range(600)]
+    assert all(outer_thread.startswith("kicad2python-decode") and inner_threads == {outer_thread}
+               for outer_thread, inner_threads in threads)
+
+
+def test_threaded_decoding(schematic_text, monkeypatch):
+    library = "".join([library_symbol_text.format(number=number) for number in range(600)])
+    symbols = "".join([symbol_text.format(x=number * 2.54, number=number) for number in range(1000)])
+    text = schematic_text.replace("  (lib_symbols\n", "  (lib_symbols\n" + library)
+    text = text.replace("  (sheet_instances", symbols + "  (sheet_instances")
+    sequential = Schematic()
+    sequential.from_s_expression(sexp.load(text), workers=1)
+    monkeypatch.setattr(common, "decode_workers", 4)
+    threaded = Schematic()
+    threaded.from_s_expression(sexp.load(text))
+    assert len(threaded.kicad_element) > 1000
+    assert threaded.to_s_expression() == sequential.to_s_expression()
@@ -0,0 +1,30 @@
+import pytest
+
+from kicad2python.compressed_io import detect_compression, read_blocks, _zstd_module
+from kicad2python.parser import Schematic
+
+
+@pytest.mark.parametrize("suffix, compression", [("", None), (".gz", "gzip"), (".xz", "xz"), (".bz2", "bz2")])
+def test_save_and_load_compressed(schematic_file, tmp_path, suffix, compression):
+    schematic = Schematic()
+    schematic.load(schematic_file)
+    file_name = str(tmp_path / ("test.kicad_sch" + suffix))
+    schematic.save(file_name)
+    assert detect_compression(file_name) == compression
+
+    loaded = Schematic()
+    loaded.load(file_name)
+    assert loaded.to_s_expression() == schematic.to_s_expression()
+
+
+def test_zstd_frames(schematic_text, tmp_path):
+    try:
+        zstd = _zstd_module()
+    except ImportError:
+        pytest.skip("no zstd module")
+    middle = schematic_text.index("  (wire")
+    file_name = tmp_path / "test.kicad_sch.zst"
+    # Two frames, as written by "zstd -c a b" or by a streaming writer flushing a frame.
+    file_name.write_bytes(zstd.compress(schematic_text[:middle].encode("UTF-8")) +
+                          zstd.compress(schematic_text[middle:].encode("UTF-8")))
+    assert "".join(read_blocks(str(file_name))) == schematic_text
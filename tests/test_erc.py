@@ -0,0 +1,115 @@
+import pytest
+
+from kicad2python import sexp
+from kicad2python.erc import ERCEngine, OffGridRule
+from kicad2python.parser import Schematic
+
+root_text = """(kicad_sch (version 20211123) (generator eeschema)
+  (uuid 5d4c3b2a-1111-2222-3333-000000000000)
+  (paper "A4")
+  (lib_symbols)
+  (sheet_instances
+    (path "/" (page "1"))
+  )
+  (symbol_instances
+{}  )
+)
+"""
+instance_text = """    (path "{}/0a1b2c3d-0000-0000-0000-000000000007"
+      (reference "{}") (unit 1) (value "10k") (footprint "")
+    )
+"""
+
+
+def load(text: str) -> Schematic:
+    schematic = Schematic()
+    schematic.from_s_expression(sexp.load(text))
+    return schematic
+
+
+def sub_sheet(schematic_text) -> Schematic:
+    start = schematic_text.index("  (symbol_instances")
+    text = schematic_text[:start] + ")\n"
+    return load(text.replace("\"R1\"", "\"R5\""))
+
+
+def root_sheet(*instances) -> Schematic:
+    return load(root_text.format("".join([instance_text.format(path, reference) for path, reference in instances])))
+
+
+def rules(violations) -> list:
+    return sorted(violation.rule for violation in violations)
+
+
+def test_rules(schematic_text):
+    violations = ERCEngine().run([load(schematic_text)])
+    assert rules(violations) == ["off_grid", "unconnected_label", "unconnected_pin"]
+    pin_violation = [violation for violation in violations if violation.rule == "unconnected_pin"][0]
+    assert pin_violation.position == (1003300, 393700)
+
+    assert ERCEngine([OffGridRule(grid=100)]).run([load(schematic_text)]) == []
+
+    text = schematic_text.replace("  (text \"Hello\"", "  (wire (pts (xy 10.16 10.16) (xy 20.32 10.16))\n"
+                                  "    (stroke (width 0) (type default) (color 0 0 0 0))\n"
+                                  "    (uuid 0a1b2c3d-0000-0000-0000-00000000000b)\n  )\n  (text \"Hello\"")
+    assert rules(ERCEngine(["dangling_wire"]).run([load(text)])) == ["dangling_wire", "dangling_wire"]
+
+
+def test_duplicate_reference_in_one_sheet(schematic_text):
+    text = schematic_text.replace("0a1b2c3d-0000-0000-0000-000000000007", "0a1b2c3d-0000-0000-0000-00000000000c")
+    start = text.index("  (symbol (lib_id")
+    end = text.index("  (sheet_instances")
+    symbol = text[start:end]
+    text = schematic_text[:end] + symbol.replace("0000000c", "0000000d") + schematic_text[end:]
+    violations = ERCEngine(["duplicate_reference"]).run([load(text)])
+    assert [violation.message for violation in violations] == ["Reference R1 is used 2 times"]
+
+
+def test_sub_sheet_symbol_counted_once(schematic_text):
+    root = root_sheet(("/5d4c3b2a-1111-2222-3333-0000000000aa", "R5"))
+    assert ERCEngine(["duplicate_reference"]).run([root, sub_sheet(schematic_text)]) == []
+    assert ERCEngine(["duplicate_reference"]).run([sub_sheet(schematic_text), root]) == []
+
+
+@pytest.mark.parametrize("references, duplicated", [(("R5", "R6"), False), (("R5", "R5"), True)])
+def test_sheet_used_twice(schematic_text, references, duplicated):
+    root = root_sheet(("/5d4c3b2a-1111-2222-3333-0000000000aa", references[0]),
+                      ("/5d4c3b2a-1111-2222-3333-0000000000bb", references[1]),
+                      ("/5d4c3b2a-1111-2222-3333-0000000000aa", references[0]))
+    violations = ERCEngine(["duplicate_reference"]).run([root, sub_sheet(schematic_text)])
+    assert bool(violations) == duplicated
+
+
+hierarchical_label_text = """  (hierarchical_label "OUT" (shape output) (at 110.49 39.37 0) (fields_autoplaced)
+    (effects (font (size 1.27 1.27)) (justify left))
+    (uuid 0a1b2c3d-0000-0000-0000-00000000000e)
+  )
+"""
+sheet_text = """  (sheet (at 110.49 30.48) (size 12.7 12.7) (fields_autoplaced)
+    (stroke (width 0.1524) (type solid) (color 0 0 0 0))
+    (fill (color 0 0 0 0.0000))
+    (uuid 5d4c3b2a-1111-2222-3333-0000000000aa)
+    (property "Sheet name" "Sub" (id 0) (at 110.49 29.77 0)
+      (effects (font (size 1.27 1.27)) (justify left bottom))
+    )
+    (property "Sheet file" "sub.kicad_sch" (id 1) (at 110.49 43.76 0)
+      (effects (font (size 1.27 1.27)) (justify left top))
+    )
+    (pin "OUT" output (at 110.49 39.37 180)
+      (effects (font (size 1.27 1.27)) (justify left))
+      (uuid 0a1b2c3d-0000-0000-0000-00000000000f)
+    )
+  )
+"""
+
+
+@pytest.mark.parametrize("connection_text", [hierarchical_label_text, sheet_text])
+def test_hierarchical_connection(schematic_text, connection_text):
+    # A wire from the unconnected pin of R1 to a hierarchical label or a sheet pin.
+    text = schematic_text.replace("  (text \"Hello\"", "  (wire (pts (xy 100.33 39.37) (xy 110.49 39.37))\n"
+                                  "    (stroke (width 0) (type default) (color 0 0 0 0))\n"
+                                  "    (uuid 0a1b2c3d-0000-0000-0000-00000000000b)\n  )\n" + connection_text +
+                                  "  (text \"Hello\"")
+    assert ERCEngine(["unconnected_pin", "dangling_wire"]).run([load(text)]) == []
+    labels = [violation.message for violation in ERCEngine(["unconnected_label"]).run([load(text)])]
+    assert "Label OUT is not connected" not in labels
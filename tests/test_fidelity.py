@@ -0,0 +1,49 @@
+import gzip
+
+from kicad2python import sexp
+from kicad2python.fidelity import canonical_string, compare, first_difference, verify_round_trip
+
+
+def test_canonical_numbers():
+    assert canonical_string(sexp.load("(at 1.0 1.27 -0.00001 2)")) == "(at 1 1.27 -1e-05 2)"
+    assert canonical_string(sexp.load("(at 1.27)")) != canonical_string(sexp.load("(at 1.27001)"))
+
+
+def test_round_trip(schematic_file, schematic_text, tmp_path):
+    assert verify_round_trip(schematic_file) == []
+    compressed_file = tmp_path / "test.kicad_sch.gz"
+    compressed_file.write_bytes(gzip.compress(schematic_text.encode("UTF-8")))
+    assert verify_round_trip(str(compressed_file)) == []
+
+
+def test_precision_loss_is_detected(schematic_text, tmp_path):
+    file_name = tmp_path / "test.kicad_sch"
+    file_name.write_text(schematic_text.replace("(junction (at 100.33 50.8)", "(junction (at 100.33001 50.8)"),
+                         encoding="UTF-8")
+    assert verify_round_trip(str(file_name)) == [
+        ("changed", "junction", "0a1b2c3d-0000-0000-0000-000000000001", "junction/at[0]: 100.33 instead of 100.33001")]
+
+
+def test_compare(schematic_text):
+    original = sexp.load(schematic_text)
+    saved = sexp.load(schematic_text.replace("(reference \"R1\")", "(reference \"R2\")")
+                      .replace("(paper \"A4\")", "(paper \"A3\")")
+                      .replace("  (no_connect (at 120.65 60.96) (uuid 0a1b2c3d-0000-0000-0000-000000000002))\n", "")
+                      .replace("  (bus_alias", "  (bus_alias \"ADDR\" (members \"A0\"))\n  (bus_alias"))
+    assert sorted(compare(original, saved)) == [
+        ("added", "bus_alias", 1, ""),
+        ("changed", "bus_alias", 0, 'bus_alias: "ADDR" instead of "DATA"'),
+        ("changed", "paper", 0, 'paper: "A3" instead of "A4"'),
+        ("changed", "symbol_instances", 0, 'symbol_instances/path[0]/reference[0]: "R2" instead of "R1"'),
+        ("missing", "no_connect", "0a1b2c3d-0000-0000-0000-000000000002", "")]
+    assert first_difference(original, original) == "kicad_sch"
+
+
+def test_hierarchical_label_round_trip(schematic_text, tmp_path):
+    file_name = tmp_path / "test.kicad_sch"
+    file_name.write_text(schematic_text.replace("  (text \"Hello\"", "  (hierarchical_label \"A \\\"B\\\"\" (shape input)"
+                                                " (at 110.49 39.37 180) (fields_autoplaced)\n"
+                                                "    (effects (font (size 1.27 1.27)) (justify right))\n"
+                                                "    (uuid 0a1b2c3d-0000-0000-0000-00000000000e)\n  )\n"
+                                                "  (text \"Hello\""), encoding="UTF-8")
+    assert verify_round_trip(str(file_name)) == []
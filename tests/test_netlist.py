@@ -0,0 +1,56 @@
+import json
+
+from kicad2python import cli
+from kicad2python.erc import SheetIndex
+from kicad2python.netlist import build_netlist
+from kicad2python.parser import Schematic
+from test_erc import load
+
+wire_text = """  (wire (pts (xy {} {}) (xy {} {}))
+    (stroke (width 0) (type default) (color 0 0 0 0))
+    (uuid 0a1b2c3d-0000-0000-0000-00000000010{})
+  )
+"""
+wires_text = """(kicad_sch (version 20211123) (generator eeschema)
+{}{}{})
+""".format(wire_text.format(0, 0, 10.16, 0, 1), wire_text.format(5.08, 0, 5.08, 10.16, 2),
+           wire_text.format(0, 2.54, 2.54, 5.08, 3))
+
+
+def test_wires_at():
+    schematic = load(wires_text)
+    sheet = SheetIndex(schematic)
+    for element in schematic.kicad_element:
+        sheet.index_element(element)
+    horizontal, vertical, diagonal = sheet.wires
+    assert sheet.wires_at(25400, 0) == [horizontal]
+    assert sheet.wires_at(50800, 0) == [horizontal, vertical]
+    assert sheet.wires_at(50800, 0, horizontal) == [vertical]
+    assert sheet.wires_at(12700, 38100) == [diagonal]
+    assert sheet.wires_at(12700, 38101) == []
+    assert sheet.on_segment(100000, 0)
+    assert not sheet.on_segment(100000, 0, horizontal)
+
+
+def test_build_netlist(schematic_file):
+    schematic = Schematic()
+    schematic.load(schematic_file)
+    assert build_netlist([schematic]) == [
+        {"name": "NET1", "nodes": [{"reference": "R1", "pin": "2", "type": "passive"}]},
+        {"name": "Net-(R1-Pad1)", "nodes": [{"reference": "R1", "pin": "1", "type": "passive"}]}]
+
+
+def test_cli(schematic_file, tmp_path):
+    record = cli.process_file("stats", schematic_file)
+    assert record["ok"] and record["error"] is None
+    assert record["result"]["elements"]["symbol"] == 1
+    assert record["result"]["elements"]["wire"] == 1
+    assert set(record["timing"]) == {"read", "tokenize", "decode", "stats"}
+
+    output = tmp_path / "netlist.jsonl"
+    missing = str(tmp_path / "missing.kicad_sch")
+    assert cli.main(["netlist", schematic_file, missing, "--jobs", "1", "--output", str(output)]) == 1
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record["ok"] for record in records] == [True, False]
+    assert records[0]["result"][0]["name"] == "NET1"
+    assert records[1]["error"].startswith("FileNotFoundError")
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+import pytest
+
+import kicad2python
+
+code = """
+import sys
+import kicad2python
+loaded = sorted(name for name in sys.modules if name.startswith("kicad2python."))
+assert loaded == [], loaded
+schematic_class = kicad2python.Schematic
+assert "kicad2python.parser" in sys.modules
+assert "kicad2python.svg_renderer" not in sys.modules and "kicad2python.query" not in sys.modules
+assert kicad2python.__dict__["Schematic"] is schematic_class
+kicad2python.units
+assert "kicad2python.units" in sys.modules
+"""
+
+
+def test_lazy_import():
+    subprocess.run([sys.executable, "-c", code], check=True, cwd=kicad2python.__path__[0] + "/..")
+
+
+def test_exports():
+    for name in kicad2python.__all__:
+        assert getattr(kicad2python, name) is not None
+    assert set(kicad2python.__all__) <= set(dir(kicad2python))
+    with pytest.raises(AttributeError):
+        kicad2python.missing
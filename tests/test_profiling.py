@@ -0,0 +1,51 @@
+import gzip
+
+import pytest
+
+from kicad2python import sexp
+from kicad2python.common import RawElement
+from kicad2python.parser import Schematic
+from kicad2python.profiling import Profiler, registries
+from kicad2python.schematic_file_format import Wire
+
+
+def patched_state() -> list:
+    return [sexp.load, sexp.load_stream, RawElement.__dict__.get("to_s_expression"), Wire.__dict__["to_s_expression"],
+            "to_s_expression" in Schematic.__dict__] + \
+           [(dict(registry.decoders), registry.unknown) for registry in registries]
+
+
+def test_profile(schematic_file, schematic_text, tmp_path):
+    original = patched_state()
+    compressed_file = tmp_path / "test.kicad_sch.gz"
+    compressed_file.write_bytes(gzip.compress(schematic_text.encode("UTF-8")))
+    with Profiler() as profiler:
+        assert patched_state() != original
+        schematic = Schematic()
+        schematic.load(schematic_file, workers=1)
+        schematic.to_s_expression()
+        Schematic().load(str(compressed_file), workers=1)
+    assert patched_state() == original
+    stacks = {(item["stage"], tuple(item["stack"])): item["calls"] for item in profiler.report()}
+    assert stacks[("tokenize", ("sexp.load",))] == 1
+    assert stacks[("tokenize", ("sexp.load_stream",))] == 1
+    assert stacks[("from_s_expression", ("wire",))] == 2
+    assert stacks[("from_s_expression", ("lib_symbols", "rectangle"))] == 2
+    assert stacks[("from_s_expression", ("paper",))] == 2
+    assert stacks[("to_s_expression", ("wire",))] == 1
+    assert "to_s_expression;lib_symbols;rectangle " in profiler.to_collapsed_stacks()
+
+
+def test_restored_after_exception(schematic_file):
+    original = patched_state()
+    with pytest.raises(ZeroDivisionError):
+        with Profiler():
+            Schematic().load(schematic_file, workers=1)
+            1 / 0
+    assert patched_state() == original
+    profiler = Profiler()
+    profiler.enable()
+    profiler.enable()
+    profiler.disable()
+    profiler.disable()
+    assert patched_state() == original
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from kicad2python import sexp
+from kicad2python.parser import Schematic
+from kicad2python.query import SchematicIndex, compile_selector, element_token, select
+
+
+@pytest.fixture
+def schematic(schematic_text):
+    text = schematic_text.replace("(text \"Hello\"", "(text \"say \\\"hi\\\", [ok]\" (at 10 10 0)\n"
+                                  "    (effects (font (size 1.27 1.27)))\n"
+                                  "    (uuid 0a1b2c3d-0000-0000-0000-0000000000e0)\n  )\n  (text \"Hello\"")
+    schematic = Schematic()
+    schematic.from_s_expression(sexp.load(text))
+    return schematic
+
+
+def tokens(elements) -> list:
+    return [element_token(element) for element in elements]
+
+
+@pytest.mark.parametrize("selector, expected", [
+    ("symbol", ["symbol"]),
+    ("*", None),
+    ('symbol[lib_id="Device:R"]', ["symbol"]),
+    ("symbol[lib_id=Device:R][Value=10k]", ["symbol"]),
+    ("symbol[Value=22k]", []),
+    ("symbol[Footprint]", []),
+    ("symbol[!Footprint]", ["symbol"]),
+    ("symbol[Reference^=R], label[text$=1]", ["symbol", "label"]),
+    ("global_label[shape=input], global_label[text*=VI]", ["global_label"]),
+    ("*[text~=^N.T\\d$]", ["label"]),
+    ("text[text~=hi]", ["text"]),
+    ('text[text="say \\"hi\\", [ok]"]', ["text"]),
+    ("text[text!=Hello]", ["text"]),
+    ("paper", ["paper"]),
+    ("junction:overlaps(100, 50, 101, 51)", ["junction"]),
+    ("*:overlaps(100, 50, 101, 51)", ["junction", "wire", "label"]),
+    ("*[text]:overlaps(79 39 81 41)", ["text"]),
+    ("*:overlaps(-1e6, -1e6, 1e6, 1e6)", ["junction", "no_connect", "wire", "text", "text", "label", "global_label",
+                                          "symbol"]),
+    ("*:overlaps(1e5, 1e5, 1e6, 1e6)", []),
+])
+def test_select(schematic, selector, expected):
+    if expected is None:
+        expected = tokens(schematic.kicad_element)
+    assert tokens(select(schematic, selector)) == expected
+    assert tokens(schematic.select(selector)) == expected
+    assert tokens(SchematicIndex(schematic).select(selector)) == expected
+
+
+def test_explain(schematic):
+    index = SchematicIndex(schematic)
+    query = compile_selector('symbol[lib_id="Device:R"], wire, *:overlaps(0, 0, 1, 1), *[!text], '
+                             'label[text!=A][uuid=x]')
+    assert query.explain() == ["scan"] * 5
+    assert query.explain(index) == ["attribute lib_id", "type wire", "spatial", "scan", "attribute uuid"]
+
+
+def test_index_get(schematic):
+    index = SchematicIndex(schematic)
+    wire = next(schematic.select("wire"))
+    assert index.get(wire.unique_identifier.uuid) is wire
+    assert index.get("missing") is None
+
+
+def test_where(schematic):
+    assert tokens(select(schematic, "*", where=lambda element: element_token(element) == "wire")) == ["wire"]
+
+
+@pytest.mark.parametrize("selector", ["symbol[", "symbol]", "symbol[Value=1", "symbol:overlaps(1, 2, 3)",
+                                      "symbol:hover", "symbol wire", "symbol,", ", wire", "", "[text~=(]"])
+def test_invalid(selector):
+    with pytest.raises(Exception):
+        compile_selector(selector)
+
+
+def test_huge_area_is_fast(schematic):
+    index = SchematicIndex(schematic)
+    start = time.perf_counter()
+    assert len(list(index.select("*:overlaps(-1e9, -1e9, 1e9, 1e9)"))) == 8
+    assert time.perf_counter() - start < 1
@@ -0,0 +1,58 @@
+import pytest
+
+from kicad2python import sexp
+from kicad2python.common import RawElement, ElementRegistry, element_decoder
+from kicad2python.fidelity import compare
+from kicad2python.parser import Schematic
+from kicad2python.schematic_file_format import LibrarySymbols, Image
+
+
+def round_trip(text: str) -> list:
+    original_list = sexp.load(text)
+    schematic = Schematic()
+    schematic.from_s_expression(sexp.load(text))
+    return compare(original_list, sexp.load(schematic.to_s_expression()))
+
+
+def test_round_trip(schematic_text):
+    assert round_trip(schematic_text) == []
+
+
+def test_unknown_top_level_token_is_kept(schematic_text):
+    text = schematic_text.replace("(paper \"A4\")", "(paper \"A4\")\n  (future_token 1 \"x\")")
+    schematic = Schematic()
+    schematic.from_s_expression(sexp.load(text))
+    assert any(isinstance(element, RawElement) and element.token == "future_token"
+               for element in schematic.kicad_element)
+    assert round_trip(text) == []
+
+
+def test_unknown_symbol_tokens_are_kept(schematic_text):
+    text = schematic_text.replace("(on_board yes)\n      (property", "(on_board yes) (exclude_from_sim no)\n"
+                                                                     "      (property")
+    text = text.replace("(symbol \"R_0_1\"", "(symbol \"R_0_1\" (future_token 1 \"x\")")
+    schematic = Schematic()
+    schematic.from_s_expression(sexp.load(text))
+    library_symbol = [element for element in schematic.kicad_element
+                      if isinstance(element, LibrarySymbols)][0].symbol_list[0]
+    assert [element.token for element in library_symbol.raw_elements] == ["exclude_from_sim"]
+    assert [element.token for element in library_symbol.sub_symbols[0].raw_elements] == ["future_token"]
+    assert all(not isinstance(item, RawElement) for item in library_symbol.sub_symbols[0].graphic_items)
+    assert round_trip(text) == []
+
+
+def test_unimplemented_classes_are_kept_raw(schematic_text):
+    text = schematic_text.replace("(paper \"A4\")", "(paper \"A4\")\n  (image (at 10 10) (scale 2)\n"
+                                  "    (uuid 0a1b2c3d-0000-0000-0000-0000000000f0)\n    (data \"iVBORw0KGgo=\")\n  )")
+    schematic = Schematic()
+    schematic.from_s_expression(sexp.load(text))
+    tokens = [element.token for element in schematic.kicad_element if isinstance(element, RawElement)]
+    assert "image" in tokens
+    assert round_trip(text) == []
+
+
+def test_nested_not_implemented_error_is_raised():
+    registry = ElementRegistry({"stub": Image}, unknown=element_decoder(RawElement))
+    with pytest.raises(NotImplementedError):
+        registry.decode(sexp.load("(stub (at 0 0) (uuid 0a1b2c3d-0000-0000-0000-0000000000f1))"))
+    assert isinstance(registry.decode(sexp.load("(other 1)")), RawElement)
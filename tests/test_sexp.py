@@ -0,0 +1,35 @@
+import pytest
+import sexpdata
+
+from kicad2python import sexp
+
+tricky_text = """(kicad_sch (version 20211123) # comment (with "parenthesis"
+  (atoms bar\\ baz a\\(b\\) yes no -1.5 3 1e3 x\\\\y)
+  (strings "" "a b" "quote \\" inside" "paren ( )" "back\\\\slash" "new
+line")
+  (nested ((((deep)))) ()) # last comment
+)
+"""
+
+
+def chunks(text: str, size: int):
+    return (text[start:start + size] for start in range(0, len(text), size))
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64, 1 << 20])
+def test_load_stream_same_as_load(schematic_text, size):
+    for text in (tricky_text, schematic_text):
+        assert sexp.load_stream(chunks(text, size)) == sexp.load(text)
+
+
+def test_escaped_atoms():
+    result = sexp.load_stream(chunks(tricky_text, 1))
+    assert result[2][1:3] == [sexpdata.Symbol("bar baz"), sexpdata.Symbol("a(b)")]
+
+
+@pytest.mark.parametrize("text, error", [("(a (b)", sexpdata.ExpectClosingBracket),
+                                         ('(a "b)', sexpdata.ExpectClosingBracket),
+                                         ("(a))", sexpdata.ExpectNothing)])
+def test_errors(text, error):
+    with pytest.raises(error):
+        sexp.load_stream(chunks(text, 2))
@@ -0,0 +1,40 @@
+import pytest
+
+from kicad2python.parser import Schematic
+from kicad2python.schematic_file_format import Wire
+from kicad2python.snapshot import Snapshot, save_snapshot, load_snapshot
+
+
+@pytest.fixture
+def snapshot_file(schematic_file, tmp_path):
+    schematic = Schematic()
+    schematic.load(schematic_file)
+    file_name = str(tmp_path / "test.k2psnap")
+    save_snapshot(schematic, file_name)
+    return schematic, file_name
+
+
+def test_load_snapshot(snapshot_file):
+    schematic, file_name = snapshot_file
+    loaded = load_snapshot(file_name)
+    assert loaded.to_s_expression() == schematic.to_s_expression()
+    assert (loaded.file_name, loaded.version, loaded.generator) == \
+        (schematic.file_name, schematic.version, schematic.generator)
+
+
+def test_single_elements(snapshot_file):
+    schematic, file_name = snapshot_file
+    with Snapshot(file_name) as snapshot:
+        assert len(snapshot) == len(schematic.kicad_element)
+        for index in reversed(range(len(snapshot))):
+            element = snapshot.element(index)
+            assert snapshot.element_class(index) is type(element) is type(schematic.kicad_element[index])
+            assert element.to_s_expression() == schematic.kicad_element[index].to_s_expression()
+        wires = [snapshot.element(index) for index in range(len(snapshot)) if snapshot.element_class(index) is Wire]
+        assert len(wires) == 1
+        assert snapshot.element(0) is not snapshot.element(0)
+
+
+def test_not_a_snapshot(schematic_file):
+    with pytest.raises(ValueError):
+        Snapshot(schematic_file)
@@ -0,0 +1,53 @@
+import io
+
+from kicad2python import sexp
+from kicad2python.parser import Schematic
+from kicad2python.svg_renderer import SVGRenderer
+
+
+def render(renderer, schematic) -> list:
+    file = io.StringIO()
+    renderer.render(schematic, file)
+    lines = file.getvalue().splitlines()
+    # Skip the style sheet.
+    return lines[:1] + lines[lines.index("</style>") + 1:]
+
+
+def load(text: str) -> Schematic:
+    schematic = Schematic()
+    schematic.from_s_expression(sexp.load(text))
+    return schematic
+
+
+def test_render(schematic_text):
+    assert render(SVGRenderer(), load(schematic_text)) == [
+        '<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="51.285mm" '
+        'height="42.23mm" viewBox="75 24.365 51.285 42.23">',
+        '<defs>',
+        '<symbol id="symbol0" overflow="visible"><g class="symbol"><rect x="-1.016" y="-2.54" width="2.032" '
+        'height="5.08" stroke-width="0.254"/><line x1="0" y1="-3.81" x2="0" y2="-2.54"/>'
+        '<line x1="0" y1="3.81" x2="0" y2="2.54"/></g></symbol>',
+        '</defs>',
+        '<circle class="junction" cx="100.33" cy="50.8" r="0.4572"/>',
+        '<path class="no_connect" d="M120.015,60.325 L121.285,61.595 M120.015,61.595 L121.285,60.325"/>',
+        '<polyline class="wire" points="100.33,46.99 100.33,50.8"/>',
+        '<text x="80" y="40" font-size="1.27">Hello</text>',
+        '<text x="100.33" y="50.8" font-size="1.27" class="label">NET1</text>',
+        '<text x="90" y="30" font-size="1.27" text-anchor="end" dominant-baseline="central" class="label">VIN</text>',
+        '<use xlink:href="#symbol0" transform="matrix(1 0 0 1 100.33 43.18)"/>'
+        '<text x="102.87" y="41.91" font-size="1.27" dominant-baseline="central" class="field">R1</text>'
+        '<text x="102.87" y="44.45" font-size="1.27" dominant-baseline="central" class="field">10k</text>',
+        '</svg>']
+
+
+def test_symbol_versions_with_one_renderer(schematic_text):
+    renderer = SVGRenderer()
+    old = load(schematic_text)
+    new = load(schematic_text.replace("(rectangle (start -1.016 -2.54) (end 1.016 2.54)",
+                                      "(rectangle (start -2.032 -2.54) (end 2.032 2.54)"))
+    old_lines = render(renderer, old)
+    new_lines = render(renderer, new)
+    assert '<rect x="-2.032" y="-2.54" width="4.064"' in new_lines[2]
+    assert '<use xlink:href="#symbol1"' in new_lines[-2]
+    assert render(renderer, old) == old_lines
+    assert render(SVGRenderer(), new) == [line.replace("symbol1", "symbol0") for line in new_lines]
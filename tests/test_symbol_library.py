@@ -0,0 +1,103 @@
+import pytest
+
+from kicad2python.parser import SymbolLibrary
+
+library_text = """(kicad_symbol_lib (version 20211014) (generator kicad_symbol_editor)
+  (symbol "C" (in_bom yes) (on_board yes)
+    (property "Reference" "C" (id 0) (at 0 0 0)
+      (effects (font (size 1.27 1.27)))
+    )
+    (property "ki_description" "Capacitor (unpolarized)" (id 1) (at 0 0 0)
+      (effects (font (size 1.27 1.27)) hide)
+    )
+    (symbol "C_0_1"
+      (rectangle (start -1 -1) (end 1 1)
+        (stroke (width 0.254) (type default) (color 0 0 0 0))
+        (fill (type none))
+      )
+    )
+  )
+  (symbol "C_0402_1" (in_bom yes) (on_board yes)
+    (property "Reference" "C" (id 0) (at 0 0 0)
+      (effects (font (size 1.27 1.27)))
+    )
+  )
+  (symbol "D" (in_bom yes) (on_board yes)
+    (property "Reference" "D" (id 0) (at 0 0 0)
+      (effects (font (size 1.27 1.27)))
+    )
+  )
+)
+"""
+
+
+@pytest.fixture
+def library_file(tmp_path):
+    file_name = tmp_path / "test.kicad_sym"
+    file_name.write_text(library_text, encoding="UTF-8")
+    return str(file_name)
+
+
+@pytest.mark.parametrize("text", [library_text, library_text.replace("(unpolarized)", "unpolarized"),
+                                  library_text.replace("  (symbol \"D\"", "  (future_token 1)\n  (symbol \"D\"")])
+def test_index_top_level_symbols_only(tmp_path, text):
+    file_name = tmp_path / "test.kicad_sym"
+    file_name.write_text(text, encoding="UTF-8")
+    library = SymbolLibrary()
+    library.load(str(file_name))
+    assert library.version == "20211014"
+    assert list(library) == ["C", "C_0402_1", "D"]
+    assert [symbol.library_identifier for symbol in library.get_symbol("C").sub_symbols] == ["C_0_1"]
+    assert library.get_symbol("C_0402_1").library_identifier == "C_0402_1"
+    assert library.get_symbol_string("D").startswith("(symbol \"D\"")
+    assert library.get_symbol_string("D").endswith(")")
+
+
+def test_lazy_parse_and_save(library_file, tmp_path):
+    library = SymbolLibrary()
+    library.load(library_file)
+    assert library.symbols == {}
+    library.get_symbol("D")
+    assert list(library.symbols) == ["D"]
+    with pytest.raises(KeyError):
+        library.get_symbol("E")
+
+    saved_file = str(tmp_path / "saved.kicad_sym")
+    library.save(saved_file)
+    saved = SymbolLibrary()
+    saved.load(saved_file)
+    assert list(saved) == ["C", "C_0402_1", "D"]
+    assert saved.get_symbol_string("C") == library.get_symbol_string("C")
+
+
+@pytest.mark.parametrize("replace", [False, True])
+def test_escaped_names(tmp_path, replace):
+    text = library_text.replace("(symbol \"D\"", "(symbol \"A\\\"q\\\\x\"")
+    if replace:
+        # Parenthesis in strings: the index is built by the exact scan.
+        text = text.replace("(unpolarized)", "(unpolarized")
+    file_name = tmp_path / "test.kicad_sym"
+    file_name.write_text(text, encoding="UTF-8")
+    library = SymbolLibrary()
+    library.load(str(file_name))
+    assert list(library) == ["C", "C_0402_1", "A\"q\\x"]
+    symbol = library.get_symbol("A\"q\\x")
+    assert symbol.library_identifier == "A\"q\\x"
+
+    saved_file = str(tmp_path / "saved.kicad_sym")
+    library.save(saved_file)
+    saved = SymbolLibrary()
+    saved.load(saved_file)
+    assert list(saved) == list(library)
+    assert saved.get_symbol_string("A\"q\\x").startswith("(symbol \"A\\\"q\\\\x\"")
+
+
+@pytest.mark.parametrize("text", ["", "  \n", "(kicad_symbol_lib (version 20211014)",
+                                  library_text[:library_text.index("  (symbol \"D\"")],
+                                  library_text.replace("(unpolarized)", "(unpolarized")[:-3],
+                                  "(kicad_sch (version 20211123))"])
+def test_not_a_library(tmp_path, text):
+    file_name = tmp_path / "test.kicad_sym"
+    file_name.write_text(text, encoding="UTF-8")
+    with pytest.raises(ValueError):
+        SymbolLibrary().load(str(file_name))
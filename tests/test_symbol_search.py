@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from kicad2python import symbol_search
+from kicad2python.symbol_search import SymbolSearchIndex, index_file_suffix
+from test_symbol_library import library_text
+
+
+@pytest.fixture
+def library_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(symbol_search, "cache_directory", str(tmp_path / "cache"))
+    file_name = tmp_path / "library" / "test.kicad_sym"
+    file_name.parent.mkdir()
+    file_name.write_text(library_text, encoding="UTF-8")
+    return str(file_name)
+
+
+def test_search_and_saved_index(library_file):
+    index = SymbolSearchIndex()
+    index.add_library(library_file)
+    assert index.search(keyword="unpolarized capacitor") == {(library_file, "C")}
+    assert index.search(properties={"Reference": "d"}) == {(library_file, "D")}
+    assert len(index.search()) == 3
+    assert os.path.isfile(library_file + index_file_suffix)
+
+    saved = SymbolSearchIndex()
+    saved.add_library(library_file)
+    assert saved.libraries[library_file] == index.libraries[library_file]
+
+
+def test_unwritable_library_directory(library_file):
+    # A directory in place of the index file makes it impossible to read or write, even as root.
+    os.mkdir(library_file + index_file_suffix)
+    index = SymbolSearchIndex()
+    index.add_library(library_file)
+    assert os.path.isfile(symbol_search._cache_file_name(library_file))
+    assert index.search(keyword="c") == {(library_file, "C"), (library_file, "C_0402_1")}
+
+
+def test_unwritable_cache_directory(library_file, tmp_path, monkeypatch):
+    os.mkdir(library_file + index_file_suffix)
+    (tmp_path / "not_a_directory").write_text("")
+    monkeypatch.setattr(symbol_search, "cache_directory", str(tmp_path / "not_a_directory"))
+    index = SymbolSearchIndex()
+    index.add_library(library_file)
+    assert index.search(keyword="d") == {(library_file, "D")}
+
+
+def test_remove_and_update_library(library_file, tmp_path):
+    other_file = str(tmp_path / "library" / "other.kicad_sym")
+    with open(other_file, "w", encoding="UTF-8") as file:
+        file.write(library_text.replace("\"D\"", "\"E\""))
+    index = SymbolSearchIndex()
+    index.add_library(library_file)
+    index.add_library(other_file)
+    assert index.search(properties={"Reference": "c"}) == {(library_file, "C"), (library_file, "C_0402_1"),
+                                                           (other_file, "C"), (other_file, "C_0402_1")}
+
+    index.remove_library(library_file)
+    assert all(item[0] == other_file for items in index.keyword_index.values() for item in items)
+    assert len(index.search()) == 3
+
+    index.add_library(library_file)
+    with open(library_file, "w", encoding="UTF-8") as file:
+        file.write(library_text.replace("Capacitor", "Condensator"))
+    os.utime(library_file, ns=(0, 0))
+    index.update()
+    assert index.search(keyword="condensator") == {(library_file, "C")}
+    assert index.search(keyword="capacitor") == {(other_file, "C")}
+
+
+@pytest.mark.parametrize("content", ['{}', '[]', '{"size": 1, "mtime_ns": 1, "symbols": {"C": {}}}',
+                                     '{"size": 1, "mtime_ns": 1, "symbols": {"C": {"checksum": 0, "properties": {},'
+                                     ' "pins": [["1"]]}}}', '{"size": "1", "mtime_ns": 1, "symbols": {}}'])
+def test_invalid_index_file(library_file, content):
+    with open(library_file + index_file_suffix, "w", encoding="UTF-8") as file:
+        file.write(content)
+    index = SymbolSearchIndex()
+    index.add_library(library_file)
+    assert index.search(properties={"Reference": "d"}) == {(library_file, "D")}
+    saved = SymbolSearchIndex()
+    saved.add_library(library_file)
+    assert saved.libraries[library_file] == index.libraries[library_file]
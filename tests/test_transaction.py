@@ -0,0 +1,89 @@
+import pytest
+
+from kicad2python.parser import Schematic
+from kicad2python.schematic_file_format import SymbolSchematic, Wire
+from kicad2python.transaction import Transaction, TransactionLog, TransactionError
+from kicad2python.transform import Transform
+
+
+def full_output(schematic) -> str:
+    copy = Schematic()
+    copy.version = schematic.version
+    copy.kicad_element = schematic.kicad_element
+    return copy.to_s_expression()
+
+
+@pytest.fixture
+def schematic(schematic_file):
+    schematic = Schematic()
+    schematic.load(schematic_file)
+    schematic.track_changes()
+    schematic.to_s_expression()
+    return schematic
+
+
+def first(schematic, element_class):
+    return next(element for element in schematic.kicad_element if isinstance(element, element_class))
+
+
+def test_undo_redo(schematic):
+    log = TransactionLog(schematic)
+    symbol = first(schematic, SymbolSchematic)
+    wire = first(schematic, Wire)
+    original = schematic.to_s_expression()
+    with log.begin() as transaction:
+        transaction.set(symbol.properties[1], "value", "22k")
+        transaction.remove(wire)
+    assert "\"22k\"" in schematic.to_s_expression()
+    log.undo()
+    assert schematic.to_s_expression() == original
+    log.redo()
+    assert schematic.to_s_expression() == full_output(schematic)
+    assert not log.can_redo
+    with pytest.raises(TransactionError):
+        log.redo()
+
+
+def test_rollback(schematic):
+    symbol = first(schematic, SymbolSchematic)
+    original = schematic.to_s_expression()
+    with pytest.raises(ValueError):
+        with Transaction(schematic) as transaction:
+            transaction.set(symbol, "unit", 2)
+            raise ValueError
+    assert symbol.unit != 2
+    assert schematic.to_s_expression() == original
+
+
+def test_output_reused(schematic):
+    strings = dict(schematic._element_strings)
+    symbol = first(schematic, SymbolSchematic)
+    with Transaction(schematic) as transaction:
+        transaction.set(symbol.properties[1], "value", "22k")
+    output = schematic.to_s_expression()
+    assert output == full_output(schematic)
+    changed = [element for element in schematic.kicad_element
+               if schematic._element_strings[id(element)][1] is not strings[id(element)][1]]
+    assert changed == [symbol]
+    assert not schematic.dirty
+
+
+def test_edit_and_transform(schematic):
+    wire = schematic.edit(first(schematic, Wire))
+    wire.coordinate_point_list.coordinate_points[0].x += 25400
+    assert schematic.to_s_expression() == full_output(schematic)
+    schematic.transform(Transform.translation(0, 25400), [first(schematic, SymbolSchematic)])
+    assert schematic.to_s_expression() == full_output(schematic)
+    schematic.edit_library_symbol("Device:R").properties[0].value = "RR"
+    assert schematic.to_s_expression() == full_output(schematic)
+
+
+def test_clone(schematic):
+    variant = schematic.clone()
+    variant.track_changes()
+    original = schematic.to_s_expression()
+    with Transaction(variant) as transaction:
+        symbol = transaction.edit(first(variant, SymbolSchematic))
+        transaction.set(symbol, "unit", 2)
+    assert variant.to_s_expression() == full_output(variant)
+    assert schematic.to_s_expression() == original
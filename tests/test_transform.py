@@ -0,0 +1,76 @@
+import pytest
+
+from kicad2python import sexp
+from kicad2python.parser import Schematic
+from kicad2python.schematic_file_format import BusEntry, SymbolSchematic, Wire
+from kicad2python.transform import Transform, symbol_orientation_matrix
+
+bus_entry_text = """(bus_entry (at 50.8 25.4) (size 2.54 -2.54)
+    (stroke (width 0) (type default) (color 0 0 0 0))
+    (uuid 0a1b2c3d-0000-0000-0000-00000000000a)
+  )"""
+
+
+def load(text: str) -> Schematic:
+    schematic = Schematic()
+    schematic.from_s_expression(sexp.load(text))
+    return schematic
+
+
+def elements_of(schematic: Schematic, element_class) -> list:
+    return [element for element in schematic.kicad_element if isinstance(element, element_class)]
+
+
+def test_bus_entry_direction(schematic_text):
+    schematic = load(schematic_text.replace("  (sheet_instances", "  " + bus_entry_text + "\n\n  (sheet_instances"))
+    bus_entry = elements_of(schematic, BusEntry)[0]
+    assert bus_entry.size == [25400, -25400]
+
+    schematic.transform(Transform.rotation(90))
+    assert (bus_entry.position_identifier.x, bus_entry.position_identifier.y) == (254000, -508000)
+    assert bus_entry.size == [-25400, -25400]
+    schematic.transform(Transform.mirror("y", 1000))
+    assert (bus_entry.position_identifier.x, bus_entry.position_identifier.y) == (-252000, -508000)
+    assert bus_entry.size == [25400, -25400]
+    assert "(size 2.54 -2.54)" in bus_entry.to_s_expression()
+
+
+def test_wires_and_symbols(schematic_text):
+    schematic = load(schematic_text)
+    schematic.transform(Transform.rotation(90, 1003300, 508000))
+    wire = elements_of(schematic, Wire)[0]
+    assert [(point.x, point.y) for point in wire.coordinate_point_list.coordinate_points] == \
+        [(965200, 508000), (1003300, 508000)]
+    symbol = elements_of(schematic, SymbolSchematic)[0]
+    assert (symbol.position_identifier.x, symbol.position_identifier.y, symbol.position_identifier.angle) == \
+        (927100, 508000, 90)
+
+    schematic.transform(Transform.mirror("x", 500000))
+    assert (symbol.position_identifier.x, symbol.position_identifier.y) == (927100, 492000)
+    assert (symbol.position_identifier.angle, symbol.mirror) == (90, "x")
+
+
+def test_full_turn_is_identity(schematic_text):
+    schematic = load(schematic_text)
+    original = schematic.to_s_expression()
+    for _ in range(4):
+        schematic.transform(Transform.rotation(90, 12700, -25400))
+    assert schematic.to_s_expression() == original
+    schematic.transform(Transform.mirror("x", 5000))
+    schematic.transform(Transform.mirror("x", 5000))
+    assert schematic.to_s_expression() == original
+
+
+@pytest.mark.parametrize("angle, mirror, transform, expected", [
+    (0, None, Transform.mirror("y"), (0, "y")),
+    (0, None, Transform.mirror("x"), (0, "x")),
+    (90, None, Transform.mirror("y"), (270, "x")),
+    (0, "y", Transform.rotation(90), (270, "y")),
+    (90, "y", Transform.rotation(0), (90, "y")),
+    (0, "x", Transform.mirror("y"), (180, None)),
+    (180, None, Transform.mirror("x"), (0, "y")),
+])
+def test_symbol_orientation(angle, mirror, transform, expected):
+    assert transform.transform_orientation(angle, mirror) == expected
+    assert symbol_orientation_matrix(*expected) == \
+        (transform * Transform(*symbol_orientation_matrix(angle, mirror))).matrix()
@@ -0,0 +1,30 @@
+import pytest
+
+from kicad2python.units import mm_to_iu, iu_to_mm, format_iu, mm_list_to_iu, format_iu_list
+
+
+@pytest.mark.parametrize("text, value", [("0", 0), ("1.27", 12700), ("-2.54", -25400), ("0.0001", 1), ("-0.0001", -1),
+                                         ("100.33", 1003300), ("-0.5", -5000), ("1234.5678", 12345678)])
+def test_format_iu(text, value):
+    assert mm_to_iu(text) == value
+    assert mm_to_iu(float(text)) == value
+    assert format_iu(value) == text
+
+
+@pytest.mark.parametrize("value", [1.27, 2.54, 0.1, 100.33, -43.18, 0.3, 12.7])
+def test_float_round_trip(value):
+    # Binary floats like 0.1 or 2.54 must not drift to 0.0999 or 2.5399.
+    assert format_iu(mm_to_iu(value)) == repr(value)
+    assert iu_to_mm(mm_to_iu(value)) == value
+
+
+def test_integers_and_lists():
+    assert mm_to_iu(3) == 30000
+    assert format_iu(30000) == "3"
+    assert mm_list_to_iu(None) == []
+    assert format_iu_list(mm_list_to_iu([-1.016, -2.54])) == "-1.016 -2.54"
+
+
+def test_all_4_decimal_values_round_trip():
+    for value in range(-20000, 20001):
+        assert mm_to_iu(format_iu(value)) == value